@@ -1,6 +1,6 @@
 {
     'name': 'Financial Reports - Interactive Viewer',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.1.0',
     'category': 'Accounting',
     'summary': 'Interactive financial reports with hierarchy expand/collapse like Enterprise',
     'description': """
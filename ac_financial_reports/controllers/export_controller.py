@@ -1,6 +1,6 @@
 import io
 import json
-from odoo import http
+from odoo import fields, http
 from odoo.http import request, content_disposition
 
 
@@ -384,12 +384,15 @@ class FinancialReportExportController(http.Controller):
     @http.route('/ac_financial_reports/export/general_ledger/xlsx', type='http', auth='user')
     def export_general_ledger_xlsx(self, date_from=None, date_to=None, **kwargs):
         import openpyxl
+        from openpyxl.cell import WriteOnlyCell
         from openpyxl.styles import Font, PatternFill
 
-        data = request.env['account.account'].get_general_ledger_data(date_from=date_from, date_to=date_to)
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "General Ledger"
+        date_from, date_to = self._get_general_ledger_dates(date_from, date_to)
+
+        # Write-only workbook: rows are written as the ledger lines are
+        # fetched instead of keeping the whole ledger in memory
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("General Ledger")
 
         header_font = Font(bold=True, color="FFFFFF", size=10)
         header_fill = PatternFill(start_color="2C3E50", end_color="2C3E50", fill_type="solid")
@@ -397,53 +400,15 @@ class FinancialReportExportController(http.Controller):
         bold_font = Font(bold=True, size=10)
         num_fmt = '#,##0.00'
 
-        ws.merge_cells('A1:G1')
-        ws['A1'] = 'General Ledger'
-        ws['A1'].font = Font(bold=True, size=14)
-        ws['A2'] = f"Period: {date_from or ''} to {date_to or ''}"
-
-        r = 4
-        for acc in data['accounts']:
-            # Account header
-            for c in range(1, 8): ws.cell(row=r, column=c).fill = acc_fill
-            ws.cell(row=r, column=1, value=acc['code']).font = bold_font
-            ws.cell(row=r, column=2, value=acc['name']).font = bold_font
-            ws.cell(row=r, column=7, value=acc['ending_balance']).font = bold_font
-            ws.cell(row=r, column=7).number_format = num_fmt
-            r += 1
-
-            # Column headers
-            for col, h in enumerate(['Date', 'Reference', 'Partner', 'Label', 'Debit', 'Credit', 'Balance'], 1):
-                cell = ws.cell(row=r, column=col, value=h)
-                cell.font = header_font
-                cell.fill = header_fill
-            r += 1
-
-            # Opening
-            ws.cell(row=r, column=4, value="Opening Balance").font = Font(italic=True)
-            ws.cell(row=r, column=7, value=acc['opening_balance']).number_format = num_fmt
-            r += 1
-
-            # Entries
-            for entry in acc['entries']:
-                ws.cell(row=r, column=1, value=entry['date'])
-                ws.cell(row=r, column=2, value=entry['move_name'])
-                ws.cell(row=r, column=3, value=entry['partner'])
-                ws.cell(row=r, column=4, value=entry['label'])
-                ws.cell(row=r, column=5, value=entry['debit']).number_format = num_fmt
-                ws.cell(row=r, column=6, value=entry['credit']).number_format = num_fmt
-                ws.cell(row=r, column=7, value=entry['balance']).number_format = num_fmt
-                r += 1
-
-            # Subtotal
-            ws.cell(row=r, column=4, value="Ending Balance").font = bold_font
-            ws.cell(row=r, column=5, value=acc['total_debit']).font = bold_font
-            ws.cell(row=r, column=5).number_format = num_fmt
-            ws.cell(row=r, column=6, value=acc['total_credit']).font = bold_font
-            ws.cell(row=r, column=6).number_format = num_fmt
-            ws.cell(row=r, column=7, value=acc['ending_balance']).font = bold_font
-            ws.cell(row=r, column=7).number_format = num_fmt
-            r += 2  # blank row between accounts
+        def cell(value=None, font=None, fill=None, number_format=None):
+            c = WriteOnlyCell(ws, value=value)
+            if font:
+                c.font = font
+            if fill:
+                c.fill = fill
+            if number_format:
+                c.number_format = number_format
+            return c
 
         ws.column_dimensions['A'].width = 12
         ws.column_dimensions['B'].width = 18
@@ -452,29 +417,71 @@ class FinancialReportExportController(http.Controller):
         for col in ['E', 'F', 'G']:
             ws.column_dimensions[col].width = 16
 
+        ws.append([cell('General Ledger', font=Font(bold=True, size=14))])
+        ws.append([f"Period: {date_from or ''} to {date_to or ''}"])
+        ws.append([])
+
+        ledger = request.env['account.account']._iter_general_ledger(date_from, date_to)
+        for kind, values in ledger:
+            if kind == 'account':
+                # Account header
+                ws.append([cell(values['code'], font=bold_font, fill=acc_fill),
+                           cell(values['name'], font=bold_font, fill=acc_fill)]
+                          + [cell(fill=acc_fill) for c in range(4)]
+                          + [cell(values['ending_balance'], font=bold_font, fill=acc_fill, number_format=num_fmt)])
+                # Column headers
+                ws.append([cell(h, font=header_font, fill=header_fill)
+                           for h in ['Date', 'Reference', 'Partner', 'Label', 'Debit', 'Credit', 'Balance']])
+                # Opening
+                ws.append([None, None, None, cell("Opening Balance", font=Font(italic=True)), None, None,
+                           cell(values['opening_balance'], number_format=num_fmt)])
+            elif kind == 'entry':
+                ws.append([values['date'], values['move_name'], values['partner'], values['label'],
+                           cell(values['debit'], number_format=num_fmt),
+                           cell(values['credit'], number_format=num_fmt),
+                           cell(values['balance'], number_format=num_fmt)])
+            else:
+                # Subtotal
+                ws.append([None, None, None, cell("Ending Balance", font=bold_font),
+                           cell(values['total_debit'], font=bold_font, number_format=num_fmt),
+                           cell(values['total_credit'], font=bold_font, number_format=num_fmt),
+                           cell(values['ending_balance'], font=bold_font, number_format=num_fmt)])
+                ws.append([])  # blank row between accounts
+
         output = io.BytesIO()
         wb.save(output)
         return self._get_xlsx_response(output, f"general_ledger_{date_from}_{date_to}.xlsx")
 
     @http.route('/ac_financial_reports/export/general_ledger/pdf', type='http', auth='user')
     def export_general_ledger_pdf(self, date_from=None, date_to=None, **kwargs):
-        data = request.env['account.account'].get_general_ledger_data(date_from=date_from, date_to=date_to)
+        date_from, date_to = self._get_general_ledger_dates(date_from, date_to)
         headers = [
             {'key': 'date', 'label': 'Date'}, {'key': 'move_name', 'label': 'Reference'},
             {'key': 'partner', 'label': 'Partner'}, {'key': 'label', 'label': 'Label'},
             {'key': 'debit', 'label': 'Debit', 'right': True}, {'key': 'credit', 'label': 'Credit', 'right': True},
             {'key': 'balance', 'label': 'Balance', 'right': True},
         ]
-        rows = []
-        for acc in data['accounts']:
-            rows.append({'date': acc['code'], 'move_name': '', 'partner': '', 'label': acc['name'], 'debit': '', 'credit': '', 'balance': acc['ending_balance'], '_level': 0, '_css': 'level-0'})
-            rows.append({'date': '', 'move_name': '', 'partner': '', 'label': 'Opening Balance', 'debit': '', 'credit': '', 'balance': acc['opening_balance'], '_level': 0, '_css': ''})
-            for entry in acc['entries']:
-                rows.append({**entry, '_level': 0, '_css': ''})
-            rows.append({'date': '', 'move_name': '', 'partner': '', 'label': 'Ending Balance', 'debit': acc['total_debit'], 'credit': acc['total_credit'], 'balance': acc['ending_balance'], '_level': 0, '_css': 'totals'})
-        html = self._build_pdf_html("General Ledger", f"Period: {date_from} to {date_to}", headers, rows)
+
+        def rows():
+            ledger = request.env['account.account']._iter_general_ledger(date_from, date_to)
+            for kind, values in ledger:
+                if kind == 'account':
+                    yield {'date': values['code'], 'move_name': '', 'partner': '', 'label': values['name'], 'debit': '', 'credit': '', 'balance': values['ending_balance'], '_level': 0, '_css': 'level-0'}
+                    yield {'date': '', 'move_name': '', 'partner': '', 'label': 'Opening Balance', 'debit': '', 'credit': '', 'balance': values['opening_balance'], '_level': 0, '_css': ''}
+                elif kind == 'entry':
+                    yield {**values, '_level': 0, '_css': ''}
+                else:
+                    yield {'date': '', 'move_name': '', 'partner': '', 'label': 'Ending Balance', 'debit': values['total_debit'], 'credit': values['total_credit'], 'balance': values['ending_balance'], '_level': 0, '_css': 'totals'}
+
+        html = self._build_pdf_html("General Ledger", f"Period: {date_from} to {date_to}", headers, rows())
         return self._get_pdf_response(html, f"general_ledger_{date_from}_{date_to}.pdf")
 
+    def _get_general_ledger_dates(self, date_from, date_to):
+        """Default period of the general ledger: start of the year to today"""
+        today = fields.Date.today()
+        return (date_from or today.replace(month=1, day=1).strftime('%Y-%m-%d'),
+                date_to or today.strftime('%Y-%m-%d'))
+
     # ================================================================
     # CASH FLOW EXPORT
     # ================================================================
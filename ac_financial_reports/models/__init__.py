@@ -1 +1,2 @@
 from . import financial_report
+from . import account_daily_balance
@@ -0,0 +1,174 @@
+from odoo import api, fields, models
+
+BALANCE_FIELDS = ['account_id', 'company_id', 'date', 'debit', 'credit', 'parent_state']
+
+
+class AccountDailyBalance(models.Model):
+    """Posted debit/credit per account, company and day.
+
+    Maintained incrementally from the posted journal items, so that the
+    financial reports aggregate a few rows per account and day instead of
+    scanning every move line of the period."""
+    _name = 'account.daily.balance'
+    _description = 'Account Daily Balance'
+    _order = 'date, account_id'
+
+    account_id = fields.Many2one('account.account', required=True, index=True, ondelete='cascade', readonly=True)
+    company_id = fields.Many2one('res.company', required=True, index=True, ondelete='cascade', readonly=True)
+    date = fields.Date(required=True, index=True, readonly=True)
+    currency_id = fields.Many2one(related='company_id.currency_id')
+    debit = fields.Monetary(readonly=True)
+    credit = fields.Monetary(readonly=True)
+    line_count = fields.Integer(readonly=True)
+
+    _sql_constraints = [
+        ('account_company_date_uniq', 'unique(account_id, company_id, date)',
+         'Only one balance per account, company and day is allowed.'),
+    ]
+
+    def init(self):
+        # Fill the table on installation
+        self.env.cr.execute("SELECT 1 FROM account_daily_balance LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole table from the posted journal items"""
+        self.env['account.move.line'].flush_model(BALANCE_FIELDS)
+        self.env.cr.execute("DELETE FROM account_daily_balance")
+        self.env.cr.execute("""
+            INSERT INTO account_daily_balance
+                   (account_id, company_id, date, debit, credit, line_count)
+            SELECT account_id, company_id, date, SUM(debit), SUM(credit), COUNT(*)
+              FROM account_move_line
+             WHERE parent_state = 'posted'
+          GROUP BY account_id, company_id, date
+        """)
+        self.invalidate_model()
+
+    @api.model
+    def _mark_dirty(self, lines):
+        """Recompute the days touched by `lines` at the end of the
+        transaction, once for all the changes it made."""
+        keys = {(line.account_id.id, line.company_id.id, line.date)
+                for line in lines if line.account_id and line.date}
+        if not keys:
+            return
+        precommit = self.env.cr.precommit
+        dirty = precommit.data.setdefault('account.daily.balance.dirty', set())
+        if not dirty:
+            precommit.add(self._flush_dirty)
+        dirty.update(keys)
+
+    def _flush_dirty(self):
+        dirty = self.env.cr.precommit.data.pop('account.daily.balance.dirty', set())
+        if dirty:
+            self._refresh(dirty)
+
+    @api.model
+    def _refresh(self, keys):
+        """Recompute the balances of the given (account, company, date)"""
+        self.env['account.move.line'].flush_model(BALANCE_FIELDS)
+        keys = list(keys)
+        for index in range(0, len(keys), 1000):
+            batch = keys[index:index + 1000]
+            # Upsert rather than delete and insert: two transactions posting
+            # on the same new day would otherwise both insert it
+            self.env.cr.execute("""
+                INSERT INTO account_daily_balance
+                       (account_id, company_id, date, debit, credit, line_count)
+                SELECT account_id, company_id, date, SUM(debit), SUM(credit), COUNT(*)
+                  FROM account_move_line
+                 WHERE parent_state = 'posted'
+                   AND (account_id, company_id, date) IN %s
+              GROUP BY account_id, company_id, date
+                ON CONFLICT (account_id, company_id, date) DO UPDATE
+                   SET debit = EXCLUDED.debit,
+                       credit = EXCLUDED.credit,
+                       line_count = EXCLUDED.line_count
+            """, [tuple(batch)])
+            # Days left without posted journal items
+            self.env.cr.execute("""
+                DELETE FROM account_daily_balance b
+                 WHERE (b.account_id, b.company_id, b.date) IN %s
+                   AND NOT EXISTS (
+                       SELECT 1 FROM account_move_line l
+                        WHERE l.parent_state = 'posted'
+                          AND l.account_id = b.account_id
+                          AND l.company_id = b.company_id
+                          AND l.date = b.date)
+            """, [tuple(batch)])
+        self.invalidate_model()
+
+    @api.model
+    def _get_balances(self, date_from=None, date_to=None, account_types=None, group_by_account=True):
+        """Posted debit and credit between two dates (both included, None for
+        no bound) for the current companies. Return {account_id: {'debit',
+        'credit', 'line_count'}}, or a single dict if not grouped by account."""
+        self.env['account.move.line'].flush_model(BALANCE_FIELDS)
+        self._flush_dirty()
+        where = ["b.company_id IN %(company_ids)s"]
+        params = {'company_ids': tuple(self.env.companies.ids)}
+        if date_from:
+            where.append("b.date >= %(date_from)s")
+            params['date_from'] = date_from
+        if date_to:
+            where.append("b.date <= %(date_to)s")
+            params['date_to'] = date_to
+        if account_types:
+            where.append("a.account_type IN %(account_types)s")
+            params['account_types'] = tuple(account_types)
+        self.env.cr.execute(f"""
+            SELECT {'b.account_id' if group_by_account else 'NULL'},
+                   SUM(b.debit), SUM(b.credit), SUM(b.line_count)
+              FROM account_daily_balance b
+              JOIN account_account a ON a.id = b.account_id
+             WHERE {' AND '.join(where)}
+             {'GROUP BY b.account_id' if group_by_account else ''}
+        """, params)
+        result = {
+            row[0]: {'debit': row[1] or 0.0, 'credit': row[2] or 0.0, 'line_count': row[3] or 0}
+            for row in self.env.cr.fetchall()
+        }
+        if not group_by_account:
+            return result.get(None, {'debit': 0.0, 'credit': 0.0, 'line_count': 0})
+        return result
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def write(self, vals):
+        if 'state' not in vals and 'date' not in vals:
+            return super().write(vals)
+        # Both the days the lines leave and the days they move to
+        self.env['account.daily.balance']._mark_dirty(self.line_ids)
+        res = super().write(vals)
+        self.env['account.daily.balance']._mark_dirty(self.line_ids)
+        return res
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['account.daily.balance']._mark_dirty(lines.filtered(lambda l: l.parent_state == 'posted'))
+        return lines
+
+    def write(self, vals):
+        tracked = {'account_id', 'company_id', 'date', 'debit', 'credit', 'balance', 'amount_currency', 'move_id'}
+        if not tracked & set(vals):
+            return super().write(vals)
+        posted = self.filtered(lambda l: l.parent_state == 'posted')
+        # Both the days the lines leave and the days they move to
+        self.env['account.daily.balance']._mark_dirty(posted)
+        res = super().write(vals)
+        self.env['account.daily.balance']._mark_dirty(posted)
+        return res
+
+    def unlink(self):
+        self.env['account.daily.balance']._mark_dirty(self.filtered(lambda l: l.parent_state == 'posted'))
+        return super().unlink()
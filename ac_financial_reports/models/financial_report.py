@@ -1,8 +1,12 @@
 from odoo import api, fields, models, _
-from datetime import date
+from datetime import date, timedelta
 from collections import defaultdict
 
 
+def _day_before(date_str):
+    return (fields.Date.to_date(date_str) - timedelta(days=1)).strftime('%Y-%m-%d')
+
+
 class AccountAccountReports(models.Model):
     _inherit = 'account.account'
 
@@ -18,34 +22,11 @@ class AccountAccountReports(models.Model):
             date_from = date(today.year, 1, 1).strftime('%Y-%m-%d')
 
         Account = self.env['account.account']
-        MoveLine = self.env['account.move.line']
+        Balance = self.env['account.daily.balance']
         accounts = Account.search([('code', '!=', False), ('code', '!=', '')], order='code')
 
-        opening_data = {}
-        opening_lines = MoveLine.read_group(
-            [('date', '<', date_from), ('parent_state', '=', 'posted')],
-            ['account_id', 'debit', 'credit'],
-            ['account_id'],
-        )
-        for line in opening_lines:
-            acc_id = line['account_id'][0]
-            opening_data[acc_id] = {
-                'debit': line['debit'] or 0.0,
-                'credit': line['credit'] or 0.0,
-            }
-
-        period_data = {}
-        period_lines = MoveLine.read_group(
-            [('date', '>=', date_from), ('date', '<=', date_to), ('parent_state', '=', 'posted')],
-            ['account_id', 'debit', 'credit'],
-            ['account_id'],
-        )
-        for line in period_lines:
-            acc_id = line['account_id'][0]
-            period_data[acc_id] = {
-                'debit': line['debit'] or 0.0,
-                'credit': line['credit'] or 0.0,
-            }
+        opening_data = Balance._get_balances(date_to=_day_before(date_from))
+        period_data = Balance._get_balances(date_from=date_from, date_to=date_to)
 
         account_map = {}
         children_map = defaultdict(list)
@@ -113,7 +94,6 @@ class AccountAccountReports(models.Model):
             date_from = date(today.year, 1, 1).strftime('%Y-%m-%d')
 
         Account = self.env['account.account']
-        MoveLine = self.env['account.move.line']
 
         income_types = ['income', 'income_other']
         expense_types = ['expense', 'expense_depreciation', 'expense_direct_cost']
@@ -123,17 +103,8 @@ class AccountAccountReports(models.Model):
             ('code', '!=', False), ('code', '!=', ''),
         ], order='code')
 
-        move_data = {}
-        lines = MoveLine.read_group(
-            [('date', '>=', date_from), ('date', '<=', date_to),
-             ('parent_state', '=', 'posted'),
-             ('account_id.account_type', 'in', income_types + expense_types)],
-            ['account_id', 'debit', 'credit'],
-            ['account_id'],
-        )
-        for line in lines:
-            acc_id = line['account_id'][0]
-            move_data[acc_id] = {'debit': line['debit'] or 0.0, 'credit': line['credit'] or 0.0}
+        move_data = self.env['account.daily.balance']._get_balances(
+            date_from=date_from, date_to=date_to, account_types=income_types + expense_types)
 
         def build_section(acc_types, sign=1):
             accs = pl_accounts.filtered(lambda a: a.account_type in acc_types)
@@ -187,7 +158,7 @@ class AccountAccountReports(models.Model):
             date_to = fields.Date.today().strftime('%Y-%m-%d')
 
         Account = self.env['account.account']
-        MoveLine = self.env['account.move.line']
+        Balance = self.env['account.daily.balance']
 
         asset_types = ['asset_receivable', 'asset_cash', 'asset_current',
                        'asset_non_current', 'asset_prepayments', 'asset_fixed']
@@ -197,27 +168,14 @@ class AccountAccountReports(models.Model):
 
         bs_accounts = Account.search([('account_type', 'in', all_types), ('code', '!=', False), ('code', '!=', '')], order='code')
 
-        move_data = {}
-        lines = MoveLine.read_group(
-            [('date', '<=', date_to), ('parent_state', '=', 'posted'),
-             ('account_id.account_type', 'in', all_types)],
-            ['account_id', 'debit', 'credit'], ['account_id'],
-        )
-        for line in lines:
-            acc_id = line['account_id'][0]
-            move_data[acc_id] = {'debit': line['debit'] or 0.0, 'credit': line['credit'] or 0.0}
+        move_data = Balance._get_balances(date_to=date_to, account_types=all_types)
 
         # Unallocated earnings
         income_types = ['income', 'income_other']
         expense_types = ['expense', 'expense_depreciation', 'expense_direct_cost']
-        pl_lines = MoveLine.read_group(
-            [('date', '<=', date_to), ('parent_state', '=', 'posted'),
-             ('account_id.account_type', 'in', income_types + expense_types)],
-            ['debit', 'credit'], [],
-        )
-        unallocated = 0
-        if pl_lines:
-            unallocated = (pl_lines[0].get('credit', 0) or 0) - (pl_lines[0].get('debit', 0) or 0)
+        pl_total = Balance._get_balances(
+            date_to=date_to, account_types=income_types + expense_types, group_by_account=False)
+        unallocated = pl_total['credit'] - pl_total['debit']
 
         def build_section(acc_types, sign=1):
             accs = bs_accounts.filtered(lambda a: a.account_type in acc_types)
@@ -275,53 +233,120 @@ class AccountAccountReports(models.Model):
             today = fields.Date.today()
             date_from = date(today.year, 1, 1).strftime('%Y-%m-%d')
 
-        Account = self.env['account.account']
-        MoveLine = self.env['account.move.line']
+        result = []
+        for kind, values in self._iter_general_ledger(date_from, date_to, account_ids):
+            if kind == 'account':
+                result.append(values)
+            elif kind == 'entry':
+                result[-1]['entries'].append(values)
+
+        return {
+            'report_name': 'General Ledger',
+            'date_from': date_from, 'date_to': date_to,
+            'accounts': result,
+        }
+
+    @api.model
+    def _iter_general_ledger(self, date_from, date_to, account_ids=None):
+        """Stream the general ledger: yield ('account', account) then one
+        ('entry', entry) per period line and ('end', account) for every
+        account, so that exporters can write it without building it."""
+        accounts = self._get_general_ledger_accounts(date_from, date_to, account_ids)
+        entries = self._iter_general_ledger_entries(date_from, date_to, accounts)
+        next_entry = next(entries, None)
+        for acc in accounts:
+            yield 'account', acc
+            while next_entry and next_entry[0] == acc['id']:
+                yield 'entry', next_entry[1]
+                next_entry = next(entries, None)
+            yield 'end', acc
 
+    @api.model
+    def _get_general_ledger_accounts(self, date_from, date_to, account_ids=None):
+        """Opening balance, period totals and ending balance of every account,
+        read from the daily balances of all accounts at once. Accounts with
+        neither period entries nor opening balance are left out."""
         acc_domain = [('code', '!=', False), ('code', '!=', '')]
         if account_ids:
             acc_domain.append(('id', 'in', account_ids))
-        accounts = Account.search(acc_domain, order='code')
+        accounts = self.env['account.account'].search(acc_domain, order='code')
+        if not accounts:
+            return []
+
+        Balance = self.env['account.daily.balance']
+        opening_data = Balance._get_balances(date_to=_day_before(date_from))
+        period_data = Balance._get_balances(date_from=date_from, date_to=date_to)
+        empty = {'debit': 0.0, 'credit': 0.0, 'line_count': 0}
 
         result = []
         for acc in accounts:
-            opening_lines = MoveLine.search([
-                ('account_id', '=', acc.id), ('date', '<', date_from),
-                ('parent_state', '=', 'posted'),
-            ])
-            opening_balance = sum(opening_lines.mapped('debit')) - sum(opening_lines.mapped('credit'))
-
-            period_lines = MoveLine.search([
-                ('account_id', '=', acc.id), ('date', '>=', date_from),
-                ('date', '<=', date_to), ('parent_state', '=', 'posted'),
-            ], order='date, id')
-
-            entries = []
-            running = opening_balance
-            for ml in period_lines:
-                running += ml.debit - ml.credit
-                entries.append({
-                    'id': ml.id, 'date': ml.date.strftime('%Y-%m-%d') if ml.date else '',
-                    'move_name': ml.move_id.name or '', 'move_id': ml.move_id.id,
-                    'partner': ml.partner_id.name if ml.partner_id else '',
-                    'label': ml.name or '',
-                    'debit': ml.debit, 'credit': ml.credit, 'balance': running,
-                })
-
-            if entries or opening_balance != 0:
+            o = opening_data.get(acc.id, empty)
+            p = period_data.get(acc.id, empty)
+            opening_balance = o['debit'] - o['credit']
+            debit, credit, line_count = p['debit'], p['credit'], p['line_count']
+            if line_count or opening_balance != 0:
                 result.append({
                     'id': acc.id, 'code': acc.code or '', 'name': acc.name or '',
-                    'opening_balance': opening_balance, 'entries': entries,
-                    'total_debit': sum(e['debit'] for e in entries),
-                    'total_credit': sum(e['credit'] for e in entries),
-                    'ending_balance': running if entries else opening_balance,
+                    'opening_balance': opening_balance, 'entries': [],
+                    'total_debit': debit,
+                    'total_credit': credit,
+                    'ending_balance': opening_balance + debit - credit,
                 })
+        return result
 
-        return {
-            'report_name': 'General Ledger',
-            'date_from': date_from, 'date_to': date_to,
-            'accounts': result,
-        }
+    @api.model
+    def _iter_general_ledger_entries(self, date_from, date_to, accounts, chunk_size=5000):
+        """Yield (account_id, entry) for every posted line of the period, in
+        the order of `accounts` then by date. Running balances are computed
+        by the database with a window function and the rows are fetched in
+        chunks from a server side cursor, so the ledger is never held in
+        memory as a whole."""
+        if not accounts:
+            return
+        opening = {acc['id']: acc['opening_balance'] for acc in accounts}
+        self.env['account.move'].flush_model(['name'])
+        self.env['account.move.line'].flush_model(
+            ['account_id', 'date', 'debit', 'credit', 'parent_state', 'company_id',
+             'move_id', 'partner_id', 'name'])
+        cr = self.env.cr
+        cr.execute("""
+            DECLARE general_ledger_cursor NO SCROLL CURSOR FOR
+            SELECT aml.account_id, aml.id, aml.date, am.name, aml.move_id,
+                   partner.name, aml.name, aml.debit, aml.credit,
+                   SUM(aml.debit - aml.credit) OVER (
+                       PARTITION BY aml.account_id ORDER BY aml.date, aml.id)
+              FROM account_move_line aml
+              JOIN account_move am ON am.id = aml.move_id
+         LEFT JOIN res_partner partner ON partner.id = aml.partner_id
+             WHERE aml.parent_state = 'posted'
+               AND aml.date >= %(date_from)s
+               AND aml.date <= %(date_to)s
+               AND aml.account_id = ANY(%(account_ids)s)
+               AND aml.company_id IN %(company_ids)s
+          ORDER BY array_position(%(account_ids)s, aml.account_id), aml.date, aml.id
+        """, {
+            'date_from': date_from,
+            'date_to': date_to,
+            'account_ids': [acc['id'] for acc in accounts],
+            'company_ids': tuple(self.env.companies.ids),
+        })
+        try:
+            while True:
+                cr.execute("FETCH %s FROM general_ledger_cursor", (chunk_size,))
+                rows = cr.fetchall()
+                if not rows:
+                    break
+                for account_id, line_id, line_date, move_name, move_id, partner, label, debit, credit, running in rows:
+                    yield account_id, {
+                        'id': line_id, 'date': line_date.strftime('%Y-%m-%d') if line_date else '',
+                        'move_name': move_name or '', 'move_id': move_id,
+                        'partner': partner or '',
+                        'label': label or '',
+                        'debit': debit, 'credit': credit,
+                        'balance': opening[account_id] + running,
+                    }
+        finally:
+            cr.execute("CLOSE general_ledger_cursor")
 
     # ================================================================
     # CASH FLOW (INDIRECT)
@@ -334,21 +359,23 @@ class AccountAccountReports(models.Model):
             today = fields.Date.today()
             date_from = date(today.year, 1, 1).strftime('%Y-%m-%d')
 
-        MoveLine = self.env['account.move.line']
-        base_domain = [('date', '>=', date_from), ('date', '<=', date_to), ('parent_state', '=', 'posted')]
+        Balance = self.env['account.daily.balance']
+
+        # Period debit - credit per account type
+        period_data = Balance._get_balances(date_from=date_from, date_to=date_to)
+        type_changes = defaultdict(float)
+        for acc in self.env['account.account'].browse(list(period_data)):
+            d = period_data[acc.id]
+            type_changes[acc.account_type] += d['debit'] - d['credit']
 
         income_types = ['income', 'income_other']
         expense_types = ['expense', 'expense_depreciation', 'expense_direct_cost']
-        pl_lines = MoveLine.search(base_domain + [
-            ('account_id.account_type', 'in', income_types + expense_types)])
-        net_income = sum(pl_lines.mapped('credit')) - sum(pl_lines.mapped('debit'))
+        net_income = -sum(type_changes[acc_type] for acc_type in income_types + expense_types)
 
-        dep_lines = MoveLine.search(base_domain + [('account_id.account_type', '=', 'expense_depreciation')])
-        depreciation = sum(dep_lines.mapped('debit')) - sum(dep_lines.mapped('credit'))
+        depreciation = type_changes['expense_depreciation']
 
         def get_change(acc_type):
-            ls = MoveLine.search(base_domain + [('account_id.account_type', '=', acc_type)])
-            return sum(ls.mapped('debit')) - sum(ls.mapped('credit'))
+            return type_changes[acc_type]
 
         rc = -get_change('asset_receivable')
         pc = -get_change('liability_payable')
@@ -367,10 +394,9 @@ class AccountAccountReports(models.Model):
 
         net_cash = operating_total + investing_total + financing_total
 
-        opening_cash_lines = MoveLine.search([
-            ('date', '<', date_from), ('parent_state', '=', 'posted'),
-            ('account_id.account_type', '=', 'asset_cash')])
-        opening_cash = sum(opening_cash_lines.mapped('debit')) - sum(opening_cash_lines.mapped('credit'))
+        opening_cash_data = Balance._get_balances(
+            date_to=_day_before(date_from), account_types=['asset_cash'], group_by_account=False)
+        opening_cash = opening_cash_data['debit'] - opening_cash_data['credit']
 
         return {
             'report_name': 'Cash Flow Statement',
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
+
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
 
+LOT_INDEX_PRECOMMIT_KEY = 'brodher.pos_lot_ids'
+
 class IrRule(models.Model):
     _inherit = 'ir.rule'
 
@@ -18,6 +22,37 @@ class IrRule(models.Model):
             pass
         return super(IrRule, self)._compute_domain(model_name, mode)
 
+class PosConfig(models.Model):
+    _inherit = 'pos.config'
+
+    def _get_lot_quant_domain(self, user):
+        """
+        Domain quant ber-serial yang ada stoknya di lokasi POS (termasuk sub-lokasi).
+        Integrasi pos_warehouse_access: jika user dibatasi gudangnya, perketat pencarian.
+        """
+        self.ensure_one()
+        pos_location = self.picking_type_id.default_location_src_id
+        domain = [
+            ('lot_id', '!=', False),
+            ('location_id', 'child_of', pos_location.id),
+            ('quantity', '>', 0)
+        ]
+        if 'warehouse_access_ids' in user._fields and user.warehouse_access_ids:
+            domain.append(('location_id.warehouse_id', 'in', user.warehouse_access_ids.ids))
+        return domain
+
+    def _get_lots_in_stock(self, user, lot_ids=None):
+        """
+        Mengembalikan set (product_id, nama lot) yang ada stoknya di lokasi POS,
+        dengan satu query untuk semua lot.
+        """
+        domain = self._get_lot_quant_domain(user)
+        if lot_ids is not None:
+            domain.append(('lot_id', 'in', list(lot_ids)))
+        groups = self.env['stock.quant'].sudo()._read_group(domain, ['lot_id'])
+        return {(lot.product_id.id, lot.name) for (lot,) in groups}
+
+
 class PosSession(models.Model):
     _inherit = 'pos.session'
 
@@ -175,18 +210,7 @@ class PosSession(models.Model):
             }
             
         # 2. Cek stok di lokasi POS (termasuk sub-lokasi)
-        quant_domain = [
-            ('lot_id', '=', lot.id),
-            ('location_id', 'child_of', pos_location.id),
-            ('quantity', '>', 0)
-        ]
-        
-        # Integrasi pos_warehouse_access: jika user dibatasi gudangnya, perketat pencarian
-        if 'warehouse_access_ids' in self.env.user._fields:
-            allowed_warehouses = self.env.user.warehouse_access_ids
-            if allowed_warehouses:
-                quant_domain.append(('location_id.warehouse_id', 'in', allowed_warehouses.ids))
-                
+        quant_domain = config._get_lot_quant_domain(self.env.user) + [('lot_id', '=', lot.id)]
         quant = self.env['stock.quant'].sudo().search(quant_domain, limit=1)
         
         if not quant:
@@ -201,6 +225,62 @@ class PosSession(models.Model):
             
         return {'status': 'ok'}
 
+    def get_pos_lot_index(self):
+        """
+        Indeks serial number yang ada stoknya di lokasi POS, dimuat sekali saat sesi dibuka
+        agar validasi di POS tidak perlu memanggil server. Perubahan berikutnya dikirim lewat bus.
+        """
+        self.ensure_one()
+        return sorted(self.config_id._get_lots_in_stock(self.env.user))
+
+    @api.model
+    def _notify_pos_lots(self, lot_ids):
+        """Catat lot yang stoknya berubah, dikirim ke sesi POS yang aktif sebelum commit."""
+        data = self.env.cr.precommit.data
+        if LOT_INDEX_PRECOMMIT_KEY not in data:
+            data[LOT_INDEX_PRECOMMIT_KEY] = set()
+            self.env.cr.precommit.add(self._send_pos_lot_updates)
+        data[LOT_INDEX_PRECOMMIT_KEY].update(lot_ids)
+
+    @api.model
+    def _send_pos_lot_updates(self):
+        """Kirim status stok terbaru dari lot yang berubah ke setiap POS yang sedang dibuka."""
+        lot_ids = self.env.cr.precommit.data.pop(LOT_INDEX_PRECOMMIT_KEY, set())
+        if not lot_ids:
+            return
+        lots = self.env['stock.lot'].sudo().browse(lot_ids).exists()
+        sessions = self.sudo().search([('state', '=', 'opened')])
+        for session in sessions:
+            in_stock = session.config_id._get_lots_in_stock(session.user_id, lots.ids)
+            session.config_id._notify('BRODHER_LOT_INDEX', [
+                [lot.product_id.id, lot.name, (lot.product_id.id, lot.name) in in_stock]
+                for lot in lots
+            ])
+
+
+class StockQuant(models.Model):
+    _inherit = 'stock.quant'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        quants = super().create(vals_list)
+        self.env['pos.session']._notify_pos_lots(quants.lot_id.ids)
+        return quants
+
+    def write(self, vals):
+        # Lot lama dan lot baru sama-sama perlu diperbarui di indeks POS
+        if {'quantity', 'location_id', 'lot_id'}.intersection(vals):
+            self.env['pos.session']._notify_pos_lots(self.lot_id.ids)
+        res = super().write(vals)
+        if 'lot_id' in vals:
+            self.env['pos.session']._notify_pos_lots(self.lot_id.ids)
+        return res
+
+    def unlink(self):
+        self.env['pos.session']._notify_pos_lots(self.lot_id.ids)
+        return super().unlink()
+
+
 class PosOrder(models.Model):
     _inherit = 'pos.order'
 
@@ -209,44 +289,36 @@ class PosOrder(models.Model):
         """
         Validasi akhir di sisi server saat order di-sinkron dari POS.
         Mengecek apakah Serial Number yang dijual benar-benar ada di gudang cabang tersebut.
+        Semua lot dicek sekaligus: satu query lot dan satu query quant per lokasi POS.
         """
         orders = super().create(vals_list)
+        # PERKETAT: Jika produk adalah SN atau Lot, maka Lot WAJIB valid dan ada di lokasi POS
+        lot_lines_by_config = defaultdict(lambda: self.env['pos.pack.operation.lot'])
         for order in orders:
-            pos_location = order.config_id.picking_type_id.default_location_src_id
-            for line in order.lines:
-                if line.pack_lot_ids:
-                    for lot_line in line.pack_lot_ids:
-                        # Cari Lot berdasarkan nama dan produk dengan privileges tinggi
-                        lot = self.env['stock.lot'].sudo().search([
-                            ('name', '=', lot_line.lot_name),
-                            ('product_id', '=', line.product_id.id)
-                        ], limit=1)
-                        
-                        # PERKETAT: Jika produk adalah SN atau Lot, maka Lot WAJIB valid dan ada di lokasi POS
-                        if line.product_id.tracking in ('serial', 'lot'):
-                            if not lot:
-                                raise ValidationError(_(
-                                    "Serial Number '%s' tidak terdaftar untuk produk '%s'. "
-                                    "Mohon scan QR Code yang valid."
-                                ) % (lot_line.lot_name, line.product_id.display_name))
-                            
-                            # Cek stok di lokasi POS (termasuk sub-lokasi) dengan privileges tinggi
-                            quant_domain = [
-                                ('lot_id', '=', lot.id),
-                                ('location_id', 'child_of', pos_location.id),
-                                ('quantity', '>', 0)
-                            ]
-                            
-                            # Integrasi pos_warehouse_access: jika user dibatasi gudangnya
-                            if 'warehouse_access_ids' in self.env.user._fields:
-                                allowed_warehouses = self.env.user.warehouse_access_ids
-                                if allowed_warehouses:
-                                    quant_domain.append(('location_id.warehouse_id', 'in', allowed_warehouses.ids))
-                                    
-                            quant = self.env['stock.quant'].sudo().search(quant_domain, limit=1)
-                            
-                            if not quant:
-                                raise ValidationError(_(
-                                    "Serial Number '%s' ditemukan, tapi tidak ada di gudang POS %s."
-                                ) % (lot.name, pos_location.complete_name))
+            lot_lines_by_config[order.config_id] |= order.lines.pack_lot_ids.filtered(
+                lambda l: l.pos_order_line_id.product_id.tracking in ('serial', 'lot'))
+        lot_lines = self.env['pos.pack.operation.lot'].concat(*lot_lines_by_config.values())
+        if not lot_lines:
+            return orders
+
+        # Cari semua Lot berdasarkan nama dan produk dengan privileges tinggi
+        lots = self.env['stock.lot'].sudo().search([
+            ('name', 'in', lot_lines.mapped('lot_name')),
+            ('product_id', 'in', lot_lines.pos_order_line_id.product_id.ids)
+        ])
+        lot_keys = {(lot.product_id.id, lot.name) for lot in lots}
+        for config, config_lot_lines in lot_lines_by_config.items():
+            in_stock = config._get_lots_in_stock(self.env.user, lots.ids)
+            for lot_line in config_lot_lines:
+                product = lot_line.pos_order_line_id.product_id
+                key = (product.id, lot_line.lot_name)
+                if key not in lot_keys:
+                    raise ValidationError(_(
+                        "Serial Number '%s' tidak terdaftar untuk produk '%s'. "
+                        "Mohon scan QR Code yang valid."
+                    ) % (lot_line.lot_name, product.display_name))
+                if key not in in_stock:
+                    raise ValidationError(_(
+                        "Serial Number '%s' ditemukan, tapi tidak ada di gudang POS %s."
+                    ) % (lot_line.lot_name, config.picking_type_id.default_location_src_id.complete_name))
         return orders
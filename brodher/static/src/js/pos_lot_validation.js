@@ -14,7 +14,6 @@ patch(EditListPopup.prototype, {
     setup() {
         super.setup(...arguments);
         this.pos = useService("pos");
-        this.orm = useService("orm");
     },
 
     async confirm() {
@@ -60,23 +59,14 @@ patch(EditListPopup.prototype, {
                 }
 
                 if (productId || productName) {
-                    try {
-                        for (const lotName of lotNames) {
-                            // Panggil validation di backend secara real-time
-                            const res = await this.orm.call(
-                                "pos.session",
-                                "check_lot_validation",
-                                [productId, lotName, productName]
-                            );
-                            
-                            if (res && res.status !== 'ok') {
-                                // Tampilkan alert error dan batalkan konfirmasi (popup tetap terbuka)
-                                window.alert(res.message);
-                                return;
-                            }
+                    // Validasi memakai indeks serial dari sesi (tanpa panggilan ke server)
+                    for (const lotName of lotNames) {
+                        const message = this.pos.checkLotInIndex(productId, lotName, productName);
+                        if (message) {
+                            // Tampilkan alert error dan batalkan konfirmasi (popup tetap terbuka)
+                            window.alert(message);
+                            return;
                         }
-                    } catch (err) {
-                        console.error("Error validating lot:", err);
                     }
                 }
             }
@@ -87,8 +77,54 @@ patch(EditListPopup.prototype, {
     }
 });
 
-// 2. Patch PosStore to handle scanned barcodes
+// 2. Patch PosStore to handle scanned barcodes and keep the serial number index
 patch(PosStore.prototype, {
+    async processServerData() {
+        await super.processServerData(...arguments);
+        // Indeks serial yang ada stoknya di lokasi POS: dimuat sekali, lalu diperbarui lewat bus
+        this.lotIndex = new Map();
+        try {
+            const lots = await this.data.call("pos.session", "get_pos_lot_index", [[this.session.id]]);
+            this.updateLotIndex(lots.map(([productId, lotName]) => [productId, lotName, true]));
+        } catch (err) {
+            console.error("Error loading lot index:", err);
+        }
+        this.data.connectWebSocket("BRODHER_LOT_INDEX", (lots) => this.updateLotIndex(lots));
+    },
+
+    updateLotIndex(lots) {
+        // Nama lot hanya unik per produk, jadi simpan set product ID per nama lot
+        for (const [productId, lotName, inStock] of lots) {
+            const productIds = this.lotIndex.get(lotName) || new Set();
+            if (inStock) {
+                productIds.add(productId);
+            } else {
+                productIds.delete(productId);
+            }
+            if (productIds.size) {
+                this.lotIndex.set(lotName, productIds);
+            } else {
+                this.lotIndex.delete(lotName);
+            }
+        }
+    },
+
+    /**
+     * Mengembalikan pesan error jika serial tidak ada di stok lokasi POS, atau null jika valid.
+     */
+    checkLotInIndex(productId, lotName, productName) {
+        const productIds = this.lotIndex.get(lotName);
+        if (!productIds) {
+            return _t("Serial Number '%s' tidak tersedia di stok lokasi POS untuk produk '%s'. Mohon gunakan QR Code yang valid.", lotName, productName);
+        }
+        if (productId && !productIds.has(productId)) {
+            const otherId = productIds.values().next().value;
+            const product = this.models["product.product"].get(otherId);
+            return _t("Serial Number '%s' terdaftar untuk produk '%s', bukan untuk '%s'!", lotName, product ? product.display_name : otherId, productName);
+        }
+        return null;
+    },
+
     async scan_barcode(code) {
         if (code && code.includes("#")) {
             const parts = code.split("#");
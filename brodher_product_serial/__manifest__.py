@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Brodher Product Serial Number',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.0.1',
     'category': 'Inventory/Inventory',
     'summary': 'Custom Serial Number Generator with QR Code',
     'description': """
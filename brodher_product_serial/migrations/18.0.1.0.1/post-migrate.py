@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """stock.lot.qr_code is no longer stored: drop the PNG attachments it
+    used to keep for every lot"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    attachments = env['ir.attachment'].search([
+        ('res_model', '=', 'stock.lot'),
+        ('res_field', '=', 'qr_code'),
+    ])
+    _logger.info('Removing %s stored QR code attachments', len(attachments))
+    attachments.unlink()
@@ -5,6 +5,7 @@ from . import stock_lot
 from . import stock_lot_print_history  # ← Add this
 from . import stock_picking
 from . import sn_move
+from . import sn_sequence
 from . import purchase_order
 from . import sale_order
 
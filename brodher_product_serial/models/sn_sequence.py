@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class BrodherSnSequence(models.Model):
+    _name = 'brodher.sn.sequence'
+    _description = 'Serial Number Global Sequence'
+    _order = 'year_code desc, sn_type'
+
+    sn_type = fields.Selection([
+        ('M', 'Man'), ('W', 'Woman')
+    ], string='SN Type', required=True, readonly=True)
+    year_code = fields.Char(string='Year Code', size=2, required=True, readonly=True)
+    last_number = fields.Integer(string='Last Sequence Number', readonly=True)
+
+    _sql_constraints = [
+        ('sn_type_year_uniq', 'unique(sn_type, year_code)',
+         'Only one sequence per SN type and year is allowed!'),
+    ]
+
+    @api.model
+    def _get_last_number(self, sn_type, year):
+        """Last sequence number handed out for this type/year, without
+        reserving anything (used for previews)"""
+        self.env.cr.execute("""
+            SELECT last_number FROM brodher_sn_sequence
+            WHERE sn_type = %s AND year_code = %s
+        """, (sn_type, year))
+        row = self.env.cr.fetchone()
+        if row:
+            return row[0]
+        return self.env['stock.lot']._get_last_sequence_from_lots(sn_type, year)
+
+    @api.model
+    def _increment(self, sn_type, year, quantity):
+        """Bump the sequence row, return (last_number,) or None if missing"""
+        self.env.cr.execute("""
+            UPDATE brodher_sn_sequence
+            SET last_number = last_number + %s,
+                write_uid = %s,
+                write_date = now() at time zone 'UTC'
+            WHERE sn_type = %s AND year_code = %s
+            RETURNING last_number
+        """, (quantity, self.env.uid, sn_type, year))
+        return self.env.cr.fetchone()
+
+    @api.model
+    def _reserve(self, sn_type, year, quantity):
+        """
+        Reserve `quantity` consecutive numbers and return the first one.
+
+        The sequence row is created on first use (starting after the last
+        existing SN) and then incremented with a single UPDATE, which keeps
+        the row locked until the transaction ends. Two concurrent
+        generators are therefore serialized: the second one waits, then
+        fails with a serialization error and the request is retried, so
+        the same number can never be handed out twice.
+        """
+        row = self._increment(sn_type, year, quantity)
+        if not row:
+            self.env.cr.execute("""
+                INSERT INTO brodher_sn_sequence
+                    (sn_type, year_code, last_number, create_uid, create_date,
+                     write_uid, write_date)
+                VALUES (%s, %s, %s, %s, now() at time zone 'UTC',
+                        %s, now() at time zone 'UTC')
+                ON CONFLICT (sn_type, year_code) DO NOTHING
+            """, (sn_type, year,
+                  self.env['stock.lot']._get_last_sequence_from_lots(sn_type, year),
+                  self.env.uid, self.env.uid))
+            row = self._increment(sn_type, year, quantity)
+        last_number = row[0]
+        self.invalidate_model(['last_number'])
+        first_number = last_number - quantity + 1
+        _logger.info(f'GLOBAL sequence for {year}{sn_type}: reserved {first_number} to {last_number}')
+        return first_number
@@ -1,14 +1,37 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 from datetime import datetime
 import qrcode
 import base64
+import functools
 from io import BytesIO
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Number of rendered QR images kept in memory per worker
+QR_CACHE_SIZE = 2048
+
+
+@functools.lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr_code(data, box_size=10, border=4):
+    """Render `data` as a base64 encoded PNG QR code, cached by content
+    and size"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return base64.b64encode(buffer.getvalue())
+
+
 class StockLot(models.Model):
     _inherit = 'stock.lot'
     
@@ -35,7 +58,7 @@ class StockLot(models.Model):
     qc_passed = fields.Boolean(string='QC Passed', default=True)
     sn_generated_date = fields.Datetime(string='Generated Date', readonly=True)
     
-    qr_code = fields.Binary(string='QR Code', compute='_compute_qr_code', store=True, attachment=True)
+    qr_code = fields.Binary(string='QR Code', compute='_compute_qr_code')
     
     sn_move_ids = fields.One2many('brodher.sn.move', 'serial_number_id', string='Move History')
     last_sn_move_date = fields.Datetime(string='Last Move Date')
@@ -55,21 +78,12 @@ class StockLot(models.Model):
     )
     @api.depends('name')
     def _compute_qr_code(self):
+        """Rendered on read only (not stored): generating or listing SNs
+        never pays for images nobody looks at"""
         for record in self:
             if record.name:
                 try:
-                    qr = qrcode.QRCode(
-                        version=1,
-                        error_correction=qrcode.constants.ERROR_CORRECT_L,
-                        box_size=10,
-                        border=4,
-                    )
-                    qr.add_data(record.name)
-                    qr.make(fit=True)
-                    img = qr.make_image(fill_color="black", back_color="white")
-                    buffer = BytesIO()
-                    img.save(buffer, format='PNG')
-                    record.qr_code = base64.b64encode(buffer.getvalue())
+                    record.qr_code = render_qr_code(record.name)
                 except Exception as e:
                     _logger.error('QR Code error for %s: %s' % (record.name, str(e)))
                     record.qr_code = False
@@ -77,15 +91,9 @@ class StockLot(models.Model):
                 record.qr_code = False
     
     @api.model
-    def _get_next_sequence_global(self, sn_type, year):
-        """
-        Get next GLOBAL sequence number across ALL products
-        Only resets when:
-        - Different type (M/W)
-        - Different year
-        
-        Continues for different products/variants
-        """
+    def _get_last_sequence_from_lots(self, sn_type, year):
+        """Last sequence number found in existing SN names for this
+        type/year, used to initialise the global sequence"""
         # Search for ANY product with this year and type
         domain = [
             ('name', 'like', f'PF{year}{sn_type}%')
@@ -96,13 +104,22 @@ class StockLot(models.Model):
         
         if last_sn:
             # Extract sequence from last SN (PFYYTXXXXXXX -> XXXXXXX)
-            sequence_str = last_sn.name[-7:]
-            next_sequence = int(sequence_str) + 1
-            _logger.info(f'GLOBAL sequence for {year}{sn_type}: continuing from {sequence_str} to {next_sequence}')
-            return next_sequence
-        else:
-            _logger.info(f'GLOBAL sequence for {year}{sn_type}: starting from 1')
-            return 1
+            return int(last_sn.name[-7:])
+        return 0
+
+    @api.model
+    def _get_next_sequence_global(self, sn_type, year):
+        """
+        Get next GLOBAL sequence number across ALL products
+        Only resets when:
+        - Different type (M/W)
+        - Different year
+        
+        Continues for different products/variants.
+        This is only a preview, numbers are reserved by
+        brodher.sn.sequence when the SNs are generated.
+        """
+        return self.env['brodher.sn.sequence'].sudo()._get_last_number(sn_type, year) + 1
 
 
     def generate_serial_numbers(self, product_tmpl_id, product_id, sn_type, quantity, picking_id=None):
@@ -111,21 +128,27 @@ class StockLot(models.Model):
             raise UserError(_('Quantity must be greater than 0'))
         
         year = datetime.now().strftime('%y')
-        serial_numbers = []
         
-        next_seq = self._get_next_sequence_global(sn_type, year)
+        # Reserve the whole range at once (row locked until commit)
+        next_seq = self.env['brodher.sn.sequence'].sudo()._reserve(sn_type, year, quantity)
         
         _logger.info(f'Generating {quantity} SNs: product_id={product_id}, type={sn_type}, seq={next_seq}')
         
-        for i in range(quantity):
-            current_seq = next_seq + i
-            sn_name = f"PF{year}{sn_type}{current_seq:07d}"
-            
-            existing = self.search([('name', '=', sn_name)], limit=1)
-            if existing:
-                _logger.warning(f'SN {sn_name} already exists, skipping')
+        sn_names = {
+            f"PF{year}{sn_type}{current_seq:07d}": current_seq
+            for current_seq in range(next_seq, next_seq + quantity)
+        }
+        
+        # Check the whole range for collisions with a single query
+        existing = set(self.search([('name', 'in', list(sn_names))]).mapped('name'))
+        for sn_name in sorted(existing):
+            _logger.warning(f'SN {sn_name} already exists, skipping')
+        
+        now = fields.Datetime.now()
+        vals_list = []
+        for sn_name, current_seq in sn_names.items():
+            if sn_name in existing:
                 continue
-            
             vals = {
                 'name': sn_name,
                 'product_id': product_id,
@@ -133,16 +156,16 @@ class StockLot(models.Model):
                 'sn_type': sn_type,
                 'year_code': year,
                 'sequence_number': current_seq,
-                'sn_generated_date': fields.Datetime.now(),
+                'sn_generated_date': now,
                 'sn_status': 'available',
             }
             
             if picking_id:
                 vals['generated_by_picking_id'] = picking_id
-            
-            sn = self.create(vals)
-            serial_numbers.append(sn)
-            _logger.info(f'Created SN: {sn_name}')
+            vals_list.append(vals)
+        
+        serial_numbers = self.create(vals_list)
+        _logger.info(f'Created {len(serial_numbers)} SNs')
         
         # ======================================
         # DO NOT CREATE stock.move.line HERE
@@ -31,6 +31,170 @@ class ScanSNOutWizard(models.TransientModel):
     scanned_list = fields.Html(string='Scanned List', compute='_compute_scanned_list')
     expected_quantities = fields.Html(string='Expected Quantities', compute='_compute_expected_quantities')
     
+    scan_session = fields.Json(string='Scan Session', copy=False)
+    scanned_sns = fields.Json(string='Scanned SNs', copy=False)
+    
+    def _build_scan_session(self):
+        """
+        Preload the read-only index a scan of this picking is looked up in:
+        the SNs of the picking products in stock in the source location
+        (name -> id, product, status, type) and the demand per product.
+        The SNs scanned so far are kept apart in `scanned_sns`.
+        """
+        self.ensure_one()
+        picking = self.picking_id
+        source_location = self.location_src_id or picking.location_id
+        
+        moves = {}
+        sn_products = []
+        for move in picking.move_ids_without_package:
+            product = move.product_id
+            if str(product.id) in moves:
+                continue
+            moves[str(product.id)] = [move.id, int(move.product_uom_qty)]
+            if product.tracking == 'serial' and product.product_tmpl_id.sn_product_type:
+                sn_products.append(product.id)
+        
+        in_stock = self.env['stock.quant']._read_group([
+            ('product_id', 'in', [int(product_id) for product_id in moves]),
+            ('lot_id', '!=', False),
+            ('location_id', '=', source_location.id),
+            ('quantity', '>', 0),
+        ], ['lot_id'])
+        lots = self.env['stock.lot'].browse(
+            [lot.id for lot, in in_stock]
+        ).read(['name', 'product_id', 'sn_status', 'sn_type'])
+        
+        _logger.info(f'[SCAN OUT] Session for {picking.name}: {len(lots)} SNs in stock')
+        
+        return {
+            'picking_id': picking.id,
+            'location_src_id': source_location.id,
+            'moves': moves,
+            'sn_products': sn_products,
+            'lots': {
+                lot['name']: [lot['id'], lot['product_id'][0], lot['sn_status'], lot['sn_type']]
+                for lot in lots
+            },
+        }
+    
+    def _build_scanned_sns(self):
+        """Return the SNs already scanned in the picking and their count per product"""
+        self.ensure_one()
+        scanned = {}
+        count = {}
+        for sn_move in self.env['brodher.sn.move'].search_read(
+                [('picking_id', '=', self.picking_id.id)],
+                ['serial_number_id', 'product_id', 'move_date']):
+            scanned[str(sn_move['serial_number_id'][0])] = fields.Datetime.to_string(sn_move['move_date'])
+            if sn_move['product_id']:
+                key = str(sn_move['product_id'][0])
+                count[key] = count.get(key, 0) + 1
+        return {'lots': scanned, 'count': count}
+    
+    def _get_scan_session(self):
+        """Return the preloaded scan session, building it if needed"""
+        self.ensure_one()
+        if not self.scan_session:
+            self.scan_session = self._build_scan_session()
+        return self.scan_session
+    
+    def _get_scanned_sns(self):
+        """Return the SNs scanned so far, loading them if needed"""
+        self.ensure_one()
+        if not self.scanned_sns:
+            self.scanned_sns = self._build_scanned_sns()
+        return self.scanned_sns
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        wizards = super().create(vals_list)
+        for wizard in wizards:
+            wizard.write({
+                'scan_session': wizard._build_scan_session(),
+                'scanned_sns': wizard._build_scanned_sns(),
+            })
+        return wizards
+    
+    def write(self, vals):
+        res = super().write(vals)
+        if 'picking_id' in vals or 'location_src_id' in vals:
+            for wizard in self:
+                super(ScanSNOutWizard, wizard).write({
+                    'scan_session': wizard._build_scan_session(),
+                    'scanned_sns': wizard._build_scanned_sns(),
+                })
+        return res
+    
+    def _get_sn_error(self, sn_name):
+        """
+        Explain why an SN is not in the scan session: unknown, of another
+        product, not received, already shipped or not in the source location.
+        """
+        self.ensure_one()
+        source_location = self.location_src_id or self.picking_id.location_id
+        sn = self.env['stock.lot'].search([('name', '=', sn_name)], limit=1)
+        if not sn:
+            return _('Serial Number %s not found!') % sn_name
+        session = self._get_scan_session()
+        sn = self.env['stock.lot'].search([
+            ('name', '=', sn_name),
+            ('product_id', 'in', [int(product_id) for product_id in session['moves']]),
+        ], limit=1) or sn
+        if str(sn.product_id.id) not in session['moves']:
+            return _(
+                '❌ Product mismatch!\n\nSN: %s\nProduct: %s'
+            ) % (sn.name, sn.product_id.display_name)
+        if sn.sn_status != 'used':
+            return _(
+                '❌ SN %s cannot be used!\n\n'
+                'Status: %s\n\n'
+                'Only SNs with status "USED" (in stock) can be moved.'
+            ) % (sn.name, (sn.sn_status or '').upper())
+        quant = self.env['stock.quant'].search(
+            [('lot_id', '=', sn.id), ('quantity', '>', 0)], limit=1)
+        if not quant:
+            return _('❌ SN %s has no stock!') % sn.name
+        return _(
+            '❌ SN %s not in source location!\n\n'
+            'Required: %s\n'
+            'Current: %s\n\n'
+            'Please scan from correct location.'
+        ) % (sn.name, source_location.complete_name, quant.location_id.complete_name)
+    
+    def _check_sn_live(self, lot_id, sn_name):
+        """
+        Re-check a scanned SN against the live data with one query, as the
+        session may be outdated: another user may have scanned it or the
+        stock may have moved since the wizard was opened. The SN row is
+        locked so that concurrent scans of the same SN are serialized.
+        Return the number of SNs of its product scanned in the picking.
+        """
+        self.ensure_one()
+        source_location = self.location_src_id or self.picking_id.location_id
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT lot.sn_status,
+                   EXISTS(SELECT 1 FROM stock_quant quant
+                          WHERE quant.lot_id = lot.id AND quant.quantity > 0
+                            AND quant.location_id = %s),
+                   EXISTS(SELECT 1 FROM brodher_sn_move sn_move
+                          WHERE sn_move.serial_number_id = lot.id
+                            AND sn_move.picking_id = %s),
+                   (SELECT count(*) FROM brodher_sn_move sn_move
+                    WHERE sn_move.product_id = lot.product_id
+                      AND sn_move.picking_id = %s)
+            FROM stock_lot lot
+            WHERE lot.id = %s
+            FOR UPDATE OF lot
+        """, [source_location.id, self.picking_id.id, self.picking_id.id, lot_id])
+        sn_status, in_stock, scanned, scanned_qty = self.env.cr.fetchone()
+        if scanned:
+            raise UserError(_('⚠️ SN %s already scanned in this transfer!') % sn_name)
+        if sn_status != 'used' or not in_stock:
+            raise UserError(self._get_sn_error(sn_name))
+        return scanned_qty
+    
     @api.depends('picking_id')
     def _compute_available_sn_ids(self):
         """
@@ -42,44 +206,31 @@ class ScanSNOutWizard(models.TransientModel):
                 wizard.available_sn_ids = [(5, 0, 0)]
                 continue
             
-            # Get products
-            products = wizard.picking_id.move_ids_without_package.filtered(
-                lambda m: m.product_id.tracking == 'serial' and
-                        m.product_id.product_tmpl_id.sn_product_type
-            ).mapped('product_id')
-            
-            if not products:
-                wizard.available_sn_ids = [(5, 0, 0)]
-                continue
-            
-            # Already scanned in this picking
-            already_scanned = wizard.picking_id.sn_move_ids.mapped('serial_number_id.id')
+            session = wizard._get_scan_session()
+            scanned = wizard._get_scanned_sns()['lots']
+            sn_products = set(session['sn_products'])
             
-            # Domain: ONLY 'used' status (for OUTGOING/INTERNAL)
-            domain = [
-                ('product_id', 'in', products.ids),
-                ('sn_type', '!=', False),
-                ('sn_status', '=', 'used'),  # ← For internal/delivery, use 'used'
+            # ONLY 'used' status (for OUTGOING/INTERNAL), not yet scanned
+            available_sns = [
+                lot_id for name, (lot_id, product_id, sn_status, sn_type) in sorted(session['lots'].items())
+                if product_id in sn_products and sn_type and sn_status == 'used'
+                and str(lot_id) not in scanned
             ]
             
-            if already_scanned:
-                domain.append(('id', 'not in', already_scanned))
-            
-            available_sns = self.env['stock.lot'].search(domain, order='name')
-            
             _logger.info(f'[SCAN OUT] Found {len(available_sns)} SNs with status=used')
 
-            wizard.available_sn_ids = [(6, 0, available_sns.ids)]
+            wizard.available_sn_ids = [(6, 0, available_sns)]
 
     @api.depends('picking_id')
     def _compute_total_scanned(self):
         for wizard in self:
-            wizard.total_scanned = len(wizard.picking_id.sn_move_ids) if wizard.picking_id else 0
+            wizard.total_scanned = len(wizard._get_scanned_sns()['lots']) if wizard.picking_id else 0
     
     @api.depends('picking_id')
     def _compute_expected_quantities(self):
         for wizard in self:
             if wizard.picking_id:
+                scanned_count = wizard._get_scanned_sns()['count']
                 html = '<div class="alert alert-warning"><strong>📤 OUTGOING - Barang Keluar</strong></div>'
                 html += '<table class="table table-sm table-bordered">'
                 html += '<thead><tr><th>Product</th><th>Expected</th><th>Scanned</th><th>Remaining</th></tr></thead><tbody>'
@@ -89,9 +240,7 @@ class ScanSNOutWizard(models.TransientModel):
                         continue
                     
                     expected = int(move.product_uom_qty)
-                    scanned = len(wizard.picking_id.sn_move_ids.filtered(
-                        lambda sm: sm.serial_number_id.product_id == move.product_id
-                    ))
+                    scanned = scanned_count.get(str(move.product_id.id), 0)
                     remaining = expected - scanned
                     
                     status_color = '#d4edda' if scanned >= expected else ('#fff3cd' if scanned > 0 else '')
@@ -126,69 +275,41 @@ class ScanSNOutWizard(models.TransientModel):
     @api.depends('scanned_sn', 'serial_number_id', 'input_method')
     def _compute_sn_info(self):
         for wizard in self:
-            sn = None
+            sn_name = None
             if wizard.input_method == 'scan' and wizard.scanned_sn:
-                sn = self.env['stock.lot'].search([('name', '=', wizard.scanned_sn.strip())], limit=1)
+                sn_name = wizard.scanned_sn.strip()
             elif wizard.input_method == 'manual' and wizard.serial_number_id:
-                sn = wizard.serial_number_id
+                sn_name = wizard.serial_number_id.name
             
-            if sn:
-                # Check if already scanned
-                already_scanned = wizard.picking_id.sn_move_ids.filtered(
-                    lambda sm: sm.serial_number_id == sn
-                )
-                
-                if already_scanned:
-                    wizard.sn_info = f'''<div class="alert alert-warning">
-                        <h5>⚠️ Already Scanned!</h5>
-                        <p>SN: <strong>{sn.name}</strong><br/>
-                        Scanned at: {already_scanned[0].move_date.strftime("%Y-%m-%d %H:%M:%S")}</p></div>'''
-                
-                elif sn.sn_status == 'available':
-                    wizard.sn_info = f'''<div class="alert alert-danger">
-                        <h5>❌ Not In Stock!</h5>
-                        <p>SN: <strong>{sn.name}</strong><br/>
-                        Status: <strong>AVAILABLE</strong><br/>
-                        This SN has not been received yet.</p></div>'''
-                
-                elif sn.sn_status == 'reserved':
-                    wizard.sn_info = f'''<div class="alert alert-danger">
-                        <h5>❌ Already Shipped!</h5>
-                        <p>SN: <strong>{sn.name}</strong><br/>
-                        Status: <strong>RESERVED</strong><br/>
-                        This SN has already left the warehouse.</p></div>'''
-                
-                elif sn.sn_status == 'used':
-                    # Check if already shipped
-                    shipped = self.env['brodher.sn.move'].search([
-                        ('serial_number_id', '=', sn.id),
-                        ('move_type', '=', 'out'),
-                        ('picking_id.state', '=', 'done')
-                    ], limit=1)
-                    
-                    if shipped:
-                        wizard.sn_info = f'''<div class="alert alert-danger">
-                            <h5>❌ Already Shipped!</h5>
-                            <p>SN: <strong>{sn.name}</strong><br/>
-                            Shipped in: {shipped.picking_id.name}<br/>
-                            Date: {shipped.move_date.strftime("%Y-%m-%d %H:%M")}</p></div>'''
-                    else:
-                        wizard.sn_info = f'''<div class="alert alert-success">
-                            <h5>✓ Ready to Ship</h5>
-                            <p>SN: <strong>{sn.name}</strong><br/>
-                            Product: {sn.product_id.name}<br/>
-                            Type: {'Man' if sn.sn_type == 'M' else 'Woman'}<br/>
-                            Status: <span class="badge badge-success">IN STOCK</span></p></div>'''
-                else:
-                    wizard.sn_info = f'''<div class="alert alert-warning">
-                        <h5>⚠️ Unknown Status</h5>
-                        <p>SN: <strong>{sn.name}</strong><br/>
-                        Status: <strong>{sn.sn_status.upper()}</strong></p></div>'''
+            if not sn_name:
+                wizard.sn_info = '<div class="alert alert-info">📱 Ready to scan...</div>'
+                continue
+            
+            if not wizard.picking_id:
+                wizard.sn_info = f'<div class="alert alert-warning">SN <strong>{sn_name}</strong> not found!</div>'
+                continue
+            
+            lot = wizard._get_scan_session()['lots'].get(sn_name)
+            scanned_at = lot and wizard._get_scanned_sns()['lots'].get(str(lot[0]))
+            
+            if scanned_at:
+                wizard.sn_info = f'''<div class="alert alert-warning">
+                    <h5>⚠️ Already Scanned!</h5>
+                    <p>SN: <strong>{sn_name}</strong><br/>
+                    Scanned at: {scanned_at}</p></div>'''
+            
+            elif not lot or lot[2] != 'used':
+                message = wizard._get_sn_error(sn_name).replace('\n', '<br/>')
+                wizard.sn_info = f'<div class="alert alert-danger">{message}</div>'
             
-            elif wizard.input_method == 'scan' and wizard.scanned_sn:
-                wizard.sn_info = f'<div class="alert alert-warning">SN <strong>{wizard.scanned_sn}</strong> not found!</div>'
             else:
-                wizard.sn_info = '<div class="alert alert-info">📱 Ready to scan...</div>'
+                lot_id, product_id, sn_status, sn_type = lot
+                wizard.sn_info = f'''<div class="alert alert-success">
+                    <h5>✓ Ready to Ship</h5>
+                    <p>SN: <strong>{sn_name}</strong><br/>
+                    Product: {self.env['product.product'].browse(product_id).name}<br/>
+                    Type: {'Man' if sn_type == 'M' else 'Woman'}<br/>
+                    Status: <span class="badge badge-success">IN STOCK</span></p></div>'''
     
     @api.onchange('input_method')
     def _onchange_input_method(self):
@@ -861,42 +982,38 @@ class ScanSNOutWizard(models.TransientModel):
             }
         }
     def action_confirm_scan(self):
-        """Confirm scan - OUTGOING/INTERNAL (with stock check)"""
-        self.ensure_one()
+        """
+        Confirm scan - OUTGOING/INTERNAL (with stock check)
         
-        import logging
-        _logger = logging.getLogger(__name__)
+        The SN is looked up in the preloaded scan session, then re-checked
+        against the live stock and scans with one query, followed by one
+        batch of writes.
+        """
+        self.ensure_one()
         
         # Get SN
-        sn = None
         if self.input_method == 'scan':
             if not self.scanned_sn:
                 raise UserError(_('Please scan serial number!'))
-            sn = self.env['stock.lot'].search([('name', '=', self.scanned_sn.strip())], limit=1)
-            if not sn:
-                raise ValidationError(_('Serial Number %s not found!') % self.scanned_sn)
+            sn_name = self.scanned_sn.strip()
         else:
             if not self.serial_number_id:
                 raise UserError(_('Please select serial number!'))
-            sn = self.serial_number_id
+            sn_name = self.serial_number_id.name
         
-        # Validate: Already scanned in THIS picking?
-        already_scanned = self.picking_id.sn_move_ids.filtered(lambda sm: sm.serial_number_id == sn)
-        if already_scanned:
-            raise UserError(_('⚠️ SN %s already scanned in this transfer!') % sn.name)
+        session = self._get_scan_session()
+        scanned_sns = self._get_scanned_sns()
+        lot = session['lots'].get(sn_name)
         
-        # Validate: Status must be 'used'
-        if sn.sn_status != 'used':
-            raise UserError(_(
-                '❌ SN %s cannot be used!\n\n'
-                'Status: %s\n\n'
-                'Only SNs with status "USED" (in stock) can be moved.'
-            ) % (sn.name, sn.sn_status.upper()))
+        if not lot:
+            # Not an SN in stock of the picking products: find out why
+            raise UserError(self._get_sn_error(sn_name))
         
-        # Validate: Product match
-        picking_products = self.picking_id.move_ids_without_package.mapped('product_id')
-        if sn.product_id not in picking_products:
-            raise UserError(_('❌ Product mismatch!') % sn.product_id.display_name)
+        lot_id, product_id, sn_status, sn_type = lot
+        
+        # Validate: Already scanned in THIS picking?
+        if str(lot_id) in scanned_sns['lots']:
+            raise UserError(_('⚠️ SN %s already scanned in this transfer!') % sn_name)
         
         # ==========================================
         # Get locations
@@ -904,57 +1021,28 @@ class ScanSNOutWizard(models.TransientModel):
         source_location = self.location_src_id if self.location_src_id else self.picking_id.location_id
         dest_location = self.location_dest_id
         
-        _logger.info(f'[SCAN OUT] {self.picking_id.picking_type_code}: {source_location.complete_name} → {dest_location.complete_name}')
-        
         # ==========================================
-        # Validate: Check stock in source location
+        # Validate: status, stock in source location and scans of other
+        # users, against the live data
         # ==========================================
-        quants = self.env['stock.quant'].search([
-            ('lot_id', '=', sn.id),
-            ('location_id', '=', source_location.id),
-            ('quantity', '>', 0)
-        ])
-        
-        if not quants:
-            actual_quants = self.env['stock.quant'].search([
-                ('lot_id', '=', sn.id),
-                ('quantity', '>', 0)
-            ])
-            
-            if actual_quants:
-                actual_location = actual_quants[0].location_id.complete_name
-                raise UserError(_(
-                    '❌ SN %s not in source location!\n\n'
-                    'Required: %s\n'
-                    'Current: %s\n\n'
-                    'Please scan from correct location.'
-                ) % (sn.name, source_location.complete_name, actual_location))
-            else:
-                raise UserError(_(
-                    '❌ SN %s has no stock!'
-                ) % sn.name)
+        scanned_qty = self._check_sn_live(lot_id, sn_name)
         
         # ==========================================
         # Validate: Check quantity limit
         # ==========================================
-        stock_move = self.picking_id.move_ids_without_package.filtered(
-            lambda m: m.product_id == sn.product_id
-        )[:1]
+        move_id, demand_qty = session['moves'][str(product_id)]
+        sn = self.env['stock.lot'].browse(lot_id)
         
-        if stock_move:
-            demand_qty = int(stock_move.product_uom_qty)
-            scanned_qty = len(self.picking_id.sn_move_ids.filtered(
-                lambda sm: sm.serial_number_id.product_id == sn.product_id
-            ))
-            
-            if scanned_qty >= demand_qty:
-                raise UserError(_(
-                    '⚠️ Quantity Limit Reached!\n\n'
-                    'Product: %s\n'
-                    'Demand: %s\n'
-                    'Already Scanned: %s\n\n'
-                    'Cannot scan more than demand quantity.'
-                ) % (sn.product_id.display_name, demand_qty, scanned_qty))
+        if scanned_qty >= demand_qty:
+            raise UserError(_(
+                '⚠️ Quantity Limit Reached!\n\n'
+                'Product: %s\n'
+                'Demand: %s\n'
+                'Already Scanned: %s\n\n'
+                'Cannot scan more than demand quantity.'
+            ) % (sn.product_id.display_name, demand_qty, scanned_qty))
+        
+        _logger.info(f'[SCAN OUT] {self.picking_id.picking_type_code}: {source_location.complete_name} → {dest_location.complete_name}')
         
         # ==========================================
         # REMOVED: "Already Shipped" check
@@ -962,31 +1050,30 @@ class ScanSNOutWizard(models.TransientModel):
         # Only external delivery changes status to 'reserved'
         # ==========================================
         
+        now = fields.Datetime.now()
+        
         # Create tracking record
         self.env['brodher.sn.move'].create({
-            'serial_number_id': sn.id,
+            'serial_number_id': lot_id,
             'move_type': 'out',
             'location_src_id': source_location.id,
             'location_dest_id': dest_location.id,
             'picking_id': self.picking_id.id,
             'notes': self.notes,
             'user_id': self.env.user.id,
-            'move_date': fields.Datetime.now(),
+            'move_date': now,
         })
         
         # Create move_line
-        if not stock_move:
-            raise UserError(_('Stock move not found'))
-        
         self.env['stock.move.line'].create({
             'picking_id': self.picking_id.id,
-            'move_id': stock_move.id,
-            'product_id': sn.product_id.id,
+            'move_id': move_id,
+            'product_id': product_id,
             'product_uom_id': sn.product_id.uom_id.id,
             'location_id': source_location.id,
             'location_dest_id': dest_location.id,
-            'lot_id': sn.id,
-            'lot_name': sn.name,
+            'lot_id': lot_id,
+            'lot_name': sn_name,
             'quantity': 1.0,
             'company_id': self.env.company.id,
         })
@@ -996,23 +1083,31 @@ class ScanSNOutWizard(models.TransientModel):
             # External delivery
             sn.write({
                 'sn_status': 'reserved',
-                'last_sn_move_date': fields.Datetime.now()
+                'last_sn_move_date': now
             })
-            _logger.info(f'[SCAN OUT] {sn.name} → RESERVED')
+            _logger.info(f'[SCAN OUT] {sn_name} → RESERVED')
         else:
             # Internal transfer - keep status 'used'
             sn.write({
-                'last_sn_move_date': fields.Datetime.now()
+                'last_sn_move_date': now
             })
-            _logger.info(f'[SCAN OUT] {sn.name} → USED (no change)')
-        
-        # Clear input
-        self.scanned_sn = ''
-        self.serial_number_id = False
+            _logger.info(f'[SCAN OUT] {sn_name} → USED (no change)')
+        
+        # Clear input, keep the session for the next scan: only the small
+        # set of scanned SNs is written back
+        self.write({
+            'scanned_sn': '',
+            'serial_number_id': False,
+            'scanned_sns': {
+                'lots': {**scanned_sns['lots'], str(lot_id): fields.Datetime.to_string(now)},
+                'count': {**scanned_sns['count'], str(product_id): scanned_qty + 1},
+            },
+        })
         
         return {
             'type': 'ir.actions.act_window',
             'res_model': 'brodher.scan.sn.out.wizard',
+            'res_id': self.id,
             'view_mode': 'form',
             'target': 'new',
             'context': {
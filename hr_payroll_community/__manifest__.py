@@ -22,7 +22,7 @@
 #############################################################################
 {
     'name': 'Odoo 18 HR Payroll',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.0.4',
     'category': 'Human Resources',
     'summary': """Odoo 18 HR Payroll, Odoo18 Payroll, Payroll, Odoo Payroll, Payroll V18, Odoo18, Payroll Management, Odoo18 Payslip""",
     'description': """The system automates payroll management by streamlining
@@ -41,6 +41,7 @@
         'security/hr_payroll_community_security.xml',
         'security/ir.model.access.csv',
         'data/ir_sequence_data.xml',
+        'data/ir_cron_data.xml',
         'data/hr_payroll_community_data.xml',
         'wizard/hr_payslips_employees_views.xml',
         'wizard/payslip_lines_contribution_register_views.xml',
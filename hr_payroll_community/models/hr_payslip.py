@@ -20,16 +20,72 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from datetime import date, datetime, time
+import functools
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
 from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, tools, _
+from odoo.addons.resource.models.utils import Intervals
 from odoo.exceptions import UserError, ValidationError
-from pytz import timezone
+from odoo.tools.float_utils import round as float_round
+from pytz import timezone, utc
 import babel
 
 # This will generate 16th of days
 ROUNDING_FACTOR = 16
 
+# Totals of the done payslips summed by the sum() helpers of the salary
+# rules: table, column linking it to the payslip and summed expressions
+PAYSLIP_AGGREGATES = {
+    'lines': ('hr_payslip_line', 'slip_id', [
+        'sum(case when hp.credit_note = False then (t.total) '
+        'else (-t.total) end)']),
+    'worked_days': ('hr_payslip_worked_days', 'payslip_id', [
+        'sum(t.number_of_days)', 'sum(t.number_of_hours)']),
+    'inputs': ('hr_payslip_input', 'payslip_id', ['sum(t.amount)']),
+}
+
+
+class PayslipAggregates(object):
+    """Totals of the done payslips of the employees being paid, loaded
+    lazily: one grouped query per kind of total and date range asked by the
+    salary rules, shared by all the payslips of the batch"""
+
+    def __init__(self, env, employee_ids):
+        self.env = env
+        self.employee_ids = tuple(employee_ids)
+        self._totals = {}
+
+    def get(self, kind, employee_id, code, from_date, to_date):
+        """Return the totals of the given kind of the done payslips of the
+        employee included between from_date and to_date, or None"""
+        key = (kind, from_date, to_date)
+        if key not in self._totals:
+            self._totals[key] = self._load(kind, from_date, to_date)
+        return self._totals[key].get((employee_id, code))
+
+    def _load(self, kind, from_date, to_date):
+        if not self.employee_ids:
+            return {}
+        table, payslip_column, totals = PAYSLIP_AGGREGATES[kind]
+        self.env['hr.payslip'].flush_model(
+            ['employee_id', 'state', 'date_from', 'date_to', 'credit_note'])
+        self.env['hr.payslip.line'].flush_model(['slip_id', 'code', 'total'])
+        self.env['hr.payslip.worked.days'].flush_model(
+            ['payslip_id', 'code', 'number_of_days', 'number_of_hours'])
+        self.env['hr.payslip.input'].flush_model(
+            ['payslip_id', 'code', 'amount'])
+        self.env.cr.execute("""
+            SELECT hp.employee_id, t.code, %s
+            FROM hr_payslip as hp, %s as t
+            WHERE hp.employee_id IN %%s AND hp.state = 'done'
+            AND hp.date_from >= %%s AND hp.date_to <= %%s
+            AND hp.id = t.%s
+            GROUP BY hp.employee_id, t.code""" % (
+            ', '.join(totals), table, payslip_column),
+            (self.employee_ids, from_date, to_date))
+        return {(row[0], row[1]): row[2:] for row in self.env.cr.fetchall()}
+
 
 class HrPayslip(models.Model):
     """Create new model for getting total Payroll Sheet for an Employee"""
@@ -111,6 +167,11 @@ class HrPayslip(models.Model):
     payslip_count = fields.Integer(compute='_compute_payslip_count',
                                    string="Payslip Computation Details",
                                    help="Set Payslip Count")
+    compute_pending = fields.Boolean(string='Computation Pending', copy=False,
+                                     index=True, readonly=True,
+                                     help="The payslip is waiting to be "
+                                          "computed by the payslip batch "
+                                          "scheduled action")
 
     def _compute_details_by_salary_rule_category_ids(self):
         """Compute function for Salary Rule Category for getting
@@ -204,13 +265,91 @@ class HrPayslip(models.Model):
                         '|'] + clause_1 + clause_2 + clause_3
         return self.env['hr.contract'].search(clause_final).ids
 
+    @api.model
+    def _get_contracts_by_employee(self, employees, date_from, date_to):
+        """
+        Same selection as get_contract, done in one query for many employees.
+        @return: returns a dict {employee_id: [contract ids]}
+        """
+        clause_1 = ['&', ('date_end', '<=', date_to),
+                    ('date_end', '>=', date_from)]
+        clause_2 = ['&', ('date_start', '<=', date_to),
+                    ('date_start', '>=', date_from)]
+        clause_3 = ['&', ('date_start', '<=', date_from), '|',
+                    ('date_end', '=', False), ('date_end', '>=', date_to)]
+        clause_final = [('employee_id', 'in', employees.ids),
+                        ('state', '=', 'open'), '|',
+                        '|'] + clause_1 + clause_2 + clause_3
+        contracts_by_employee = defaultdict(list)
+        for contract in self.env['hr.contract'].search(clause_final):
+            contracts_by_employee[contract.employee_id.id].append(contract.id)
+        return contracts_by_employee
+
+    @api.model
+    def _prepare_batch_payslip_vals(self, employees, date_from, date_to):
+        """
+        Build the values of the payslips of many employees at once, like
+        onchange_employee_id does for a single one. Contracts and working
+        schedules of the whole batch are loaded upfront, the time off is read
+        once for the batch by _get_worked_day_lines_batch.
+        @return: returns a list of dict, one per employee
+        """
+        contracts_by_employee = self._get_contracts_by_employee(
+            employees, date_from, date_to)
+        contracts = self.env['hr.contract'].browse(
+            [contract_id for contract_ids in contracts_by_employee.values()
+             for contract_id in contract_ids])
+        # fill the cache for the whole batch instead of once per employee
+        contracts.mapped('struct_id')
+        contracts.mapped('resource_calendar_id.attendance_ids')
+        contracts.mapped('employee_id.resource_id')
+        worked_days_by_contract = self._get_worked_day_lines_batch(
+            contracts, date_from, date_to)
+        ttyme = datetime.combine(fields.Date.from_string(date_from), time.min)
+        locale = self.env.context.get('lang') or 'en_US'
+        period = tools.ustr(babel.dates.format_date(date=ttyme, format='MMMM-y',
+                                                    locale=locale))
+        vals_list = []
+        for employee in employees:
+            vals = {
+                'employee_id': employee.id,
+                'name': _('Salary Slip of %s for %s') % (employee.name, period),
+                'company_id': employee.company_id.id,
+                'contract_id': False,
+                'struct_id': False,
+                'input_line_ids': [],
+                'worked_days_line_ids': [],
+                'date_from': date_from,
+                'date_to': date_to,
+            }
+            vals_list.append(vals)
+            contract_ids = contracts_by_employee.get(employee.id)
+            if not contract_ids:
+                continue
+            employee_contracts = self.env['hr.contract'].browse(contract_ids)
+            vals['contract_id'] = employee_contracts[0].id
+            struct = employee_contracts[0].struct_id
+            if not struct:
+                continue
+            vals['struct_id'] = struct.id
+            vals['worked_days_line_ids'] = [
+                (0, 0, line) for contract_id in contract_ids
+                for line in worked_days_by_contract.get(contract_id, [])]
+            vals['input_line_ids'] = [
+                (0, 0, line) for line in self.get_inputs(
+                    employee_contracts, date_from, date_to)]
+        return vals_list
+
     def action_compute_sheet(self):
         """Function for compute Payslip sheet"""
+        # delete old payslip lines
+        self.line_ids.unlink()
+        # totals of the previous payslips of all the employees, used by the
+        # sum() helpers of the salary rules
+        aggregates = self._get_payslip_aggregates(self.employee_id.ids)
         for payslip in self:
             number = payslip.number or self.env['ir.sequence'].next_by_code(
                 'salary.slip')
-            # delete old payslip lines
-            payslip.line_ids.unlink()
             # set the list of contract for which the rules have to be applied
             # if we don't give the contract, then the rules to apply should be
             # for all current contracts of the employee
@@ -218,8 +357,10 @@ class HrPayslip(models.Model):
                            self.get_contract(payslip.employee_id,
                                              payslip.date_from, payslip.date_to)
             lines = [(0, 0, line) for line in
-                     self._get_payslip_lines(contract_ids, payslip.id)]
-            payslip.write({'line_ids': lines, 'number': number})
+                     self._get_payslip_lines(contract_ids, payslip.id,
+                                             aggregates=aggregates)]
+            payslip.write({'line_ids': lines, 'number': number,
+                           'compute_pending': False})
         return True
 
     @api.model
@@ -229,85 +370,132 @@ class HrPayslip(models.Model):
         @return: returns a list of dict containing the input that should be
         applied for the given contract between date_from and date_to
         """
-        res = []
+        lines_by_contract = self._get_worked_day_lines_batch(
+            contracts, date_from, date_to)
+        return [line for contract in contracts
+                for line in lines_by_contract.get(contract.id, [])]
+
+    @api.model
+    def _get_worked_day_lines_batch(self, contracts, date_from, date_to):
+        """
+        Compute the worked days of many contracts at once: the attendances
+        of each working schedule are computed once for the period, then the
+        time off of each employee are taken out of them.
+        @param contracts: Browse record of contracts, date_from, date_to
+        @return: returns a dict {contract_id: list of dict} containing the
+        worked days lines of each contract between date_from and date_to
+        """
+        res = {}
+        day_from = datetime.combine(fields.Date.from_string(date_from),
+                                    time.min).replace(tzinfo=utc)
+        day_to = datetime.combine(fields.Date.from_string(date_to),
+                                  time.max).replace(tzinfo=utc)
+        period = Intervals([(day_from, day_to,
+                             self.env['resource.calendar.attendance'])])
+        contracts_by_calendar = defaultdict(lambda: self.env['hr.contract'])
         # fill only if the contract as a working schedule linked
         for contract in contracts.filtered(
                 lambda contract: contract.resource_calendar_id):
-            day_from = datetime.combine(fields.Date.from_string(date_from),
-                                        time.min)
-            day_to = datetime.combine(fields.Date.from_string(date_to),
-                                      time.max)
-            # compute leave days
-            leaves = {}
-            calendar = contract.resource_calendar_id
+            contracts_by_calendar[contract.resource_calendar_id] |= contract
+        for calendar, calendar_contracts in contracts_by_calendar.items():
             tz = timezone(calendar.tz)
-            day_leave_intervals = contract.employee_id.list_leaves(
-                day_from, day_to, calendar=contract.resource_calendar_id)
-            multi_leaves = []
-            for day, hours, leave in day_leave_intervals:
-                work_hours = calendar.get_work_hours_count(
-                    tz.localize(datetime.combine(day, time.min)),
-                    tz.localize(datetime.combine(day, time.max)),
-                    compute_leaves=False,
-                )
-                if len(leave) > 1:
-                    for each in leave:
-                        if each.holiday_id:
-                            multi_leaves.append(each.holiday_id)
-                else:
-                    holiday = leave.holiday_id
-                    current_leave_struct = leaves.setdefault(
-                        holiday.holiday_status_id, {
-                            'name': holiday.holiday_status_id.name or _(
-                                'Global Leaves'),
-                            'sequence': 5,
-                            'code': holiday.holiday_status_id.code or 'GLOBAL',
-                            'number_of_days': 0.0,
-                            'number_of_hours': 0.0,
+            resources = calendar_contracts.employee_id.resource_id
+            # attendances with one extra day margin, in order to compute the
+            # total hours on the first and last days
+            attendances = calendar._attendance_intervals_batch(
+                day_from - timedelta(days=1), day_to + timedelta(days=1),
+                resources)
+            leave_intervals = calendar._leave_intervals_batch(
+                day_from, day_to, resources)
+            # hours of the working schedule per day, in its own timezone
+            calendar_hours = defaultdict(float)
+            for start, stop, meta in calendar._attendance_intervals_batch(
+                    tz.localize(datetime.combine(
+                        day_from.date() - timedelta(days=1), time.min)),
+                    tz.localize(datetime.combine(
+                        day_to.date() + timedelta(days=1), time.max)))[False]:
+                calendar_hours[start.date()] += \
+                    (stop - start).total_seconds() / 3600
+            for contract in calendar_contracts:
+                resource = contract.employee_id.resource_id
+                day_attendances = attendances[resource.id]
+                period_attendances = day_attendances & period
+                # compute leave days
+                leaves = {}
+                multi_leaves = []
+                for start, stop, leave in (leave_intervals[resource.id] &
+                                           period_attendances):
+                    hours = (stop - start).total_seconds() / 3600
+                    work_hours = calendar_hours[start.date()]
+                    if len(leave) > 1:
+                        for each in leave:
+                            if each.holiday_id:
+                                multi_leaves.append(each.holiday_id)
+                    else:
+                        holiday = leave.holiday_id
+                        current_leave_struct = leaves.setdefault(
+                            holiday.holiday_status_id, {
+                                'name': holiday.holiday_status_id.name or _(
+                                    'Global Leaves'),
+                                'sequence': 5,
+                                'code': holiday.holiday_status_id.code or
+                                'GLOBAL',
+                                'number_of_days': 0.0,
+                                'number_of_hours': 0.0,
+                                'contract_id': contract.id,
+                            })
+                        current_leave_struct['number_of_hours'] += hours
+                        if work_hours:
+                            current_leave_struct[
+                                'number_of_days'] += hours / work_hours
+                # compute worked days
+                day_total = defaultdict(float)
+                for start, stop, meta in day_attendances:
+                    day_total[start.date()] += \
+                        (stop - start).total_seconds() / 3600
+                day_hours = defaultdict(float)
+                for start, stop, meta in (period_attendances -
+                                          leave_intervals[resource.id]):
+                    day_hours[start.date()] += \
+                        (stop - start).total_seconds() / 3600
+                attendances_line = {
+                    'name': _("Normal Working Days paid at 100%"),
+                    'sequence': 1,
+                    'code': 'WORK100',
+                    'number_of_days': sum(
+                        float_round(ROUNDING_FACTOR * day_hours[day] /
+                                    day_total[day]) / ROUNDING_FACTOR
+                        for day in day_hours),
+                    'number_of_hours': sum(day_hours.values()),
+                    'contract_id': contract.id,
+                }
+                lines = res[contract.id] = [attendances_line]
+                uniq_leaves = [*set(multi_leaves)]
+                c_leaves = {}
+                for rec in uniq_leaves:
+                    duration = rec.duration_display.replace("days", "").strip()
+                    duration_in_hours = float(duration) * 24
+                    c_leaves.setdefault(rec.holiday_status_id,
+                                        {'hours': duration_in_hours})
+                for item in c_leaves:
+                    if not leaves or item not in leaves:
+                        data = {
+                            'name': item.name,
+                            'sequence': 20,
+                            'code': item.code or 'LEAVES',
+                            'number_of_hours': c_leaves[item]['hours'],
+                            'number_of_days': c_leaves[item][
+                                                  'hours'] / work_hours,
                             'contract_id': contract.id,
-                        })
-                    current_leave_struct['number_of_hours'] += hours
-                    if work_hours:
-                        current_leave_struct[
-                            'number_of_days'] += hours / work_hours
-            # compute worked days
-            work_data = contract.employee_id.get_work_days_data(
-                day_from, day_to, calendar=contract.resource_calendar_id)
-            attendances = {
-                'name': _("Normal Working Days paid at 100%"),
-                'sequence': 1,
-                'code': 'WORK100',
-                'number_of_days': work_data['days'],
-                'number_of_hours': work_data['hours'],
-                'contract_id': contract.id,
-            }
-            res.append(attendances)
-            uniq_leaves = [*set(multi_leaves)]
-            c_leaves = {}
-            for rec in uniq_leaves:
-                duration = rec.duration_display.replace("days", "").strip()
-                duration_in_hours = float(duration) * 24
-                c_leaves.setdefault(rec.holiday_status_id,
-                                    {'hours': duration_in_hours})
-            for item in c_leaves:
-                if not leaves or item not in leaves:
-                    data = {
-                        'name': item.name,
-                        'sequence': 20,
-                        'code': item.code or 'LEAVES',
-                        'number_of_hours': c_leaves[item]['hours'],
-                        'number_of_days': c_leaves[item][
-                                              'hours'] / work_hours,
-                        'contract_id': contract.id,
-                    }
-                    res.append(data)
-                for time_off in leaves:
-                    if item == time_off:
-                        leaves[item]['number_of_hours'] += c_leaves[item][
-                            'hours']
-                        leaves[item]['number_of_days'] \
-                            += c_leaves[item]['hours'] / work_hours
-            res.extend(leaves.values())
+                        }
+                        lines.append(data)
+                    for time_off in leaves:
+                        if item == time_off:
+                            leaves[item]['number_of_hours'] += c_leaves[item][
+                                'hours']
+                            leaves[item]['number_of_days'] \
+                                += c_leaves[item]['hours'] / work_hours
+                lines.extend(leaves.values())
         return res
 
     @api.model
@@ -334,7 +522,17 @@ class HrPayslip(models.Model):
         return res
 
     @api.model
-    def _get_payslip_lines(self, contract_ids, payslip_id):
+    def _get_payslip_aggregates(self, employee_ids):
+        """
+        @param employee_ids: ids of the employees being paid
+        @return: returns the lazily loaded totals of the done payslips of the
+        given employees, for the payslip lines ('lines'), worked days
+        ('worked_days') and inputs ('inputs')
+        """
+        return PayslipAggregates(self.env, employee_ids)
+
+    @api.model
+    def _get_payslip_lines(self, contract_ids, payslip_id, aggregates=None):
         """Function for getting Payslip Lines"""
 
         def _sum_salary_rule_category(localdict, category, amount):
@@ -352,11 +550,21 @@ class HrPayslip(models.Model):
         class BrowsableObject(object):
             """Class for Browsable Object"""
 
-            def __init__(self, employee_id, dict, env):
+            def __init__(self, employee_id, dict, env, aggregates=None):
                 """Function for getting employee_id,dict and env"""
                 self.employee_id = employee_id
                 self.dict = dict
                 self.env = env
+                self.aggregates = aggregates
+
+            def _get_totals(self, code, from_date, to_date=None):
+                """Function for getting the totals of the done Payslips
+                with respect to from_date,to_date fields"""
+                if to_date is None:
+                    to_date = fields.Date.today()
+                return self.aggregates(
+                    self.employee_id, code, fields.Date.to_date(from_date),
+                    fields.Date.to_date(to_date)) or ()
 
             def __getattr__(self, attr):
                 """Function for return dict"""
@@ -369,17 +577,8 @@ class HrPayslip(models.Model):
             def sum(self, code, from_date, to_date=None):
                 """Function for getting sum of Payslip with respect to
                  from_date,to_date fields"""
-                if to_date is None:
-                    to_date = fields.Date.today()
-                self.env.cr.execute("""
-                    SELECT sum(amount) as sum
-                    FROM hr_payslip as hp, hr_payslip_input as pi
-                    WHERE hp.employee_id = %s AND hp.state = 'done'
-                    AND hp.date_from >= %s AND hp.date_to <= %s AND hp.id = 
-                    pi.payslip_id AND pi.code = %s""",
-                                    (self.employee_id, from_date, to_date,
-                                        code))
-                return self.env.cr.fetchone()[0] or 0.0
+                amount, = self._get_totals(code, from_date, to_date) or (0.0,)
+                return amount or 0.0
 
         class WorkedDays(BrowsableObject):
             """a class that will be used into the python code, mainly for
@@ -388,18 +587,9 @@ class HrPayslip(models.Model):
             def _sum(self, code, from_date, to_date=None):
                 """Function for getting sum of Payslip days with respect to
                  from_date,to_date fields"""
-                if to_date is None:
-                    to_date = fields.Date.today()
-                self.env.cr.execute("""
-                    SELECT sum(number_of_days) as number_of_days, 
-                    sum(number_of_hours) as number_of_hours
-                    FROM hr_payslip as hp, hr_payslip_worked_days as pi
-                    WHERE hp.employee_id = %s AND hp.state = 'done'
-                    AND hp.date_from >= %s AND hp.date_to <= %s AND hp.id = 
-                    pi.payslip_id AND pi.code = %s""",
-                                    (self.employee_id, from_date, to_date,
-                                        code))
-                return self.env.cr.fetchone()
+                days, hours = self._get_totals(code, from_date, to_date) or (
+                    0.0, 0.0)
+                return days or 0.0, hours or 0.0
 
             def sum(self, code, from_date, to_date=None):
                 """Function for getting sum of Payslip with respect to
@@ -420,19 +610,8 @@ class HrPayslip(models.Model):
             def sum(self, code, from_date, to_date=None):
                 """Function for getting sum of Payslip with respect to
                  from_date,to_date fields"""
-                if to_date is None:
-                    to_date = fields.Date.today()
-                self.env.cr.execute("""SELECT sum(case when hp.credit_note = 
-                False then (pl.total) else (-pl.total) end)
-                FROM hr_payslip as hp, hr_payslip_line as pl
-                WHERE hp.employee_id = %s AND hp.state = 'done'
-                AND hp.date_from >= %s AND hp.date_to <= %s AND hp.id 
-                = pl.slip_id AND pl.code = %s""",
-                                    (
-                                        self.employee_id, from_date, to_date,
-                                        code))
-                res = self.env.cr.fetchone()
-                return res and res[0] or 0.0
+                total, = self._get_totals(code, from_date, to_date) or (0.0,)
+                return total or 0.0
 
         # we keep a dict with the result because a value can be overwritten
         # by another rule with the same code
@@ -442,15 +621,20 @@ class HrPayslip(models.Model):
         inputs_dict = {}
         blacklist = []
         payslip = self.env['hr.payslip'].browse(payslip_id)
+        if aggregates is None:
+            aggregates = self._get_payslip_aggregates(payslip.employee_id.ids)
         for worked_days_line in payslip.worked_days_line_ids:
             worked_days_dict[worked_days_line.code] = worked_days_line
         for input_line in payslip.input_line_ids:
             inputs_dict[input_line.code] = input_line
         categories = BrowsableObject(payslip.employee_id.id, {}, self.env)
-        inputs = InputLine(payslip.employee_id.id, inputs_dict, self.env)
+        inputs = InputLine(payslip.employee_id.id, inputs_dict, self.env,
+                           functools.partial(aggregates.get, 'inputs'))
         worked_days = WorkedDays(payslip.employee_id.id, worked_days_dict,
-                                 self.env)
-        payslips = Payslips(payslip.employee_id.id, payslip, self.env)
+                                 self.env,
+                                 functools.partial(aggregates.get, 'worked_days'))
+        payslips = Payslips(payslip.employee_id.id, payslip, self.env,
+                            functools.partial(aggregates.get, 'lines'))
         rules = BrowsableObject(payslip.employee_id.id, rules_dict, self.env)
         baselocaldict = {'categories': categories, 'rules': rules,
                          'payslip': payslips, 'worked_days': worked_days,
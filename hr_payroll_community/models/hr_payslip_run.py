@@ -22,7 +22,11 @@
 #############################################################################
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
-from odoo import fields, models
+from odoo import api, fields, models
+
+# Number of payslips computed in one go, bigger batches are computed by the
+# scheduled action chunk by chunk
+PAYSLIP_COMPUTE_BATCH_SIZE = 100
 
 
 class HrPayslipRun(models.Model):
@@ -55,6 +59,25 @@ class HrPayslipRun(models.Model):
                                  help="If its checked, indicates that all"
                                       "payslips generated from here are refund"
                                       "payslips.")
+    compute_pending_count = fields.Integer(
+        compute='_compute_compute_progress', string='Payslips to Compute',
+        help="Number of payslips waiting to be computed")
+    compute_progress = fields.Float(
+        compute='_compute_compute_progress', string='Computation Progress',
+        help="Percentage of the payslips of the batch already computed")
+
+    def _compute_compute_progress(self):
+        """Compute function for the payslip computation progress"""
+        counts = {(run.id, pending): count for run, pending, count in
+                  self.env['hr.payslip']._read_group(
+                      [('payslip_run_id', 'in', self.ids)],
+                      ['payslip_run_id', 'compute_pending'], ['__count'])}
+        for run in self:
+            pending = counts.get((run.id, True), 0)
+            total = pending + counts.get((run.id, False), 0)
+            run.compute_pending_count = pending
+            run.compute_progress = total and (total - pending) * 100.0 / total \
+                or 100.0
 
     def action_payslip_run(self):
         """Function for state change"""
@@ -63,3 +86,26 @@ class HrPayslipRun(models.Model):
     def close_payslip_run(self):
         """Function for state change"""
         return self.write({'state': 'close'})
+
+    def _compute_payslip_sheets(self, payslips):
+        """Function for computing the payslips of the batch, small batches
+        are computed right away, bigger ones are left to the scheduled action
+        which computes them chunk by chunk"""
+        if len(payslips) <= PAYSLIP_COMPUTE_BATCH_SIZE:
+            return payslips.action_compute_sheet()
+        payslips.write({'compute_pending': True})
+        self.env.ref(
+            'hr_payroll_community.ir_cron_compute_payslip_batches')._trigger()
+        return True
+
+    @api.model
+    def _cron_compute_payslip_sheets(self):
+        """Scheduled action computing the pending payslips chunk by chunk"""
+        payslips = self.env['hr.payslip'].search(
+            [('compute_pending', '=', True)],
+            order='payslip_run_id, id', limit=PAYSLIP_COMPUTE_BATCH_SIZE)
+        payslips.action_compute_sheet()
+        self.env['ir.cron']._notify_progress(
+            done=len(payslips),
+            remaining=self.env['hr.payslip'].search_count(
+                [('compute_pending', '=', True)]))
@@ -20,10 +20,11 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.addons import decimal_precision as dp
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools.safe_eval import safe_eval
+from odoo.tools.safe_eval import (_BUILTINS, _SAFE_OPCODES, check_values,
+                                  test_expr)
 
 
 class HrSalaryRule(models.Model):
@@ -159,6 +160,35 @@ class HrSalaryRule(models.Model):
                 _('Error! You cannot create recursive hierarchy '
                   'of Salary Rules.'))
 
+    @api.model
+    @tools.ormcache('expr', 'mode', 'filename')
+    def _get_compiled_code(self, expr, mode, filename):
+        """
+        @return: returns the code object of the python expression expr,
+        checked against the safe_eval sandbox. It is cached for the registry
+        on the expression itself, so each version of a rule is only parsed
+        once and no invalidation is needed when a rule is updated.
+        """
+        if mode == 'eval':
+            expr = expr.strip()
+        return test_expr(expr, _SAFE_OPCODES, mode=mode, filename=filename)
+
+    def _eval_code(self, field_name, localdict, mode='eval'):
+        """
+        Evaluate the python expression stored in field_name like safe_eval
+        does, from the cached code object. As with safe_eval, localdict is
+        only updated in place in 'exec' mode.
+        """
+        self.ensure_one()
+        code = self._get_compiled_code(
+            self[field_name] or '', mode,
+            'hr.salary.rule(%s).%s' % (self.id, field_name))
+        if mode == 'eval':
+            localdict = dict(localdict)
+        localdict['__builtins__'] = dict(_BUILTINS)
+        check_values(localdict)
+        return eval(code, localdict)
+
     def _recursive_search_of_rules(self):
         """
         @return: returns a list of tuple (id, sequence) which are all the
@@ -183,7 +213,7 @@ class HrSalaryRule(models.Model):
             if rec.amount_select == 'fix':
                 try:
                     return rec.amount_fix, float(
-                        safe_eval(rec.quantity, localdict)), 100.0
+                        rec._eval_code('quantity', localdict)), 100.0
                 except:
                     raise UserError(
                         _('Wrong quantity defined for salary rule %s (%s).') % (
@@ -191,8 +221,9 @@ class HrSalaryRule(models.Model):
             elif rec.amount_select == 'percentage':
                 try:
                     return (
-                        float(safe_eval(rec.amount_percentage_base, localdict)),
-                        float(safe_eval(rec.quantity, localdict)),
+                        float(rec._eval_code('amount_percentage_base',
+                                             localdict)),
+                        float(rec._eval_code('quantity', localdict)),
                         rec.amount_percentage)
                 except:
                     raise UserError(
@@ -201,8 +232,8 @@ class HrSalaryRule(models.Model):
                             rec.name, rec.code))
             else:
                 try:
-                    safe_eval(rec.amount_python_compute, localdict, mode='exec',
-                              nocopy=True)
+                    rec._eval_code('amount_python_compute', localdict,
+                                   mode='exec')
                     return (float(localdict['result']),
                             'result_qty' in localdict and
                             localdict['result_qty'] or 1.0, 'result_rate'
@@ -224,7 +255,7 @@ class HrSalaryRule(models.Model):
             return True
         elif self.condition_select == 'range':
             try:
-                result = safe_eval(self.condition_range, localdict)
+                result = self._eval_code('condition_range', localdict)
                 return (
                             self.condition_range_min <= result <= self.condition_range_max or False)
             except:
@@ -234,8 +265,7 @@ class HrSalaryRule(models.Model):
                         self.name, self.code))
         else:  # python code
             try:
-                safe_eval(self.condition_python, localdict, mode='exec',
-                          nocopy=True)
+                self._eval_code('condition_python', localdict, mode='exec')
                 return 'result' in localdict and localdict['result'] or False
             except:
                 raise UserError(
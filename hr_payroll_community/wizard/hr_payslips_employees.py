@@ -37,7 +37,6 @@ class HrPayslipEmployees(models.TransientModel):
 
     def action_compute_sheet(self):
         """Function for compute Payslip Sheet"""
-        payslips = self.env['hr.payslip']
         [data] = self.read()
         active_id = self.env.context.get('active_id')
         if active_id:
@@ -48,26 +47,15 @@ class HrPayslipEmployees(models.TransientModel):
         if not data['employee_ids']:
             raise UserError(
                 _("You must select employee(s) to generate payslip(s)."))
-        for employee in self.env['hr.employee'].browse(data['employee_ids']):
-            slip_data = (
-                self.env['hr.payslip'].onchange_employee_id(
-                    from_date, to_date, employee.id, contract_id=False))
-            res = {
-                'employee_id': employee.id,
-                'name': slip_data['value'].get('name'),
-                'struct_id': slip_data['value'].get('struct_id'),
-                'contract_id': slip_data['value'].get('contract_id'),
+        employees = self.env['hr.employee'].browse(data['employee_ids'])
+        vals_list = self.env['hr.payslip']._prepare_batch_payslip_vals(
+            employees, from_date, to_date)
+        for vals in vals_list:
+            vals.update({
                 'payslip_run_id': active_id,
-                'input_line_ids': [(0, 0, x) for x in
-                                   slip_data['value'].get('input_line_ids')],
-                'worked_days_line_ids': [(0, 0, x) for x in
-                                         slip_data['value'].get(
-                                             'worked_days_line_ids')],
-                'date_from': from_date,
-                'date_to': to_date,
                 'credit_note': run_data.get('credit_note'),
-                'company_id': employee.company_id.id,
-            }
-            payslips += self.env['hr.payslip'].create(res)
-        payslips.action_compute_sheet()
+            })
+        payslips = self.env['hr.payslip'].create(vals_list)
+        self.env['hr.payslip.run'].browse(active_id)._compute_payslip_sheets(
+            payslips)
         return {'type': 'ir.actions.act_window_close'}
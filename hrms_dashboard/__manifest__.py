@@ -22,7 +22,7 @@
 #############################################################################
 {
     'name': "Open HRMS HR Dashboard",
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.0.3',
     'summary': """Open HRMS - HR Dashboard""",
     'description': """Open HRMS - HR Dashboard""",
     'category': 'Generic Modules/Human Resources',
@@ -40,6 +40,7 @@
     },
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'report/broadfactor.xml',
         'views/hr_leave_views.xml',
         'views/hrms_dashboard_menus.xml',
@@ -24,3 +24,4 @@ from . import hr_employee
 from . import hr_employee_base
 from . import hr_leave
 from . import hr_leave_type
+from . import hr_employee_monthly_trend
@@ -21,16 +21,22 @@
 #
 #############################################################################
 import pandas as pd
+import time
 from collections import defaultdict
 from datetime import timedelta, datetime, date
 from dateutil.relativedelta import relativedelta
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.http import request
-from odoo.tools import float_utils
+from odoo.tools import float_utils, SQL
 from odoo.tools import format_duration
 from pytz import utc
 
 ROUNDING_FACTOR = 16
+# Lifetime in seconds of the cached company wide dashboard charts
+DASHBOARD_CACHE_TTL = 300
+# Sequence holding the version of the cached dashboard charts, bumped when
+# the employees or leaves change
+DASHBOARD_CACHE_SEQUENCE = 'hrms_dashboard_cache_version'
 
 
 class HrEmployee(models.Model):
@@ -40,6 +46,78 @@ class HrEmployee(models.Model):
     birthday = fields.Date(string='Date of Birth', groups="base.group_user",
                            help="Birthday of employee")
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Clear the cached dashboard charts on employee creation"""
+        res = super().create(vals_list)
+        self._invalidate_dashboard_cache()
+        self._refresh_monthly_trends(res._get_trend_dates())
+        return res
+
+    def write(self, vals):
+        """Clear the cached dashboard charts on employee update, and
+        recompute the monthly trends of the old and new joining or resign
+        dates"""
+        # The joining date is computed from the contract
+        trend_dates = None
+        if vals.keys() & {'joining_date', 'resign_date', 'contract_id'}:
+            trend_dates = self._get_trend_dates()
+        res = super().write(vals)
+        self._invalidate_dashboard_cache()
+        if trend_dates is not None:
+            self._refresh_monthly_trends(trend_dates + self._get_trend_dates())
+        return res
+
+    def unlink(self):
+        """Clear the cached dashboard charts on employee deletion"""
+        trend_dates = self._get_trend_dates()
+        res = super().unlink()
+        self._invalidate_dashboard_cache()
+        self._refresh_monthly_trends(trend_dates)
+        return res
+
+    def _get_trend_dates(self):
+        """Returns the joining and resign dates of the employees"""
+        return self.mapped('joining_date') + self.mapped('resign_date')
+
+    @api.model
+    def _refresh_monthly_trends(self, trend_dates):
+        """Recompute the monthly trend snapshots affected by the dates"""
+        self.env['hr.employee.monthly.trend'].sudo()._refresh_from_dates(
+            trend_dates)
+
+    def init(self):
+        """Create the sequence versioning the cached dashboard charts"""
+        super().init()
+        self.env.cr.execute(SQL(
+            "CREATE SEQUENCE IF NOT EXISTS %s",
+            SQL.identifier(DASHBOARD_CACHE_SEQUENCE)))
+
+    @api.model
+    def _invalidate_dashboard_cache(self):
+        """Bump the version of the cached dashboard charts once the
+        transaction is committed. Unlike clearing the registry cache, the
+        other ormcache entries are kept."""
+        postcommit = self.env.cr.postcommit
+        if DASHBOARD_CACHE_SEQUENCE in postcommit.data:
+            return
+        postcommit.data[DASHBOARD_CACHE_SEQUENCE] = True
+        registry = self.env.registry
+
+        @postcommit.add
+        def bump_dashboard_cache_version():
+            with registry.cursor() as cr:
+                cr.execute(SQL(
+                    "SELECT nextval(%s)", DASHBOARD_CACHE_SEQUENCE))
+
+    @api.model
+    def _get_dashboard_cache_version(self):
+        """Returns the current version of the cached dashboard charts"""
+        self.env.cr.execute(SQL(
+            "SELECT last_value FROM %s",
+            SQL.identifier(DASHBOARD_CACHE_SEQUENCE)))
+        return self.env.cr.fetchone()[0]
+
     def attendance_manual(self):
         """Create and update an attendance for the user employee"""
         employee = request.env['hr.employee'].sudo().browse(
@@ -66,6 +144,49 @@ class HrEmployee(models.Model):
         else:
             return False
 
+    @api.model
+    def get_dashboard_data(self):
+        """Returns the whole dashboard payload in a single call"""
+        employee = self.get_user_employee_details()
+        data = {
+            'is_manager': self.check_user_group(),
+            'login_employee': employee,
+            'upcoming': self.get_upcoming(),
+            'employee_leave_trend': [],
+            'employee_skill': [],
+        }
+        if employee:
+            data.update({
+                'employee_leave_trend': self.employee_leave_trend(),
+                'employee_skill': self.get_employee_skill(),
+            })
+        data.update(self._get_company_dashboard_data())
+        return data
+
+    @api.model
+    def _get_company_dashboard_data(self):
+        """Returns the company wide charts of the dashboard, cached per
+        company, month and language for DASHBOARD_CACHE_TTL seconds, or until
+        the employees or leaves change"""
+        return self._get_company_dashboard_data_cached(
+            self.env.company.id, fields.Date.today().strftime('%Y-%m'),
+            int(time.time() // DASHBOARD_CACHE_TTL),
+            self._get_dashboard_cache_version())
+
+    @api.model
+    @tools.ormcache('company_id', 'month', 'ttl_slot', 'version',
+                    'self.env.lang')
+    def _get_company_dashboard_data_cached(self, company_id, month,
+                                           ttl_slot, version):
+        """Compute the company wide charts of the dashboard"""
+        employees = self.sudo().with_company(company_id)
+        return {
+            'dept_employee': employees.get_dept_employee(),
+            'department_leave': employees.get_department_leave(),
+            'join_resign_trends': employees.join_resign_trends(),
+            'attrition_rate': employees.get_attrition_rate(),
+        }
+
     @api.model
     def get_user_employee_details(self):
         """To fetch the details of employee"""
@@ -435,57 +556,14 @@ class HrEmployee(models.Model):
     @api.model
     def join_resign_trends(self):
         """Returns join/resign details of departments"""
-        cr = self._cr
-        month_list = []
         join_trend = []
         resign_trend = []
-        for i in range(11, -1, -1):
-            last_month = datetime.now() - relativedelta(months=i)
-            text = format(last_month, '%B %Y')
-            month_list.append(text)
-        for month in month_list:
-            vals = {
-                'l_month': month,
-                'count': 0
-            }
-            join_trend.append(vals)
-        for month in month_list:
-            vals = {
-                'l_month': month,
-                'count': 0
-            }
-            resign_trend.append(vals)
-        cr.execute('''select to_char(joining_date, 'Month YYYY') as l_month,
-         count(id) from hr_employee
-        WHERE joining_date BETWEEN CURRENT_DATE - INTERVAL '12 months'
-        AND CURRENT_DATE + interval '1 month - 1 day'
-        group by l_month''')
-        join_data = cr.fetchall()
-        cr.execute('''select to_char(resign_date, 'Month YYYY') as l_month,
-         count(id) from hr_employee
-        WHERE resign_date BETWEEN CURRENT_DATE - INTERVAL '12 months'
-        AND CURRENT_DATE + interval '1 month - 1 day'
-        group by l_month;''')
-        resign_data = cr.fetchall()
-
-        for line in join_data:
-            match = list(filter(
-                lambda d: d['l_month'].replace(' ', '') == line[0].replace(' ',
-                                                                           ''),
-                join_trend))
-            if match:
-                match[0]['count'] = line[1]
-        for line in resign_data:
-            match = list(filter(
-                lambda d: d['l_month'].replace(' ', '') == line[0].replace(' ',
-                                                                           ''),
-                resign_trend))
-            if match:
-                match[0]['count'] = line[1]
-        for join in join_trend:
-            join['l_month'] = join['l_month'].split(' ')[:1][0].strip()[:3]
-        for resign in resign_trend:
-            resign['l_month'] = resign['l_month'].split(' ')[:1][0].strip()[:3]
+        for trend in self.env['hr.employee.monthly.trend'].sudo()._get_trends(
+                12):
+            l_month = format(trend.month, '%B')[:3]
+            join_trend.append({'l_month': l_month, 'count': trend.join_count})
+            resign_trend.append({'l_month': l_month,
+                                 'count': trend.resign_count})
         graph_result = [{
             'name': 'Join',
             'values': join_trend
@@ -499,40 +577,14 @@ class HrEmployee(models.Model):
     def get_attrition_rate(self):
         """Returns monthly wise attrition rate"""
         month_attrition = []
-        monthly_join_resign = self.join_resign_trends()
-        month_join = monthly_join_resign[0]['values']
-        month_resign = monthly_join_resign[1]['values']
-        sql = """
-        SELECT (date_trunc('month', CURRENT_DATE))::date - interval '1' 
-        month * s.a AS month_start
-        FROM generate_series(0,11,1) AS s(a);"""
-        self._cr.execute(sql)
-        month_start_list = self._cr.fetchall()
-        for month_date in month_start_list:
-            self._cr.execute("""select count(id), 
-            to_char(date '%s', 'Month YYYY') as l_month from hr_employee
-            where resign_date> date '%s' or resign_date is null and 
-            joining_date < date '%s'
-            """ % (month_date[0], month_date[0], month_date[0],))
-            month_emp = self._cr.fetchone()
-            match_join = \
-                list(filter(
-                    lambda d: d['l_month'] == month_emp[1].split(' ')[:1][
-                                                  0].strip()[:3], month_join))[
-                    0][
-                    'count']
-            match_resign = \
-                list(filter(
-                    lambda d: d['l_month'] == month_emp[1].split(' ')[:1][
-                                                  0].strip()[:3],
-                    month_resign))[0][
-                    'count']
-            month_avg = (month_emp[0] + match_join - match_resign + month_emp[
-                0]) / 2
-            attrition_rate = (match_resign / month_avg) * 100 \
+        trends = self.env['hr.employee.monthly.trend'].sudo()._get_trends(12)
+        for trend in trends.sorted('month', reverse=True):
+            month_avg = (trend.headcount + trend.join_count -
+                         trend.resign_count + trend.headcount) / 2
+            attrition_rate = (trend.resign_count / month_avg) * 100 \
                 if month_avg != 0 else 0
             vals = {
-                'month': month_emp[1].split(' ')[:1][0].strip()[:3],
+                'month': format(trend.month, '%B')[:3],
                 'attrition_rate': round(float(attrition_rate), 2)
             }
             month_attrition.append(vals)
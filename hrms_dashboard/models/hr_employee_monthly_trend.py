@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#    A part of Open HRMS Project <https://www.openhrms.com>
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from odoo import api, fields, models
+
+
+# Snapshots of the months between month_from and month_to, computed in one
+# pass over hr_employee
+TREND_QUERY = """
+    SELECT m.month,
+        count(e.id) FILTER (WHERE e.resign_date > m.month
+            OR e.resign_date IS NULL AND e.joining_date < m.month)
+            AS headcount,
+        count(e.id) FILTER (WHERE e.joining_date >= m.month
+            AND e.joining_date < m.month + interval '1 month') AS join_count,
+        count(e.id) FILTER (WHERE e.resign_date >= m.month
+            AND e.resign_date < m.month + interval '1 month') AS resign_count
+    FROM (SELECT generate_series(
+            date_trunc('month', %(month_from)s::date),
+            date_trunc('month', %(month_to)s::date),
+            interval '1 month')::date AS month) m
+    LEFT JOIN hr_employee e ON TRUE
+    GROUP BY m.month
+    ORDER BY m.month
+"""
+
+
+class HrEmployeeMonthlyTrend(models.Model):
+    """ Monthly snapshot of the headcount, joins and resignations used by the
+    dashboard trend charts """
+    _name = 'hr.employee.monthly.trend'
+    _description = 'Employee Monthly Trend'
+    _order = 'month'
+
+    month = fields.Date(string='Month', required=True, index=True,
+                        help="First day of the month")
+    headcount = fields.Integer(string='Headcount',
+                               help="Number of employees at the start of "
+                                    "the month")
+    join_count = fields.Integer(string='Joined',
+                                help="Number of employees who joined during "
+                                     "the month")
+    resign_count = fields.Integer(string='Resigned',
+                                  help="Number of employees who resigned "
+                                       "during the month")
+
+    _sql_constraints = [
+        ('month_uniq', 'unique(month)', 'Only one trend per month is allowed.'),
+    ]
+
+    @api.model
+    def _refresh_months(self, month_from, month_to):
+        """ Compute the snapshots of the months between month_from and
+        month_to and store them """
+        self.env['hr.employee'].flush_model(['joining_date', 'resign_date'])
+        self.env.cr.execute("""
+            INSERT INTO hr_employee_monthly_trend (month, headcount,
+                join_count, resign_count, create_uid, create_date,
+                write_uid, write_date)
+            SELECT t.month, t.headcount, t.join_count, t.resign_count,
+                %%(uid)s, now() at time zone 'UTC',
+                %%(uid)s, now() at time zone 'UTC'
+            FROM (%s) t
+            ON CONFLICT (month) DO UPDATE SET
+                headcount = EXCLUDED.headcount,
+                join_count = EXCLUDED.join_count,
+                resign_count = EXCLUDED.resign_count,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """ % TREND_QUERY, {'month_from': month_from, 'month_to': month_to,
+                            'uid': self.env.uid})
+        self.invalidate_model()
+
+    @api.model
+    def _compute_months(self, month_from, month_to):
+        """ Returns the snapshots of the months between month_from and
+        month_to as new records, without storing them """
+        self.env['hr.employee'].flush_model(['joining_date', 'resign_date'])
+        self.env.cr.execute(TREND_QUERY, {'month_from': month_from,
+                                          'month_to': month_to})
+        return self.concat(*[self.new(vals)
+                             for vals in self.env.cr.dictfetchall()])
+
+    @api.model
+    def _refresh_from_dates(self, dates):
+        """ Recompute the stored snapshots from the month of the oldest of
+        the given joining or resign dates up to the current month, once the
+        history exists """
+        dates = [fields.Date.to_date(day) for day in dates if day]
+        if not dates:
+            return
+        first = self.search([], order='month', limit=1)
+        if not first:
+            return
+        month_to = date.today().replace(day=1)
+        month_from = max(min(dates).replace(day=1), first.month)
+        if month_from <= month_to:
+            self._refresh_months(month_from, month_to)
+
+    @api.model
+    def _get_trends(self, months=12):
+        """ Returns the snapshots of the last months, oldest first. The
+        current month is computed on the fly; the missing past months are
+        stored by the first transaction getting the lock, the others compute
+        them on the fly too """
+        month_to = date.today().replace(day=1)
+        month_from = month_to - relativedelta(months=months - 1)
+        domain = [('month', '>=', month_from), ('month', '<', month_to)]
+        trends = self.search(domain)
+        if len(trends) < months - 1:
+            self.env.cr.execute(
+                "SELECT pg_try_advisory_xact_lock(hashtext(%s))",
+                [self._table])
+            if not self.env.cr.fetchone()[0]:
+                return self._compute_months(month_from, month_to)
+            self._refresh_months(month_from,
+                                 month_to - relativedelta(months=1))
+            trends = self.search(domain)
+        return trends + self._compute_months(month_to, month_to)
+
+    @api.model
+    def _cron_update_trends(self):
+        """ Daily update of the snapshots: the whole history the first time,
+        then only the previous and the current months """
+        month_to = date.today().replace(day=1)
+        if self.search_count([], limit=1):
+            month_from = month_to - relativedelta(months=1)
+        else:
+            self.env.cr.execute("""
+                SELECT least(min(joining_date), min(resign_date))
+                FROM hr_employee""")
+            first_date = self.env.cr.fetchone()[0]
+            month_from = min(first_date or month_to, month_to)
+        self._refresh_months(month_from, month_to)
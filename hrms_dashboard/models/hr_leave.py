@@ -20,7 +20,7 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class HrLeave(models.Model):
@@ -32,3 +32,22 @@ class HrLeave(models.Model):
         store=True, help="Field allowing to see the leave request duration "
                          "in days or hours depending on the "
                          "leave_type_request_unit")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Clear the cached dashboard charts on leave creation"""
+        res = super().create(vals_list)
+        self.env['hr.employee']._invalidate_dashboard_cache()
+        return res
+
+    def write(self, vals):
+        """Clear the cached dashboard charts on leave update"""
+        res = super().write(vals)
+        self.env['hr.employee']._invalidate_dashboard_cache()
+        return res
+
+    def unlink(self):
+        """Clear the cached dashboard charts on leave deletion"""
+        res = super().unlink()
+        self.env['hr.employee']._invalidate_dashboard_cache()
+        return res
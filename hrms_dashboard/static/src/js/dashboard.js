@@ -36,17 +36,13 @@ export class HrDashboard extends Component{
         onWillStart(async () => {
             this.isHrManager = await user.hasGroup("hr.group_hr_manager");
             this.state.login_employee = {}
-            if ( await this.orm.call('hr.employee', 'check_user_group', []) ) {
-                this.state.is_manager = true
-            }
-            else {
-                this.state.is_manager = false
-            }
-            var empDetails = await this.orm.call('hr.employee', 'get_user_employee_details', [])
+            this.dashboard_data = await this.orm.call('hr.employee', 'get_dashboard_data', [])
+            this.state.is_manager = this.dashboard_data['is_manager'] ? true : false
+            var empDetails = this.dashboard_data['login_employee']
             if ( empDetails ){
                 this.state.login_employee = empDetails[0]
             }
-            var res = await this.orm.call('hr.employee', 'get_upcoming', [])
+            var res = this.dashboard_data['upcoming']
             if ( res ) {
                 this.state.employee_birthday = res['birthday'];
                 this.state.upcoming_events = res['event'];
@@ -75,7 +71,7 @@ export class HrDashboard extends Component{
             '#8e559e', '#cf3650', '#f65337', '#fe7139', '#ffa433',
             '#ffc25b', '#f8e54b'
         ];
-        const data = await this.orm.call('hr.employee', 'get_dept_employee', []);
+        const data = this.dashboard_data['dept_employee'];
         if (data) {
             const labels = data.map(d => d.label);
             const values = data.map(d => d.value);
@@ -121,7 +117,7 @@ export class HrDashboard extends Component{
             '#8e559e', '#cf3650', '#f65337', '#fe7139', '#ffa433',
             '#ffc25b', '#f8e54b'
         ];
-        const data = await this.orm.call('hr.employee', 'get_department_leave', []);
+        const data = this.dashboard_data['department_leave'];
         if (data) {
             const fData = data[0];
             const dept = data[1];
@@ -205,7 +201,7 @@ export class HrDashboard extends Component{
     }
     async update_join_resign_trends() {
         const colors = ['#70cac1', '#659d4e', '#208cc2', '#4d6cb1', '#584999', '#8e559e', '#cf3650', '#f65337', '#fe7139', '#ffa433', '#ffc25b', '#f8e54b'];
-        const data = await this.orm.call('hr.employee', 'join_resign_trends', []);
+        const data = this.dashboard_data['join_resign_trends'];
         if (data) {
             const labels = data[0].values.map(d => d.l_month);
             const datasets = data.map((dataset, index) => ({
@@ -256,7 +252,7 @@ export class HrDashboard extends Component{
     }
     async update_monthly_attrition() {
         const colors = ['#70cac1', '#659d4e', '#208cc2', '#4d6cb1', '#584999', '#8e559e', '#cf3650', '#f65337', '#fe7139', '#ffa433', '#ffc25b', '#f8e54b'];
-        const data = await this.orm.call('hr.employee', 'get_attrition_rate', []);
+        const data = this.dashboard_data['attrition_rate'];
         if (data) {
             const labels = data.map(d => d.month);
             const attritionData = data.map(d => d.attrition_rate);
@@ -315,7 +311,7 @@ export class HrDashboard extends Component{
         }
     }
     async update_leave_trend() {
-        const data = await this.orm.call('hr.employee', 'employee_leave_trend', []);
+        const data = this.dashboard_data['employee_leave_trend'];
         if (data) {
             const labels = data.map(d => d.l_month);
             const leaveData = data.map(d => d.leave);
@@ -375,7 +371,7 @@ export class HrDashboard extends Component{
     }
     async render_employee_skill() {
         const colors = ['#ff6384','#4bc0c0','#ffcd56','#c9cbcf','#36a2eb', '#659d4e', '#4d6cb1', '#584999', '#8e559e', '#cf3650', '#f65337', '#fe7139', '#ffa433', '#ffc25b', '#f8e54b'];
-        const data = await this.orm.call('hr.employee', 'get_employee_skill', []);
+        const data = this.dashboard_data['employee_skill'];
         if (data) {
             const labels = data.map(d => d.skills);
             const skillData = data.map(d => d.progress);
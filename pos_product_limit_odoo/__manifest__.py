@@ -21,7 +21,7 @@
 #############################################################################
 {
     'name': 'Pos Product Limit Odoo',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.0.1',
     'summary': """Pos Product Limit Odoo which is used to limit the number of 
      products in the pos.""",
     'description': """This module is used to limit the number of product loads 
@@ -35,7 +35,8 @@
     'data': ['views/pos_config_views.xml'],
     'assets': {
         'point_of_sale._assets_pos': [
-            'pos_product_limit_odoo/static/src/js/productWidget.js'
+            'pos_product_limit_odoo/static/src/js/product_loader.js',
+            'pos_product_limit_odoo/static/src/js/productWidget.js',
         ],
     },
     'images': ['static/description/banner.jpg'],
@@ -20,3 +20,4 @@
 #
 #############################################################################
 from . import pos_config
+from . import product_product
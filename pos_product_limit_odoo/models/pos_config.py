@@ -19,8 +19,13 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from datetime import timedelta
+
 from odoo import fields, models
 
+# Number of days of POS sales used to rank the products loaded at startup
+PRODUCT_RANKING_DAYS = 90
+
 
 class PosConfig(models.Model):
     """Inherits PosConfig models for adding new fields to the product limit"""
@@ -28,5 +33,31 @@ class PosConfig(models.Model):
 
     product_limit = fields.Integer(
         string="Product Limit",
-        help="Specify the maximum number of products allowed.")
+        help="Specify the maximum number of products displayed. With "
+             "\"Load Products on Demand\", only the best selling products up "
+             "to this limit are loaded when a session opens.")
+    product_load_on_demand = fields.Boolean(
+        string="Load Products on Demand",
+        help="Only load the best selling products up to the product limit "
+             "when a session opens and fetch the other ones from the server "
+             "while searching or selecting a category.")
+
+    def _get_startup_product_ids(self, domain):
+        """Return the ids of the products to load when a session opens:
+        the best sellers of this POS, completed in the default product order
+        up to the product limit, plus the special products (tips, discounts)."""
+        self.ensure_one()
+        limit = self.product_limit
+        lines = self.env['pos.order.line'].sudo()._read_group(
+            [('order_id.config_id', '=', self.id),
+             ('create_date', '>=',
+              fields.Datetime.now() - timedelta(days=PRODUCT_RANKING_DAYS)),
+             ('product_id', 'any', domain)],
+            ['product_id'], ['qty:sum'], order='qty:sum desc', limit=limit)
+        product_ids = [product.id for product, _qty in lines]
+        if len(product_ids) < limit:
+            product_ids += self.env['product.product'].search(
+                domain + [('id', 'not in', product_ids)],
+                limit=limit - len(product_ids)).ids
+        return product_ids + self._get_special_products().ids
 
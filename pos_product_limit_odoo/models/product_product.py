@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Akhil(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+from odoo.osv import expression
+
+
+class ProductProduct(models.Model):
+    """Inherits ProductProduct to apply the product limit of the POS
+    configuration when the session data is loaded"""
+    _inherit = 'product.product'
+
+    @api.model
+    def _load_pos_data_domain(self, data):
+        """In "load on demand" mode, only load the top products of the
+        configured limit at startup, the other ones are fetched on demand by
+        the POS. Otherwise every product is loaded and the limit only applies
+        to the displayed products."""
+        domain = super()._load_pos_data_domain(data)
+        config = self.env['pos.config'].browse(
+            data['pos.config']['data'][0]['id'])
+        if config.product_limit > 0 and config.product_load_on_demand:
+            domain = expression.AND([
+                domain,
+                [('id', 'in', config._get_startup_product_ids(domain))],
+            ])
+        return domain
@@ -1,15 +1,71 @@
 /** @odoo-module */
 import { ProductScreen } from "@point_of_sale/app/screens/product_screen/product_screen";
 import { patch } from "@web/core/utils/patch";
+import { useExternalListener } from "@odoo/owl";
 
 /**
  * Customizes the behavior of the `productsToDisplay` getter in the ProductScreen.
- * This patch modifies the way products are filtered, sorted, and limited before being displayed
- * based on search input, selected category, and other configurable parameters.**/
+ * In "load on demand" mode the product limit is applied when the session data is
+ * loaded, and the next pages of products are fetched from the server when
+ * searching, selecting a category or scrolling to the end of the list. Otherwise
+ * every product is loaded and only the displayed products are limited.**/
 
 patch(ProductScreen.prototype, {
+    setup() {
+        super.setup(...arguments);
+        useExternalListener(window, "scroll", this.onProductListScroll, { capture: true });
+    },
+    get loadsProductsOnDemand() {
+        return this.pos.config.product_limit > 0 && this.pos.config.product_load_on_demand;
+    },
+    /**
+     * Return the key and the server domain of the products currently looked for.**/
+    get onDemandQuery() {
+        if (this.searchWord !== "") {
+            const word = this.searchWord;
+            return {
+                key: `search:${word}`,
+                domain: [
+                    "|", "|",
+                    ["name", "ilike", word],
+                    ["default_code", "ilike", word],
+                    ["barcode", "ilike", word],
+                ],
+            };
+        }
+        const categoryId = this.pos.selectedCategory?.id;
+        if (categoryId) {
+            return { key: `categ:${categoryId}`, domain: [["pos_categ_ids", "child_of", categoryId]] };
+        }
+        return { key: "all", domain: [] };
+    },
+    onProductListScroll(ev) {
+        const el = ev.target;
+        if (
+            this.loadsProductsOnDemand &&
+            el instanceof HTMLElement &&
+            el.scrollHeight - el.scrollTop - el.clientHeight < 200 &&
+            el.querySelector(".product")
+        ) {
+            const { key, domain } = this.onDemandQuery;
+            this.pos.loadProductPage(key, domain);
+        }
+    },
     get productsToDisplay() {
         let list = [];
+        let maxCount = 100;
+
+        if (this.loadsProductsOnDemand) {
+            const { key, domain } = this.onDemandQuery;
+            const page = this.pos.productPages[key];
+            if (!page) {
+                // First page of a new search or category, the next ones are
+                // fetched while scrolling
+                this.pos.loadProductPage(key, domain);
+            } else {
+                maxCount = Math.max(maxCount, page.offset);
+            }
+        }
 
         if (this.searchWord !== "") {
             list = this.addMainProductsToDisplay(this.getProductsBySearchWord(this.searchWord));
@@ -32,20 +88,13 @@ patch(ProductScreen.prototype, {
                         ...this.pos.session._pos_special_products_ids,
                     ].includes(product.id) && product.available_in_pos
             )
-            .slice(0, 100);
+            .slice(0, maxCount);
 
-        let all_items = this.searchWord !== ""
+        list = this.searchWord !== ""
             ? list
             : list.sort((a, b) => a.display_name.localeCompare(b.display_name));
-             // Apply product limit from POS configuration
-           let limit_items = all_items
-           if (this.env.services.pos.config.product_limit <= 0){
-                limit_items = all_items;
-            }
-            else{
-                limit_items = all_items.slice(0,this.env.services.pos.config.product_limit);
-            }
-
-            return limit_items;
-    }
-    });
+        // Apply product limit from POS configuration
+        const limit = this.pos.config.product_limit;
+        return !this.loadsProductsOnDemand && limit > 0 ? list.slice(0, limit) : list;
+    },
+});
@@ -0,0 +1,134 @@
+/** @odoo-module */
+import { PosStore } from "@point_of_sale/app/store/pos_store";
+import { patch } from "@web/core/utils/patch";
+
+// Number of products fetched from the server at once
+export const PRODUCT_PAGE_SIZE = 50;
+
+/**
+ * Small IndexedDB store keeping the products fetched on demand, so that they
+ * are available again without the server when the POS is reloaded.**/
+class ProductCache {
+    constructor(name) {
+        this.name = name;
+        this.db = null;
+    }
+    open() {
+        return new Promise((resolve) => {
+            if (!window.indexedDB) {
+                return resolve(null);
+            }
+            const request = window.indexedDB.open(this.name, 1);
+            request.onupgradeneeded = () => request.result.createObjectStore("products", { keyPath: "id" });
+            request.onsuccess = () => resolve((this.db = request.result));
+            request.onerror = () => resolve(null);
+        });
+    }
+    _transaction(mode, callback) {
+        return new Promise((resolve) => {
+            if (!this.db) {
+                return resolve([]);
+            }
+            const transaction = this.db.transaction("products", mode);
+            const request = callback(transaction.objectStore("products"));
+            transaction.oncomplete = () => resolve(request?.result || []);
+            transaction.onerror = () => resolve([]);
+        });
+    }
+    getAll() {
+        return this._transaction("readonly", (store) => store.getAll());
+    }
+    put(records) {
+        return this._transaction("readwrite", (store) => {
+            for (const record of records) {
+                store.put(record);
+            }
+        });
+    }
+    delete(ids) {
+        return this._transaction("readwrite", (store) => {
+            for (const id of ids) {
+                store.delete(id);
+            }
+        });
+    }
+}
+
+/**
+ * Fetches the products which are not loaded at startup (see the product limit
+ * of the POS configuration) page by page from the server.**/
+patch(PosStore.prototype, {
+    async processServerData() {
+        await super.processServerData(...arguments);
+        // Pages already fetched per search word or category
+        this.productPages = {};
+        this.productCache = null;
+        if (this.config.product_limit > 0 && this.config.product_load_on_demand) {
+            this.productCache = new ProductCache(`pos_product_limit_${this.config.id}`);
+            await this.loadCachedProducts();
+        }
+    },
+    async loadCachedProducts() {
+        if (!(await this.productCache.open())) {
+            return;
+        }
+        const productModel = this.data.models["product.product"];
+        const cached = (await this.productCache.getAll()).filter(
+            (record) => !productModel.get(record.id)
+        );
+        if (!cached.length) {
+            return;
+        }
+        this.data.models.loadData({ "product.product": cached.map((record) => record.raw) });
+        // Refresh the cached products in the background, dropping the ones
+        // which are not available in the POS anymore
+        const ids = cached.map((record) => record.id);
+        this.fetchProducts([["id", "in", ids]]).then((products) => {
+            const fetchedIds = new Set(products.map((product) => product.id));
+            this.productCache.delete(ids.filter((id) => !fetchedIds.has(id)));
+        });
+    },
+    getOnDemandProductDomain() {
+        const domain = [
+            ["available_in_pos", "=", true],
+            ["sale_ok", "=", true],
+        ];
+        const { limit_categories, iface_available_categ_ids } = this.config;
+        if (limit_categories && iface_available_categ_ids.length) {
+            domain.push(["pos_categ_ids", "in", iface_available_categ_ids.map((categ) => categ.id)]);
+        }
+        return domain;
+    },
+    async fetchProducts(domain, options = {}) {
+        const products = await this.data.searchRead(
+            "product.product",
+            [...this.getOnDemandProductDomain(), ...domain],
+            this.data.fields["product.product"],
+            options
+        );
+        if (this.productCache && products.length) {
+            this.productCache.put(products.map((product) => ({ id: product.id, raw: product.raw })));
+        }
+        return products;
+    },
+    /**
+     * Fetch the next page of the products matching `domain`, `key` identifying
+     * the search word or category the pages belong to.**/
+    async loadProductPage(key, domain) {
+        const page = (this.productPages[key] ||= { offset: 0, done: false, loading: false });
+        if (page.done || page.loading) {
+            return;
+        }
+        page.loading = true;
+        try {
+            const products = await this.fetchProducts(domain, {
+                offset: page.offset,
+                limit: PRODUCT_PAGE_SIZE,
+            });
+            page.offset += products.length;
+            page.done = products.length < PRODUCT_PAGE_SIZE;
+        } finally {
+            page.loading = false;
+        }
+    },
+});
@@ -23,5 +23,5 @@ from . import pos_config
 from . import pos_session
 from . import product_template
 from . import res_config_settings # remove this
-from . import stock_move_line
+from . import stock_move
 from . import stock_quant
@@ -19,8 +19,12 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from collections import defaultdict
+
 from odoo import  api, fields, models
 
+POS_STOCK_PRECOMMIT_KEY = 'pos_product_stock.product_ids'
+
 
 class PosConfig(models.Model):
     """inherit pos.config to add fields."""
@@ -48,3 +52,63 @@ class PosConfig(models.Model):
             self.stock_location_id = False
         elif self.location_from == 'current_warehouse':
             self.stock_location_id = self.pos_config_id.pos_stock_location_id
+
+    def _get_pos_stock_location_ids(self):
+        """Return the ids of the locations whose stock is shown in the POS."""
+        self.ensure_one()
+        if self.location_from == 'current_warehouse' and self.pos_stock_location_id:
+            domain = [('id', 'child_of', self.pos_stock_location_id.id)]
+        else:
+            domain = [('usage', '=', 'internal'), ('company_id', 'in', [False, self.company_id.id])]
+        return self.env['stock.location'].sudo().search(domain).ids
+
+    def _get_pos_stock_data(self, product_ids=None):
+        """Return one row per product with its available, on hand, incoming
+        and outgoing quantities in the POS location(s), computed with grouped
+        queries instead of loading every quant in the POS."""
+        self.ensure_one()
+        location_ids = self._get_pos_stock_location_ids()
+        product_domain = [('product_id.available_in_pos', '=', True)]
+        if product_ids is not None:
+            product_domain.append(('product_id', 'in', product_ids))
+        stock = defaultdict(lambda: dict.fromkeys(('available', 'on_hand', 'incoming', 'outgoing'), 0.0))
+        for product_id in product_ids or []:
+            stock[product_id]
+        for product, quantity, reserved in self.env['stock.quant'].sudo()._read_group(
+                product_domain + [('location_id', 'in', location_ids)],
+                ['product_id'], ['quantity:sum', 'reserved_quantity:sum']):
+            stock[product.id]['on_hand'] = quantity
+            stock[product.id]['available'] = quantity - reserved
+        move_domain = product_domain + [('state', 'not in', ('draft', 'cancel', 'done'))]
+        for key, domain in (
+                ('incoming', [('location_dest_id', 'in', location_ids), ('location_id', 'not in', location_ids)]),
+                ('outgoing', [('location_id', 'in', location_ids), ('location_dest_id', 'not in', location_ids)])):
+            for product, quantity in self.env['stock.move'].sudo()._read_group(
+                    move_domain + domain, ['product_id'], ['product_qty:sum']):
+                stock[product.id][key] = quantity
+        return [dict(quantities, product_id=product_id) for product_id, quantities in stock.items()]
+
+    def get_pos_stock_data(self):
+        """Stock snapshot loaded by the POS when the session opens."""
+        return self._get_pos_stock_data()
+
+    @api.model
+    def _notify_pos_stock(self, product_ids):
+        """Queue the products whose stock changed, their new quantities are
+        sent to the open sessions when the transaction is about to commit."""
+        data = self.env.cr.precommit.data
+        if POS_STOCK_PRECOMMIT_KEY not in data:
+            data[POS_STOCK_PRECOMMIT_KEY] = set()
+            self.env.cr.precommit.add(self._send_pos_stock_updates)
+        data[POS_STOCK_PRECOMMIT_KEY].update(product_ids)
+
+    @api.model
+    def _send_pos_stock_updates(self):
+        """Push the stock rows of the changed products over the bus."""
+        product_ids = self.env.cr.precommit.data.pop(POS_STOCK_PRECOMMIT_KEY, set())
+        if not product_ids or not self.env['ir.config_parameter'].sudo().get_param(
+                'pos_product_stock.display_stock'):
+            return
+        configs = self.env['pos.session'].sudo().search([('state', '!=', 'closed')]).config_id
+        for config in configs:
+            config._notify('POS_PRODUCT_STOCK', config._get_pos_stock_data(list(product_ids)))
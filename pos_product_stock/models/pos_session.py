@@ -30,5 +30,5 @@ class PosSession(models.Model):
     def _load_pos_data_models(self, config_id):
         """The list of models to be loaded for POS data."""
         data = super()._load_pos_data_models(config_id)
-        data += ['res.config.settings','stock.quant','stock.move.line']
+        data += ['res.config.settings']
         return data
@@ -21,18 +21,25 @@
 #############################################################################
 from odoo import api, models
 
+# Fields whose change alters the incoming and outgoing quantities in the POS
+POS_STOCK_MOVE_FIELDS = {'product_id', 'location_id', 'location_dest_id', 'product_uom_qty', 'state'}
 
-class StockMoveLine(models.Model):
-    """Inherits model "stock.move.line to load pos data fields"""
-    _name = 'stock.move.line'
-    _inherit = ['stock.move.line','pos.load.mixin']
 
-    @api.model
-    def _load_pos_data_fields(self, config_id):
-        """Returns the list of fields to be loaded for POS data."""
-        result = super()._load_pos_data_fields(config_id)
-        result.append('product_id')
-        result.append('location_dest_id')
-        result.append('quantity')
-        result.append('location_id')
-        return result
+class StockMove(models.Model):
+    """Inherits model "stock.move" to push incoming and outgoing quantity
+    changes to the POS"""
+    _inherit = 'stock.move'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Notify the open POS sessions of the new moves."""
+        moves = super().create(vals_list)
+        self.env['pos.config']._notify_pos_stock(moves.product_id.ids)
+        return moves
+
+    def write(self, vals):
+        """Notify the open POS sessions of the move changes."""
+        res = super().write(vals)
+        if POS_STOCK_MOVE_FIELDS.intersection(vals):
+            self.env['pos.config']._notify_pos_stock(self.product_id.ids)
+        return res
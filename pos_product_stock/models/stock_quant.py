@@ -19,29 +19,33 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import  api, models
+from odoo import api, models
+
+# Fields whose change alters the stock shown in the POS
+POS_STOCK_QUANT_FIELDS = {'product_id', 'location_id', 'quantity', 'reserved_quantity'}
 
 
 class StockQuant(models.Model):
-    """Inherits model "stock.quant to load pos data"""
-    _name = 'stock.quant'
-    _inherit = ['stock.quant','pos.load.mixin']
+    """Inherits model "stock.quant" to push stock changes to the POS"""
+    _inherit = 'stock.quant'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Notify the open POS sessions of the new quants."""
+        quants = super().create(vals_list)
+        self.env['pos.config']._notify_pos_stock(quants.product_id.ids)
+        return quants
 
-    @api.model
-    def _load_pos_data_fields(self, config_id):
-        """Returns the list of fields to be loaded for POS data."""
-        return [
-            'product_id', 'available_quantity', 'quantity', 'location_id'
-        ]
+    def write(self, vals):
+        """Notify the open POS sessions of the quantity changes."""
+        if POS_STOCK_QUANT_FIELDS.intersection(vals):
+            self.env['pos.config']._notify_pos_stock(self.product_id.ids)
+        res = super().write(vals)
+        if 'product_id' in vals:
+            self.env['pos.config']._notify_pos_stock(self.product_id.ids)
+        return res
 
-    @api.model
-    def _load_pos_data_domain(self, data):
-        """Constructs the domain for loading POS data based on the POS configuration."""
-        config_id = self.env['pos.config'].browse(data['pos.config']['data'][0]['id'])
-        if config_id.location_from == 'all_warehouse':
-            location_ids = self.env['stock.location'].search([])
-            domain = [('location_id', 'in', location_ids.ids)]
-        else:
-            location_id = config_id.pos_stock_location_id
-            domain = ['|', ('location_id', '=', location_id.id), ('location_id', 'in', location_id.child_ids.ids)]
-        return domain
+    def unlink(self):
+        """Notify the open POS sessions of the removed quants."""
+        self.env['pos.config']._notify_pos_stock(self.product_id.ids)
+        return super().unlink()
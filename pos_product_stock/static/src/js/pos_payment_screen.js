@@ -9,42 +9,16 @@ patch(PaymentScreen.prototype, {
     async validateOrder(isForceValidate) {
         var order = this.pos.get_order();
         var lines = order.get_orderlines();
-        if (this.pos.res_setting['stock_from'] === 'all_warehouse') {
-            if (this.pos.res_setting['stock_type'] === 'on_hand') {
-                lines.forEach((line) => {
-                    var order_quantity = line.qty;
-                    var new_qty = line.product_id.qty_available - order_quantity;
-                    line.product_id.qty_available = new_qty;
-                });
-            }else if (this.pos.res_setting['stock_type'] === 'outgoing_qty') {
-                lines.forEach((line) => {
-                    var order_quantity = line.qty;
-
-                });
-            } else if (this.pos.res_setting['stock_type'] === 'incoming_qty') {
-                lines.forEach((line) => {
-                    var order_quantity = line.qty;
-                });
-            }
-        } else if (this.pos.res_setting['stock_from'] === 'current_warehouse') {
-            if (this.pos.res_setting['stock_type'] === 'on_hand') {
-                lines.forEach((line) => {
-                    var item_quantity = line.qty;
-                    var on_hand_qty = line.product_id.qty_available;
-                    var new_qty = on_hand_qty - item_quantity;
-                    line.product_id.qty_available = new_qty;
-                });
-            } else if (this.pos.res_setting['stock_type'] === 'outgoing_qty') {
-                lines.forEach((line) => {
-                    var item_quantity = line.qty;
-                    var out_going = line.product_id.outgoing;
-                });
-            } else if (this.pos.res_setting['stock_type'] === 'incoming_qty') {
-                lines.forEach((line) => {
-                    var item_quantity = line.qty;
-                    var incoming = line.product_id.incoming;
-                });
-            }
+        if (this.pos.res_setting['stock_type'] === 'on_hand') {
+            // Show the sold quantities until the server pushes the new stock
+            lines.forEach((line) => {
+                line.product_id.qty_available -= line.qty;
+                const stock = this.pos.productStock[line.product_id.id];
+                if (stock) {
+                    stock.on_hand -= line.qty;
+                    stock.available -= line.qty;
+                }
+            });
         }
         return super.validateOrder(...arguments);
     }
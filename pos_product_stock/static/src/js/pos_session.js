@@ -1,13 +1,43 @@
 /** @odoo-module */
 import { patch } from "@web/core/utils/patch";
+import { reactive } from "@odoo/owl";
 import { PosStore } from "@point_of_sale/app/store/pos_store";
 
 patch(PosStore.prototype, {
        async processServerData(data) {
-          super.processServerData(...arguments);
+        await super.processServerData(...arguments);
         this.res_setting = this.data.models['res.config.settings'].getFirst();
-        this.stock_quant = this.data.models['stock.quant'].getAll()
-        this.move_line = this.data.models['stock.move.line'].getAll();
         this.product_product = this.data.models['product.product'].getAll();
-       }
-})
\ No newline at end of file
+        // Variants of each template, to sum their stock on the product cards
+        this.variantIdsByTmpl = {};
+        for (const product of this.product_product) {
+            (this.variantIdsByTmpl[product.raw.product_tmpl_id] ||= []).push(product.id);
+        }
+        // One pre-aggregated row per product, then deltas pushed over the bus
+        this.productStock = reactive({});
+        if (this.res_setting && this.res_setting.display_stock) {
+            this.updateProductStock(
+                await this.data.call("pos.config", "get_pos_stock_data", [[this.config.id]])
+            );
+            this.data.connectWebSocket("POS_PRODUCT_STOCK", (rows) => this.updateProductStock(rows));
+        }
+       },
+       updateProductStock(rows) {
+        for (const row of rows) {
+            this.productStock[row.product_id] = row;
+        }
+       },
+       getProductStock(product) {
+        const stock = { available: 0, on_hand: 0, incoming: 0, outgoing: 0 };
+        const variantIds = this.variantIdsByTmpl[product.raw.product_tmpl_id] || [product.id];
+        for (const variantId of variantIds) {
+            const row = this.productStock[variantId];
+            if (row) {
+                for (const key in stock) {
+                    stock[key] += row[key];
+                }
+            }
+        }
+        return stock;
+       },
+})
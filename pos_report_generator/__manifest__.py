@@ -21,7 +21,7 @@
 ################################################################################
 {
 	'name': 'POS All in One Report Generator',
-	'version': '18.0.1.0.0',
+	'version': '18.0.1.0.2',
 	'category': 'Point of Sale',
 	'summary': """Dynamic Point Of Sale Reports.""",
 	'description': """This module helps to generate reports based on Orders,
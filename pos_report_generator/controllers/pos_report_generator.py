@@ -20,6 +20,8 @@
 #
 ################################################################################
 import json
+import os
+from werkzeug.wsgi import wrap_file
 from odoo import http
 from odoo.http import content_disposition, request
 from odoo.tools import html_escape
@@ -28,8 +30,8 @@ from odoo.tools import html_escape
 class TBXLSXReportController(http.Controller):
     @http.route('/pos_dynamic_xlsx_reports', type='http', auth='user',
                 methods=['POST'], csrf=False)
-    def get_report_xlsx(self, model, options, output_format, report_data,
-                        report_name, **kw):
+    def get_report_xlsx(self, model, options, output_format, report_name,
+                        report_data=None, **kw):
         """
         Generate an XLSX report based on the provided data and return it as a
         response.
@@ -40,15 +42,20 @@ class TBXLSXReportController(http.Controller):
         token = 'dummy-because-api-expects-one'
         try:
             if output_format == 'xlsx':
+                output = report_obj.get_pos_xlsx_report(options, report_data)
+                size = os.fstat(output.fileno()).st_size
+                # Stream the workbook from its temporary file, which is
+                # closed once sent
                 response = request.make_response(
-                    None,
+                    wrap_file(request.httprequest.environ, output),
                     headers=[
                         ('Content-Type', 'application/vnd.ms-excel'),
+                        ('Content-Length', size),
                         ('Content-Disposition',
                          content_disposition(report_name + '.xlsx'))
                     ]
                 )
-                report_obj.get_pos_xlsx_report(options, response, report_data)
+                response.direct_passthrough = True
             response.set_cookie('fileToken', token)
             return response
         except Exception as e:
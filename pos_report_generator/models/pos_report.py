@@ -19,8 +19,9 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ################################################################################
-import io
 import json
+import tempfile
+from datetime import datetime, timedelta
 from odoo import api, fields, models
 
 try:
@@ -28,6 +29,41 @@ try:
 except ImportError:
     import xlsxwriter
 
+# Number of rows fetched at once by the server side cursor of the reports
+REPORT_FETCH_SIZE = 2000
+
+# Report types filtered on whole days, the other ones keep the selected time
+REPORT_WHOLE_DAY_TYPES = ('report_by_order', 'report_by_order_detail')
+
+# Columns of the xlsx report of each report type: (header, row key)
+REPORT_XLSX_COLUMNS = {
+    'report_by_order': [
+        ('PoS', 'shop'), ('Order', 'session'), ('Date Order', 'date_order'),
+        ('Customer', 'name'), ('Salesman', 'salesman'), ('Total Qty', 'sum'),
+        ('Amount Total', 'amount_total'), ('Note', 'general_note')],
+    'report_by_order_detail': [
+        ('PoS', 'shop'), ('Order', 'session'), ('Date Order', 'date_order'),
+        ('Customer', 'name'), ('Salesman', 'salesman'),
+        ('Product Code', 'default_code'),
+        ('Product Name', 'full_product_name'), ('Price unit', 'price_unit'),
+        ('Qty', 'sum'), ('Price Subtotal', 'price_subtotal'),
+        ('Price Subtotal Incl', 'price_subtotal_incl')],
+    'report_by_product': [
+        ('Category', 'name'), ('Product Code', 'default_code'),
+        ('Product Name', 'full_product_name'), ('Qty', 'qty'),
+        ('Amount Total', 'amount_total'),
+        ('Amount Total Incl', 'amount_paid')],
+    'report_by_categories': [
+        ('Category', 'name'), ('Qty', 'qty'), ('Amount Total', 'amount_total'),
+        ('Amount Total Incl', 'total_incl')],
+    'report_by_salesman': [
+        ('Salesman', 'name'), ('Total Order', 'order'), ('Total Qty', 'qty'),
+        ('Total Amount', 'amount')],
+    'report_by_payment': [
+        ('Point of Sale', 'config'), ('PoS Session', 'session'),
+        ('Payment', 'name'), ('Total Amount', 'sum')],
+}
+
 
 class PosReportGenerator(models.Model):
     """ Pos_report generating model """
@@ -56,6 +92,25 @@ class PosReportGenerator(models.Model):
         """
         Generate a Point of Sale (POS) report based on the specified option.
         """
+        data = self._get_report_data(option)
+        filters = self.get_filter(option)
+        report_values = self._get_report_values(data)
+        lines = report_values.get('POS')
+        main_line = report_values.get('pos_main')
+        return {
+            'name': "PoS Orders",
+            'type': 'ir.actions.client',
+            'tag': 'pos_r',
+            'orders': data,
+            'filters': filters,
+            'report_lines': lines,
+            'report_main_line': main_line,
+        }
+
+    def _get_report_data(self, option):
+        """
+        Get the report type and the date range of the specified report option.
+        """
         report_values = self.env['pos.report'].search([('id', '=', option)])
         data = {
             'report_type': report_values.report_type,
@@ -69,18 +124,7 @@ class PosReportGenerator(models.Model):
             data.update({
                 'date_to': report_values.date_to,
             })
-        filters = self.get_filter(option)
-        lines = self._get_report_values(data).get('POS')
-        main_line = self._get_report_values(data).get('pos_main')
-        return {
-            'name': "PoS Orders",
-            'type': 'ir.actions.client',
-            'tag': 'pos_r',
-            'orders': data,
-            'filters': filters,
-            'report_lines': lines,
-            'report_main_line': main_line,
-        }
+        return data
 
     def get_filter(self, option):
         """
@@ -135,13 +179,43 @@ class PosReportGenerator(models.Model):
         res = super(PosReportGenerator, self).write(vals)
         return res
 
-    def _get_report_sub_lines(self, data):
+    def _get_report_domain_clause(self, data, date_column, whole_days=False):
         """
-        Get report sublines based on the specified report type, date range,
-        and data.
+        Get the WHERE clause and its parameters filtering the report on the
+        selected dates. With whole_days, the dates are extended to the start
+        of the first day and the end of the last day, otherwise the selected
+        time is kept. The bare column comparison lets PostgreSQL use the
+        index on date_order.
         """
-        report_sub_lines = []
-        if data.get('report_type') == 'report_by_order':
+        conditions = []
+        params = {}
+        if data.get('date_from'):
+            conditions.append(date_column + ' >= %(date_from)s')
+            params['date_from'] = fields.Datetime.to_datetime(
+                data['date_from'])
+            if whole_days:
+                params['date_from'] = params['date_from'].replace(
+                    hour=0, minute=0, second=0)
+        if data.get('date_to'):
+            date_to = fields.Datetime.to_datetime(data['date_to'])
+            if whole_days:
+                conditions.append(date_column + ' < %(date_to)s')
+                date_to = date_to.replace(hour=0, minute=0, second=0) + \
+                    timedelta(days=1)
+            else:
+                conditions.append(date_column + ' <= %(date_to)s')
+            params['date_to'] = date_to
+        where = ('where ' + ' and '.join(conditions) + ' ') if conditions \
+            else ''
+        return where, params
+
+    def _get_report_query(self, data):
+        """
+        Get the parameterized query and its parameters for the specified
+        report type and date range.
+        """
+        report_type = data.get('report_type')
+        if report_type == 'report_by_order':
             query = '''
                     select l.name,l.date_order,l.partner_id,l.amount_total,
                     l.general_note,l.user_id,res_partner.name,l.name as shop,
@@ -156,22 +230,13 @@ class PosReportGenerator(models.Model):
                     left join res_users on l.user_id = res_users.id
                     left join pos_order_line on l.id = pos_order_line.order_id
                              '''
-            term = 'Where '
-            if data.get('date_from'):
-                query += "Where (l.date_order >= '%s') " % data.get(
-                    'date_from').strftime('%Y-%m-%d 00:00:00')
-                term = 'AND '
-            if data.get('date_to'):
-                query += term + "(l.date_order <= '%s') " % data.get(
-                    'date_to').strftime('%Y-%m-%d 11:59:59')
-            query += ("group by l.user_id,res_users.partner_id,"
-                      "res_partner.name,"
-                      "l.partner_id,l.date_order,pos_session.name,l.session_id,"
-                      "l.name,l.amount_total,l.general_note,l.id")
-            self._cr.execute(query)
-            report_by_order = self._cr.dictfetchall()
-            report_sub_lines.append(report_by_order)
-        elif data.get('report_type') == 'report_by_order_detail':
+            date_column = 'l.date_order'
+            group_by = ("group by l.user_id,res_users.partner_id,"
+                        "res_partner.name,"
+                        "l.partner_id,l.date_order,pos_session.name,"
+                        "l.session_id,l.name,l.amount_total,l.general_note,"
+                        "l.id")
+        elif report_type == 'report_by_order_detail':
             query = '''
             select l.name,l.date_order,l.partner_id,l.amount_total,l.general_note,
             l.user_id,res_partner.name,l.name as shop,pos_session.name as 
@@ -187,25 +252,17 @@ class PosReportGenerator(models.Model):
             join pos_order_line on l.id = pos_order_line.order_id left join
             product_product on pos_order_line.product_id = product_product.id
             '''
-            term = 'Where '
-            if data.get('date_from'):
-                query += "Where l.date_order >= '%s' " % data.get(
-                    'date_from').strftime('%Y-%m-%d')
-                term = 'AND '
-            if data.get('date_to'):
-                query += term + "l.date_order <= '%s' " % data.get(
-                    'date_to').strftime('%Y-%m-%d')
-            query += ("group by l.user_id,res_users.partner_id,"
-                      "res_partner.name,l.partner_id,l.date_order,"
-                      "pos_session.name,l.session_id,l.name,l.amount_total,"
-                      "l.general_note,pos_order_line.full_product_name,"
-                      "pos_order_line.price_unit,pos_order_line.price_subtotal,"
-                      "pos_order_line.price_subtotal_incl,"
-                      "pos_order_line.product_id,product_product.default_code")
-            self._cr.execute(query)
-            report_by_order_details = self._cr.dictfetchall()
-            report_sub_lines.append(report_by_order_details)
-        elif data.get('report_type') == 'report_by_product':
+            date_column = 'l.date_order'
+            group_by = ("group by l.user_id,res_users.partner_id,"
+                        "res_partner.name,l.partner_id,l.date_order,"
+                        "pos_session.name,l.session_id,l.name,l.amount_total,"
+                        "l.general_note,pos_order_line.full_product_name,"
+                        "pos_order_line.price_unit,"
+                        "pos_order_line.price_subtotal,"
+                        "pos_order_line.price_subtotal_incl,"
+                        "pos_order_line.product_id,"
+                        "product_product.default_code")
+        elif report_type == 'report_by_product':
             query = '''
             select l.amount_total,l.amount_paid,sum(pos_order_line.qty) as qty,
             pos_order_line.full_product_name, pos_order_line.price_unit,
@@ -217,42 +274,26 @@ class PosReportGenerator(models.Model):
             join product_category on product_category.id =
             product_template.categ_id
             '''
-            term = 'Where '
-            if data.get('date_from'):
-                query += "Where l.date_order >= '%s' " % data.get('date_from')
-                term = 'AND '
-            if data.get('date_to'):
-                query += term + "l.date_order <= '%s' " % data.get('date_to')
-            query += ("group by l.amount_total,l.amount_paid,"
-                      "pos_order_line.full_product_name,"
-                      "pos_order_line.price_unit,pos_order_line.product_id,"
-                      "product_product.default_code,product_template.categ_id,"
-                      "product_category.name")
-            self._cr.execute(query)
-            report_by_product = self._cr.dictfetchall()
-            report_sub_lines.append(report_by_product)
-        elif data.get('report_type') == 'report_by_categories':
+            date_column = 'l.date_order'
+            group_by = ("group by l.amount_total,l.amount_paid,"
+                        "pos_order_line.full_product_name,"
+                        "pos_order_line.price_unit,pos_order_line.product_id,"
+                        "product_product.default_code,"
+                        "product_template.categ_id,product_category.name")
+        elif report_type == 'report_by_categories':
             query = '''
             select product_category.name,sum(l.qty) as qty,sum(l.price_subtotal)
             as amount_total,sum(price_subtotal_incl) as total_incl from
-            pos_order_line as l left join product_template on l.product_id = 
-            product_template.id join product_category on
+            pos_order_line as l left join product_product on l.product_id =
+            product_product.id left join product_template on
+            product_product.product_tmpl_id = product_template.id
+            join product_category on
             product_category.id = product_template.categ_id
             left join pos_order on l.order_id = pos_order.id
             '''
-            term = 'Where '
-            if data.get('date_from'):
-                query += "Where pos_order.date_order >= '%s' " % data.get(
-                    'date_from')
-                term = 'AND '
-            if data.get('date_to'):
-                query += term + "pos_order.date_order <= '%s' " % data.get(
-                    'date_to')
-            query += "group by product_category.name"
-            self._cr.execute(query)
-            report_by_categories = self._cr.dictfetchall()
-            report_sub_lines.append(report_by_categories)
-        elif data.get('report_type') == 'report_by_salesman':
+            date_column = 'pos_order.date_order'
+            group_by = "group by product_category.name"
+        elif report_type == 'report_by_salesman':
             query = '''
            select res_partner.name,sum(pos_order_line.qty) as qty,
            sum(pos_order_line.price_subtotal) as amount,count(l.id) as order
@@ -261,17 +302,9 @@ class PosReportGenerator(models.Model):
            left join res_partner on res_users.partner_id = res_partner.id
            left join pos_order_line on l.id = pos_order_line.order_id
            '''
-            term = 'Where '
-            if data.get('date_from'):
-                query += "Where l.date_order >= '%s' " % data.get('date_from')
-                term = 'AND '
-            if data.get('date_to'):
-                query += term + "l.date_order <= '%s' " % data.get('date_to')
-            query += "group by res_partner.name"
-            self._cr.execute(query)
-            report_by_salesman = self._cr.dictfetchall()
-            report_sub_lines.append(report_by_salesman)
-        elif data.get('report_type') == 'report_by_payment':
+            date_column = 'l.date_order'
+            group_by = "group by res_partner.name"
+        elif report_type == 'report_by_payment':
             query = '''
            select pos_payment_method.name,sum(l.amount_total),pos_session.name
            as session,pos_config.name as config
@@ -282,19 +315,50 @@ class PosReportGenerator(models.Model):
            left join pos_session on l.session_id = pos_session.id
            left join pos_config on pos_session.config_id = pos_config.id
             '''
-            term = 'Where '
-            if data.get('date_from'):
-                query += "Where l.date_order >= '%s' " % data.get('date_from')
-                term = 'AND '
-            if data.get('date_to'):
-                query += term + "l.date_order <= '%s' " % data.get('date_to')
-            query += ("group by pos_payment_method.name,pos_session.name,"
-                      "pos_config.name")
-            self._cr.execute(query)
-            report_by_payment = self._cr.dictfetchall()
-            report_sub_lines.append(report_by_payment)
+            date_column = 'l.date_order'
+            group_by = ("group by pos_payment_method.name,pos_session.name,"
+                        "pos_config.name")
+        else:
+            return None, {}
+        where, params = self._get_report_domain_clause(
+            data, date_column,
+            whole_days=report_type in REPORT_WHOLE_DAY_TYPES)
+        return query + where + group_by, params
+
+    def _get_report_sub_lines(self, data):
+        """
+        Get report sublines based on the specified report type, date range,
+        and data.
+        """
+        report_sub_lines = []
+        query, params = self._get_report_query(data)
+        if query:
+            self._cr.execute(query, params)
+            report_sub_lines.append(self._cr.dictfetchall())
         return report_sub_lines
 
+    def _iter_report_rows(self, data):
+        """
+        Yield the report rows one by one, fetched in chunks through a server
+        side cursor so that big reports are never fully loaded in memory.
+        """
+        query, params = self._get_report_query(data)
+        if not query:
+            return
+        cr = self._cr
+        cr.execute("DECLARE pos_report_cursor NO SCROLL CURSOR FOR " + query,
+                   params)
+        try:
+            while True:
+                cr.execute("FETCH %s FROM pos_report_cursor",
+                           (REPORT_FETCH_SIZE,))
+                rows = cr.dictfetchall()
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cr.execute("CLOSE pos_report_cursor")
+
     def _get_report_total_value(self, data, report):
         """ Get the total value for the specified report type. """
         report_main_lines = []
@@ -346,7 +410,7 @@ class PosReportGenerator(models.Model):
         else:
             report_res = self._get_report_sub_lines(data)
         if data.get('report_type') == 'report_by_order':
-            report_res_total = self._get_report_total_value(data, report)[0]
+            report_res_total = report_res_total[0]
         return {
             'doc_ids': self.ids,
             'docs': docs,
@@ -354,205 +418,55 @@ class PosReportGenerator(models.Model):
             'pos_main': report_res_total,
         }
 
-    def get_pos_xlsx_report(self, data, response, report_data):
+    def get_pos_xlsx_report(self, data, report_data=None):
         """
-        Generate an Excel report based on the provided data and write it to the
-        response.
+        Generate an Excel report based on the provided data and return it as
+        an open temporary file, to be streamed by the response which closes
+        it. When the report option is given, its rows are streamed from the
+        database into a constant memory workbook.
         """
-        report_data_main = json.loads(report_data)
-        output = io.BytesIO()
         filters = json.loads(data)
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        sheet = workbook.add_worksheet()
-        head = workbook.add_format({'align': 'center', 'bold': True,
-                                    'font_size': '20px'})
-        heading = workbook.add_format(
-            {'align': 'center', 'bold': True, 'font_size': '10px',
-             'border': 2,
-             'border_color': 'black'})
-        txt_l = workbook.add_format(
-            {'font_size': '10px', 'border': 1, 'bold': True})
-        sheet.merge_range('A2:H3',
-                          'Point of Sale Report',
-                          head)
-        if filters.get('report_type') == 'report_by_order':
-            sheet.merge_range('B5:D5', 'Report Type: ' +
-                              filters.get('report_type'), txt_l)
-            sheet.write('A7', 'PoS', heading)
-            sheet.write('B7', 'Order', heading)
-            sheet.write('C7', 'Date Order', heading)
-            sheet.write('D7', 'Customer', heading)
-            sheet.write('E7', 'Salesman', heading)
-            sheet.write('F7', 'Total Qty', heading)
-            sheet.write('G7', 'Amount Total', heading)
-            sheet.write('H7', 'Note', heading)
-            lst = []
-            if report_data_main:
-                for rec in report_data_main[0]:
-                    lst.append(rec)
-            row = 6
-            col = 0
-            sheet.set_column(3, 0, 15)
-            sheet.set_column(4, 1, 15)
-            sheet.set_column(5, 2, 15)
-            sheet.set_column(6, 3, 15)
-            sheet.set_column(7, 4, 15)
-            sheet.set_column(8, 5, 15)
-            sheet.set_column(9, 6, 15)
-            for rec_data in report_data_main:
-                row += 1
-                sheet.write(row, col, rec_data['shop'], txt_l)
-                sheet.write(row, col + 1, rec_data['session'], txt_l)
-                sheet.write(row, col + 2, rec_data['date_order'], txt_l)
-                sheet.write(row, col + 3, rec_data['name'], txt_l)
-                sheet.write(row, col + 4, rec_data['salesman'], txt_l)
-                sheet.write(row, col + 5, rec_data['sum'], txt_l)
-                sheet.write(row, col + 6, rec_data['amount_total'], txt_l)
-                sheet.write(row, col + 7, rec_data['general_note'], txt_l)
-        if filters.get('report_type') == 'report_by_order_detail':
-            sheet.merge_range('B5:D5', 'Report Type: ' +
-                              filters.get('report_type'), txt_l)
-            sheet.write('A7', 'PoS', heading)
-            sheet.write('B7', 'Order', heading)
-            sheet.write('C7', 'Date Order', heading)
-            sheet.write('D7', 'Customer', heading)
-            sheet.write('E7', 'Salesman', heading)
-            sheet.write('F7', 'Product Code', heading)
-            sheet.write('G7', 'Product Name', heading)
-            sheet.write('H7', 'Price unit', heading)
-            sheet.write('I7', 'Qty', heading)
-            sheet.write('J7', 'Price Subtotal', heading)
-            sheet.write('K7', 'Price Subtotal Incl', heading)
-            lst = []
-            if report_data_main:
-                for rec in report_data_main[0]:
-                    lst.append(rec)
-            row = 6
-            col = 0
-            sheet.set_column(3, 0, 15)
-            sheet.set_column(4, 1, 15)
-            sheet.set_column(5, 2, 15)
-            sheet.set_column(6, 3, 15)
-            sheet.set_column(7, 4, 15)
-            sheet.set_column(8, 5, 15)
-            sheet.set_column(9, 6, 15)
-            sheet.set_column(10, 7, 15)
-            sheet.set_column(11, 8, 15)
-            sheet.set_column(12, 9, 15)
-            for rec_data in report_data_main:
-                row += 1
-                sheet.write(row, col, rec_data['shop'], txt_l)
-                sheet.write(row, col + 1, rec_data['session'], txt_l)
-                sheet.write(row, col + 2, rec_data['date_order'], txt_l)
-                sheet.write(row, col + 3, rec_data['name'], txt_l)
-                sheet.write(row, col + 4, rec_data['salesman'], txt_l)
-                sheet.write(row, col + 5, rec_data['default_code'], txt_l)
-                sheet.write(row, col + 6, rec_data['full_product_name'], txt_l)
-                sheet.write(row, col + 7, rec_data['price_unit'], txt_l)
-                sheet.write(row, col + 8, rec_data['sum'], txt_l)
-                sheet.write(row, col + 9, rec_data['price_subtotal'], txt_l)
-                sheet.write(row, col + 10, rec_data['price_subtotal_incl'],
-                            txt_l)
-        if filters.get('report_type') == 'report_by_product':
-            sheet.merge_range('B5:D5', 'Report Type: ' +
-                              filters.get('report_type'), txt_l)
-            sheet.write('A7', 'Category', heading)
-            sheet.write('B7', 'Product Code', heading)
-            sheet.write('C7', 'Product Name', heading)
-            sheet.write('D7', 'Qty', heading)
-            sheet.write('E7', 'Amount Total', heading)
-            sheet.write('F7', 'Amount Total Incl', heading)
-            lst = []
-            if report_data_main:
-                for rec in report_data_main[0]:
-                    lst.append(rec)
-            row = 6
-            col = 0
-            sheet.set_column(3, 0, 15)
-            sheet.set_column(4, 1, 15)
-            sheet.set_column(5, 2, 15)
-            sheet.set_column(6, 3, 15)
-            sheet.set_column(7, 4, 15)
-            sheet.set_column(8, 5, 15)
-            for rec_data in report_data_main:
-                row += 1
-                sheet.write(row, col, rec_data['name'], txt_l)
-                sheet.write(row, col + 1, rec_data['default_code'], txt_l)
-                sheet.write(row, col + 2, rec_data['full_product_name'], txt_l)
-                sheet.write(row, col + 3, rec_data['qty'], txt_l)
-                sheet.write(row, col + 4, rec_data['amount_total'], txt_l)
-                sheet.write(row, col + 5, rec_data['amount_paid'], txt_l)
-        if filters.get('report_type') == 'report_by_categories':
-            sheet.merge_range('B5:D5', 'Report Type: ' +
-                              filters.get('report_type'), txt_l)
-            sheet.write('A7', 'Category', heading)
-            sheet.write('B7', 'Qty', heading)
-            sheet.write('C7', 'Amount Total', heading)
-            sheet.write('D7', 'Amount Total Incl', heading)
-            lst = []
-            if report_data_main:
-                for rec in report_data_main[0]:
-                    lst.append(rec)
-            row = 6
-            col = 0
-            sheet.set_column(3, 0, 15)
-            sheet.set_column(4, 1, 15)
-            sheet.set_column(5, 2, 15)
-            sheet.set_column(6, 3, 15)
-            for rec_data in report_data_main:
-                row += 1
-                sheet.write(row, col, rec_data['name'], txt_l)
-                sheet.write(row, col + 1, rec_data['qty'], txt_l)
-                sheet.write(row, col + 2, rec_data['amount_total'], txt_l)
-                sheet.write(row, col + 3, rec_data['total_incl'], txt_l)
-        if filters.get('report_type') == 'report_by_salesman':
-            sheet.merge_range('B5:D5', 'Report Type: ' +
-                              filters.get('report_type'), txt_l)
-            sheet.write('A7', 'Salesman', heading)
-            sheet.write('B7', 'Total Order', heading)
-            sheet.write('C7', 'Total Qty', heading)
-            sheet.write('D7', 'Total Amount', heading)
-            lst = []
-            if report_data_main:
-                for rec in report_data_main[0]:
-                    lst.append(rec)
-            row = 6
-            col = 0
-            sheet.set_column(3, 0, 15)
-            sheet.set_column(4, 1, 15)
-            sheet.set_column(5, 2, 15)
-            sheet.set_column(6, 3, 15)
-            for rec_data in report_data_main:
-                row += 1
-                sheet.write(row, col, rec_data['name'], txt_l)
-                sheet.write(row, col + 1, rec_data['order'], txt_l)
-                sheet.write(row, col + 2, rec_data['qty'], txt_l)
-                sheet.write(row, col + 3, rec_data['amount'], txt_l)
-        if filters.get('report_type') == 'report_by_payment':
-            sheet.merge_range('B5:D5', 'Report Type: ' +
-                              filters.get('report_type'), txt_l)
-            sheet.write('A7', 'Point of Sale', heading)
-            sheet.write('B7', 'PoS Session', heading)
-            sheet.write('C7', 'Payment', heading)
-            sheet.write('D7', 'Total Amount', heading)
-            lst = []
-            if report_data_main:
-                for rec in report_data_main[0]:
-                    lst.append(rec)
-            row = 6
-            col = 0
-            sheet.set_column(3, 0, 15)
-            sheet.set_column(4, 1, 15)
-            sheet.set_column(5, 2, 15)
-            sheet.set_column(6, 3, 15)
-            for rec_data in report_data_main:
-                name = list(rec_data['name'].values())[0]
-                row += 1
-                sheet.write(row, col, rec_data['config'], txt_l)
-                sheet.write(row, col + 1, rec_data['session'], txt_l)
-                sheet.write(row, col + 2, name, txt_l)
-                sheet.write(row, col + 3, rec_data['sum'], txt_l)
-        workbook.close()
-        output.seek(0)
-        response.stream.write(output.read())
-        output.close()
+        if filters.get('report_id'):
+            report_data_main = self._get_report_data(filters['report_id'])
+            filters['report_type'] = report_data_main['report_type']
+            rows = self._iter_report_rows(report_data_main)
+        else:
+            rows = json.loads(report_data) if report_data else []
+        output = tempfile.TemporaryFile()
+        try:
+            workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+            sheet = workbook.add_worksheet()
+            head = workbook.add_format({'align': 'center', 'bold': True,
+                                        'font_size': '20px'})
+            heading = workbook.add_format(
+                {'align': 'center', 'bold': True, 'font_size': '10px',
+                 'border': 2,
+                 'border_color': 'black'})
+            txt_l = workbook.add_format(
+                {'font_size': '10px', 'border': 1, 'bold': True})
+            sheet.merge_range('A2:H3',
+                              'Point of Sale Report',
+                              head)
+            columns = REPORT_XLSX_COLUMNS.get(filters.get('report_type'))
+            if columns:
+                sheet.merge_range('B5:D5', 'Report Type: ' +
+                                  filters.get('report_type'), txt_l)
+                sheet.set_column(0, len(columns) - 1, 15)
+                for col, (header, key) in enumerate(columns):
+                    sheet.write(6, col, header, heading)
+                row = 6
+                for rec_data in rows:
+                    row += 1
+                    for col, (header, key) in enumerate(columns):
+                        value = rec_data[key]
+                        if isinstance(value, dict):
+                            value = list(value.values())[0]
+                        elif isinstance(value, datetime):
+                            value = fields.Datetime.to_string(value)
+                        sheet.write(row, col, value, txt_l)
+            workbook.close()
+            output.seek(0)
+        except Exception:
+            output.close()
+            raise
+        return output
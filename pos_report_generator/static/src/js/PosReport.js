@@ -71,19 +71,15 @@ export class PosReport extends Component {
     // Function to print the xlsx report
 	print_xlsx() {
         var self = this;
-        this.orm.call('pos.report', 'pos_report', [self.wizard_id]).then((data) => {
-            var action = {
-                'data': {
-                    'model': 'pos.report',
-                    'options': JSON.stringify(data['orders']),
-                    'output_format': 'xlsx',
-                    'report_data': JSON.stringify(data['report_lines']),
-                    'report_name': 'PoS Report',
-                    'dfr_data': JSON.stringify(data),
-                },
-            };
-            self.downloadXlsx(action);
-        })
+        var action = {
+            'data': {
+                'model': 'pos.report',
+                'options': JSON.stringify({'report_id': self.wizard_id}),
+                'output_format': 'xlsx',
+                'report_name': 'PoS Report',
+            },
+        };
+        self.downloadXlsx(action);
 	}
     // Xlsx download function
 	downloadXlsx (action) {
@@ -19,14 +19,21 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+import base64
 import json
 import logging
-from odoo import http
+import re
+from odoo import api, http
 from odoo.http import request
+from odoo.osv import expression
 from datetime import datetime, date
 
 _logger = logging.getLogger(__name__)
 
+# Number of records read from the database per chunk of a streamed response
+STREAM_BATCH_SIZE = 500
+ORDER_TERM_RE = re.compile(r'^\s*([a-z0-9_]+)(\s+(asc|desc))?\s*$', re.I)
+
 
 class RestApi(http.Controller):
     """This is a controller which is used to generate responses based on the
@@ -67,12 +74,13 @@ class RestApi(http.Controller):
                 'message': 'No API Key Provided'
             }
         
-        user_id = request.env['res.users'].sudo().search([('api_key', '=', api_key)], limit=1)
+        user_id = request.env['res.users'].sudo()._get_user_id_by_api_key(
+            api_key)
         
         if user_id:
             return {
                 'success': True,
-                'user_id': user_id.id
+                'user_id': user_id
             }
         else:
             return {
@@ -100,26 +108,372 @@ class RestApi(http.Controller):
             record[key] = self._serialize_value(value)
         return record
 
-    def generate_response(self, method, model, rec_id):
+    def _encode_cursor(self, **payload):
+        """Build the opaque cursor pointing after the last returned record,
+        either by record id or by position for custom sort orders"""
+        payload = json.dumps(payload).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    def _decode_cursor(self, cursor):
+        """Return a tuple (last_id, offset) encoded in a cursor, raise
+        ValueError if the cursor is malformed"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            last_id = int(payload.get('last_id', 0))
+            offset = int(payload.get('offset', 0))
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if last_id < 0 or offset < 0:
+            raise ValueError("Invalid cursor")
+        return last_id, offset
+
+    def _get_param(self, data, params, key):
+        """Return a parameter from the JSON body, or from the query string"""
+        value = data.get(key) if data else None
+        return value if value is not None else params.get(key)
+
+    def _get_paging_params(self, data, params):
+        """Read limit, offset and cursor from the JSON body or the query
+        string. Return a tuple (limit, offset, last_id)"""
+        try:
+            limit = self._get_param(data, params, 'limit')
+            limit = int(limit) if limit not in (None, '') else None
+            offset = int(self._get_param(data, params, 'offset') or 0)
+        except (TypeError, ValueError):
+            raise ValueError("'limit' and 'offset' must be integers")
+        if (limit is not None and limit <= 0) or offset < 0:
+            raise ValueError("'limit' must be positive and 'offset' must not "
+                             "be negative")
+        cursor = self._get_param(data, params, 'cursor')
+        last_id, cursor_offset = self._decode_cursor(cursor) if cursor else (
+            0, 0)
+        return limit, offset + cursor_offset, last_id
+
+    def _check_field_path(self, model, path):
+        """Validate a dotted field path such as 'partner_id.name'. Every
+        model traversed by the path must itself be exposed for GET
+        requests, so that relations cannot be used to read data of models
+        which are not published through the API."""
+        names = path.split('.')
+        for index, name in enumerate(names):
+            field = model._fields.get(name)
+            if not field:
+                raise ValueError(
+                    "Invalid field '%s' in '%s'" % (name, path))
+            if index == len(names) - 1:
+                break
+            if not field.relational:
+                raise ValueError(
+                    "Field '%s' in '%s' is not relational" % (name, path))
+            model = model.env[field.comodel_name]
+            model_id = model.env['ir.model'].sudo()._get_id(model._name)
+            option = model.env['connection.api']._get_api_permissions(
+                model_id)
+            if not option or not option['is_get']:
+                raise ValueError(
+                    "Model '%s' is not accessible through '%s'" % (
+                        model._name, path))
+
+    def _get_domain_param(self, model, data, params):
+        """Parse and validate the 'domain' parameter, given either as a JSON
+        list in the body or as a JSON string in the query string"""
+        domain = self._get_param(data, params, 'domain')
+        if not domain:
+            return []
+        if isinstance(domain, str):
+            try:
+                domain = json.loads(domain)
+            except json.JSONDecodeError:
+                raise ValueError("Invalid JSON in 'domain'")
+        if not isinstance(domain, list):
+            raise ValueError("'domain' must be a list")
+        result = []
+        for term in domain:
+            if term in expression.DOMAIN_OPERATORS:
+                result.append(term)
+                continue
+            if (not isinstance(term, (list, tuple)) or len(term) != 3
+                    or not isinstance(term[0], str)
+                    or term[1] not in expression.TERM_OPERATORS
+                    or term[1] in ('any', 'not any')):
+                raise ValueError("Invalid domain term %s" % json.dumps(term))
+            self._check_field_path(model, term[0])
+            result.append(tuple(term))
+        try:
+            return expression.normalize_domain(result)
+        except Exception:
+            raise ValueError("Invalid domain")
+
+    def _get_order_param(self, model, data, params):
+        """Parse and validate the 'order' parameter, a comma separated list
+        of stored fields optionally followed by 'asc' or 'desc'"""
+        order = self._get_param(data, params, 'order')
+        if not order:
+            return None
+        if not isinstance(order, str):
+            raise ValueError("'order' must be a string")
+        terms = []
+        for term in order.split(','):
+            match = ORDER_TERM_RE.match(term)
+            if not match:
+                raise ValueError("Invalid order '%s'" % term.strip())
+            field = model._fields.get(match.group(1))
+            if not field or not field.store:
+                raise ValueError(
+                    "Cannot order by '%s'" % match.group(1))
+            terms.append(term.strip())
+        if terms == ['id'] or terms == ['id asc']:
+            return None
+        # Tie-break on id so that successive pages never overlap
+        return ', '.join(terms + ['id'])
+
+    def _read_field_paths(self, records, paths):
+        """Resolve dotted field paths on a batch of records. Each relation is
+        fetched once for the whole batch, then the sub fields are read with
+        a single query per related model. Return a dict mapping each record
+        id to the resolved {path: value}"""
+        result = {record.id: {} for record in records}
+        tree = {}
+        for path in paths:
+            head, _dummy, tail = path.partition('.')
+            tree.setdefault(head, []).append(tail)
+        for head, tails in tree.items():
+            field = records._fields[head]
+            related = records.mapped(head)
+            simple = [tail for tail in tails if '.' not in tail]
+            values = {
+                vals['id']: vals for vals in related.read(simple)
+            } if simple else {}
+            nested = self._read_field_paths(
+                related, [tail for tail in tails if '.' in tail])
+            for record in records:
+                targets = record[head]
+                for tail in tails:
+                    items = [
+                        self._serialize_value(
+                            values[target.id][tail] if tail in simple
+                            else nested[target.id][tail])
+                        for target in targets
+                    ]
+                    if field.type == 'many2one':
+                        items = items[0] if items else False
+                    result[record.id]['%s.%s' % (head, tail)] = items
+        return result
+
+    def _stream_records(self, model_name, domain, fields, limit, offset,
+                        last_id, order=None):
+        """Generate the JSON body of a GET response chunk by chunk.
+        Records are fetched in batches of STREAM_BATCH_SIZE on a dedicated
+        cursor, by keyset (id > last id) or by position when a custom order
+        is requested, so that neither the result set nor the serialized
+        body is ever held in memory at once.
+        The first batch is fetched before the response starts, so that an
+        error still gets a 500 response. An error on a later batch ends the
+        body with an "error" member instead of truncating it."""
+        plain_fields = [name for name in fields if '.' not in name] or ['id']
+        paths = [name for name in fields if '.' in name]
+        cr = request.env.registry.cursor()
+        env = api.Environment(cr, request.env.uid, dict(request.env.context))
+        model = env[model_name].sudo()
+        state = {'count': 0, 'current_id': last_id, 'done': limit == 0}
+
+        def fetch_batch():
+            """Return the serialized records of the next batch"""
+            count = state['count']
+            batch_size = STREAM_BATCH_SIZE
+            if limit is not None:
+                batch_size = min(batch_size, limit - count)
+            if order:
+                records = model.search(
+                    domain, offset=offset + count, limit=batch_size,
+                    order=order)
+            else:
+                records = model.search(
+                    domain + [('id', '>', state['current_id'])],
+                    offset=offset if not count else 0,
+                    limit=batch_size, order='id')
+            chunks = []
+            if records:
+                state['current_id'] = records[-1].id
+                path_values = self._read_field_paths(records, paths)
+                for record in records.read(plain_fields):
+                    self._serialize_record(record)
+                    record.update(path_values[record['id']])
+                    chunks.append((',' if count else '') + json.dumps(
+                        record, ensure_ascii=False, default=str))
+                    count += 1
+                env.invalidate_all()
+            state['count'] = count
+            state['done'] = len(records) < batch_size or (
+                limit is not None and count >= limit)
+            return chunks
+
+        def get_next_cursor():
+            count = state['count']
+            if limit is None or count != limit:
+                return None
+            if order:
+                if model.search(domain, offset=offset + count, limit=1,
+                                order=order):
+                    return self._encode_cursor(offset=offset + count)
+            elif model.search(domain + [('id', '>', state['current_id'])],
+                              limit=1):
+                return self._encode_cursor(last_id=state['current_id'])
+            return None
+
+        try:
+            first_chunks = [] if state['done'] else fetch_batch()
+        except Exception:
+            cr.close()
+            raise
+
+        def generate():
+            yield '{"status": "success", "records": ['
+            yield from first_chunks
+            try:
+                while not state['done']:
+                    yield from fetch_batch()
+                next_cursor = get_next_cursor()
+            except Exception as e:
+                _logger.error("Error while streaming records: %s", e,
+                              exc_info=True)
+                yield '], "count": %s, "error": %s}' % (
+                    state['count'], json.dumps(
+                        "Internal server error: %s" % e, default=str))
+                return
+            yield '], "count": %s, "next_cursor": %s}' % (
+                state['count'], json.dumps(next_cursor))
+
+        response = request.make_response(generate(),
+                                         headers=self._cors_headers())
+        response.call_on_close(cr.close)
+        return response
+
+    def _parse_ids(self, ids):
+        """Validate a list of record ids sent by the client"""
+        if not isinstance(ids, list) or not ids:
+            raise ValueError("'ids' must be a non empty list")
+        try:
+            return [int(rec_id) for rec_id in ids]
+        except (TypeError, ValueError):
+            raise ValueError("'ids' must only contain integers")
+
+    def _read_records(self, records, fields):
+        """Read the given records with a single query and return a dict
+        mapping each record id to its serialized values"""
+        return {
+            values['id']: self._serialize_record(values)
+            for values in records.read(fields)
+        }
+
+    def _batch_create(self, model, values, fields):
+        """Create all records of the batch with a single create call, applied
+        as a whole or not at all"""
+        if not values or not all(isinstance(vals, dict) for vals in values):
+            raise ValueError("'values' must be a list of objects")
+        # All or nothing, see _batch_write
+        with request.env.cr.savepoint():
+            new_records = model.create(values)
+        read_map = self._read_records(new_records, fields)
+        return [{
+            'index': index,
+            'id': record.id,
+            'status': 'created',
+            'record': read_map.get(record.id, {}),
+        } for index, record in enumerate(new_records)]
+
+    def _batch_write(self, model, data, fields):
+        """Update a batch of records. The batch is either a list of ids
+        sharing the same values, or a list of values each carrying the id
+        of the record to update. Records receiving identical values are
+        updated together with a single write call, and the batch is applied
+        as a whole or not at all."""
+        values = data.get('values')
+        if isinstance(values, dict):
+            items = [(rec_id, values)
+                     for rec_id in self._parse_ids(data.get('ids'))]
+        elif isinstance(values, list) and values:
+            items = []
+            for vals in values:
+                if not isinstance(vals, dict) or 'id' not in vals:
+                    raise ValueError(
+                        "Each item of 'values' must be an object with an 'id'")
+                vals = dict(vals)
+                items.append((self._parse_ids([vals.pop('id')])[0], vals))
+        else:
+            raise ValueError("Missing 'values' in request data")
+
+        existing = model.browse([rec_id for rec_id, _ in items]).exists()
+        existing_ids = set(existing.ids)
+        groups = {}
+        for rec_id, vals in items:
+            if rec_id in existing_ids:
+                key = json.dumps(vals, sort_keys=True, default=str)
+                groups.setdefault(key, (vals, []))[1].append(rec_id)
+        # All or nothing: a failing group rolls back the groups written
+        # before it, as the error response does not abort the transaction
+        with request.env.cr.savepoint():
+            for vals, group_ids in groups.values():
+                model.browse(group_ids).write(vals)
+
+        read_map = self._read_records(existing, fields)
+        return [{
+            'id': rec_id,
+            'status': 'updated',
+            'record': read_map.get(rec_id, {}),
+        } if rec_id in existing_ids else {
+            'id': rec_id,
+            'status': 'not_found',
+        } for rec_id, _ in items]
+
+    def _batch_unlink(self, model, ids):
+        """Delete a batch of records with a single unlink call, applied as a
+        whole or not at all"""
+        ids = self._parse_ids(ids)
+        existing = model.browse(ids).exists()
+        names = {record.id: record.display_name for record in existing}
+        # All or nothing, see _batch_write
+        with request.env.cr.savepoint():
+            existing.unlink()
+        return [{
+            'id': rec_id,
+            'status': 'deleted',
+            'display_name': names[rec_id],
+        } if rec_id in names else {
+            'id': rec_id,
+            'status': 'not_found',
+        } for rec_id in ids]
+
+    def _make_batch_response(self, message, results, status=200):
+        """Create the response of a batch request"""
+        return self._make_json_response({
+            'status': 'success',
+            'message': message,
+            'count': len(results),
+            'results': results
+        }, status=status)
+
+    def generate_response(self, method, model, rec_id, params=None):
         """This function is used to generate the response based on the type
         of request and the parameters given"""
+        params = params or {}
         try:
-            option = request.env['connection.api'].search(
-                [('model_id', '=', model)], limit=1)
+            option = request.env['connection.api']._get_api_permissions(model)
             
             if not option:
                 return self._make_error_response("No API configuration found for this model", 404)
             
-            model_name = option.model_id.model
+            model_name = option['model']
             
             # Parse request data
             data = {}
-            if method != 'DELETE':
-                try:
-                    if request.httprequest.data:
-                        data = json.loads(request.httprequest.data)
-                except json.JSONDecodeError:
-                    return self._make_error_response("Invalid JSON Data", 400)
+            try:
+                if request.httprequest.data:
+                    data = json.loads(request.httprequest.data)
+            except json.JSONDecodeError:
+                return self._make_error_response("Invalid JSON Data", 400)
+            if not isinstance(data, dict):
+                return self._make_error_response("Invalid JSON Data", 400)
             
             fields = data.get('fields', []) if data else []
             
@@ -128,33 +482,44 @@ class RestApi(http.Controller):
             
             # GET Method
             if method == 'GET':
-                if not option.is_get:
+                if not option['is_get']:
                     return self._make_error_response("GET method not allowed", 405)
                 
+                model = request.env[model_name].sudo()
                 domain = [('id', '=', rec_id)] if rec_id != 0 else []
-                records = request.env[model_name].sudo().search_read(
-                    domain=domain,
-                    fields=fields
-                )
-                
-                # Serialize records
-                for record in records:
-                    self._serialize_record(record)
-                
-                return self._make_json_response({
-                    'status': 'success',
-                    'count': len(records),
-                    'records': records
-                })
+                try:
+                    limit, offset, last_id = self._get_paging_params(
+                        data, params)
+                    domain = expression.AND([
+                        domain, self._get_domain_param(model, data, params)])
+                    order = self._get_order_param(model, data, params)
+                    for field_name in fields:
+                        self._check_field_path(model, field_name)
+                except ValueError as e:
+                    return self._make_error_response(str(e), 400)
+
+                return self._stream_records(
+                    model_name, domain, fields, limit, offset, last_id,
+                    order=order)
             
             # POST Method
             elif method == 'POST':
-                if not option.is_post:
+                if not option['is_post']:
                     return self._make_error_response("POST method not allowed", 405)
                 
                 if 'values' not in data:
                     return self._make_error_response("Missing 'values' in request data", 400)
                 
+                if isinstance(data['values'], list):
+                    try:
+                        results = self._batch_create(
+                            request.env[model_name].sudo(), data['values'],
+                            fields)
+                    except ValueError as e:
+                        return self._make_error_response(str(e), 400)
+                    return self._make_batch_response(
+                        'Resources created successfully', results, 201)
+                
                 new_resource = request.env[model_name].sudo().create(data['values'])
                 
                 records = request.env[model_name].sudo().search_read(
@@ -173,9 +538,19 @@ class RestApi(http.Controller):
             
             # PUT Method
             elif method == 'PUT':
-                if not option.is_put:
+                if not option['is_put']:
                     return self._make_error_response("PUT method not allowed", 405)
                 
+                if rec_id == 0 and (isinstance(data.get('values'), list)
+                                    or 'ids' in data):
+                    try:
+                        results = self._batch_write(
+                            request.env[model_name].sudo(), data, fields)
+                    except ValueError as e:
+                        return self._make_error_response(str(e), 400)
+                    return self._make_batch_response(
+                        'Resources updated successfully', results)
+                
                 if rec_id == 0:
                     return self._make_error_response("No ID provided", 400)
                 
@@ -205,9 +580,18 @@ class RestApi(http.Controller):
             
             # DELETE Method
             elif method == 'DELETE':
-                if not option.is_delete:
+                if not option['is_delete']:
                     return self._make_error_response("DELETE method not allowed", 405)
                 
+                if rec_id == 0 and 'ids' in data:
+                    try:
+                        results = self._batch_unlink(
+                            request.env[model_name].sudo(), data['ids'])
+                    except ValueError as e:
+                        return self._make_error_response(str(e), 400)
+                    return self._make_batch_response(
+                        'Resources deleted successfully', results)
+                
                 if rec_id == 0:
                     return self._make_error_response("No ID provided", 400)
                 
@@ -268,7 +652,7 @@ class RestApi(http.Controller):
                 request.session.authenticate(request.session.db, credential)
             
             # Check if model exists
-            model_id = request.env['ir.model'].sudo().search([('model', '=', model)], limit=1)
+            model_id = request.env['ir.model'].sudo()._get_id(model)
             
             if not model_id:
                 return self._make_error_response(
@@ -286,7 +670,8 @@ class RestApi(http.Controller):
             rec_id = int(kw.get('Id', 0))
             
             # Generate response
-            result = self.generate_response(http_method, model_id.id, rec_id)
+            result = self.generate_response(http_method, model_id, rec_id,
+                                            params=kw)
             return result
             
         except Exception as e:
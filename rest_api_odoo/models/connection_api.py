@@ -19,7 +19,7 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class ConnectionApi(models.Model):
@@ -45,3 +45,39 @@ class ConnectionApi(models.Model):
     is_delete = fields.Boolean(string='DELETE',
                                help="Select this to enable DELETE method "
                                     "while sending requests.")
+
+    @api.model
+    @tools.ormcache('model_id')
+    def _get_api_permissions(self, model_id):
+        """Return the allowed methods configured for the given ir.model id,
+        or None if the model is not exposed. The result is cached until a
+        configuration is created, changed or deleted."""
+        option = self.sudo().search([('model_id', '=', model_id)], limit=1)
+        if not option:
+            return None
+        return {
+            'model': option.model_id.model,
+            'is_get': option.is_get,
+            'is_post': option.is_post,
+            'is_put': option.is_put,
+            'is_delete': option.is_delete,
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Clear the permissions cache when a configuration is created"""
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        """Clear the permissions cache when a configuration changes"""
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        """Clear the permissions cache when a configuration is deleted"""
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
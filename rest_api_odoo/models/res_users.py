@@ -20,14 +20,14 @@
 #
 #############################################################################
 import uuid
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class ResUsers(models.Model):
     """This class is used to inherit users and add api key generation"""
     _inherit = 'res.users'
 
-    api_key = fields.Char(string="API Key", readonly=True,
+    api_key = fields.Char(string="API Key", readonly=True, index=True,
                           help="Api key for connecting with the "
                                "Database.The key will be "
                                "generated when authenticating "
@@ -42,3 +42,24 @@ class ResUsers(models.Model):
         else:
             key = users.api_key
         return key
+
+    @api.model
+    @tools.ormcache('api_key')
+    def _get_user_id_by_api_key(self, api_key):
+        """Return the id of the active user owning the given api-key, the
+        result is cached until a user api-key or status changes"""
+        user = self.sudo().search([('api_key', '=', api_key)], limit=1)
+        return user.id
+
+    def write(self, vals):
+        """Clear the api-key cache when a key or the user status changes"""
+        res = super().write(vals)
+        if {'api_key', 'active'} & set(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        """Clear the api-key cache when users are deleted"""
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -1,28 +1,45 @@
 # Copyright 2016 ABF OSIELL <https://osiell.com>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 import logging
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
 
 from odoo import api, fields, models
+from odoo.tools import SQL, str2bool
 
 _logger = logging.getLogger(__name__)
 
+# Tables stored as monthly partitions (on `create_date`) when the
+# `auditlog.partitioned_storage` system parameter is enabled
+PARTITIONED_TABLES = ("auditlog_log", "auditlog_log_line")
+PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+# Number of months for which partitions are created in advance
+PARTITIONS_AHEAD = 2
+
 
 class AuditlogAutovacuum(models.TransientModel):
     _name = "auditlog.autovacuum"
     _description = "Auditlog - Delete old logs"
 
     @api.model
-    def autovacuum(self, days, chunk_size=None):
+    def autovacuum(self, days, chunk_size=None, detach_partitions=False):
         """Delete all logs older than ``days``. This includes:
             - CRUD logs (create, read, write, unlink)
             - HTTP requests
             - HTTP user sessions
 
+        With the partitioned storage, the monthly partitions of logs older
+        than ``days`` are dropped (or only detached if ``detach_partitions``
+        is set, to archive them) before deleting the remaining records.
+
         Called from a cron.
         """
         days = (days > 0) and int(days) or 0
         deadline = datetime.now() - timedelta(days=days)
+        if self._is_partitioned("auditlog_log"):
+            self._drop_partitions(deadline, detach=detach_partitions)
         data_models = ("auditlog.log", "auditlog.http.request", "auditlog.http.session")
         for data_model in data_models:
             records = self.env[data_model].search(
@@ -34,3 +51,256 @@ class AuditlogAutovacuum(models.TransientModel):
             records.unlink()
             _logger.info("AUTOVACUUM - %s '%s' records deleted", nb_records, data_model)
         return True
+
+    @api.model
+    def manage_partitions(self):
+        """Create the partitions of the coming months in advance.
+
+        Called from a cron.
+        """
+        for table in PARTITIONED_TABLES:
+            if self._is_partitioned(table):
+                self._create_partitions(table, fields.Date.today())
+        return True
+
+    @api.model
+    def _partitioned_storage_enabled(self):
+        return str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("auditlog.partitioned_storage", "False")
+        )
+
+    @api.model
+    def _is_partitioned(self, table):
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_class WHERE relname = %s AND relkind = 'p'", [table]
+        )
+        return bool(self.env.cr.rowcount)
+
+    @api.model
+    def _partition_tables(self):
+        """Convert the log tables to partitioned tables, if not done yet."""
+        converted = False
+        for table in PARTITIONED_TABLES:
+            if self._is_partitioned(table):
+                self._create_partitions(table, fields.Date.today())
+            else:
+                self._convert_to_partitioned(table)
+                converted = True
+        if converted:
+            # The registry caches which tables are ordinary ones and the
+            # foreign keys to check; the ORM does not manage the foreign keys
+            # of partitioned tables, they are recreated on conversion
+            self.pool._ordinary_tables = None
+            for key in list(self.pool._foreign_keys):
+                if key[0] in PARTITIONED_TABLES:
+                    del self.pool._foreign_keys[key]
+            # Let the ORM create the indexes of the fields again
+            self.env["auditlog.log"]._auto_init()
+            self.env["auditlog.log.line"]._auto_init()
+
+    @api.model
+    def _convert_to_partitioned(self, table):
+        """Move the rows of ``table`` to a new table partitioned by month."""
+        cr = self.env.cr
+        old_table = f"{table}_unpartitioned"
+        _logger.info("Converting table '%s' to a partitioned table", table)
+        cr.execute(
+            SQL(
+                "ALTER TABLE %s RENAME TO %s",
+                SQL.identifier(table),
+                SQL.identifier(old_table),
+            )
+        )
+        cr.execute(
+            SQL(
+                """
+                UPDATE %s
+                SET create_date = COALESCE(write_date, now() AT TIME ZONE 'UTC')
+                WHERE create_date IS NULL
+                """,
+                SQL.identifier(old_table),
+            )
+        )
+        cr.execute(
+            SQL(
+                """
+                CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS)
+                PARTITION BY RANGE (create_date)
+                """,
+                SQL.identifier(table),
+                SQL.identifier(old_table),
+            )
+        )
+        cr.execute(
+            SQL(
+                "ALTER TABLE %s ALTER COLUMN create_date SET NOT NULL",
+                SQL.identifier(table),
+            )
+        )
+        cr.execute(
+            SQL("SELECT min(create_date) FROM %s", SQL.identifier(old_table))
+        )
+        first_date = cr.fetchone()[0]
+        self._create_partitions(
+            table, first_date.date() if first_date else fields.Date.today()
+        )
+        # LIKE does not copy the foreign keys; those to the log tables can't
+        # be kept, as their primary key now includes the partition key
+        cr.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE contype = 'f'
+              AND conrelid = %s::regclass
+              AND confrelid::regclass::text NOT IN %s
+            """,
+            [
+                old_table,
+                PARTITIONED_TABLES
+                + tuple(f"{name}_unpartitioned" for name in PARTITIONED_TABLES),
+            ],
+        )
+        foreign_keys = cr.fetchall()
+        cr.execute(
+            SQL(
+                "INSERT INTO %s SELECT * FROM %s",
+                SQL.identifier(table),
+                SQL.identifier(old_table),
+            )
+        )
+        # Keep the id sequence, which would be dropped with the old table
+        cr.execute("SELECT pg_get_serial_sequence(%s, 'id')", [old_table])
+        sequence = cr.fetchone()[0]
+        if sequence:
+            cr.execute(
+                SQL(
+                    "ALTER SEQUENCE %s OWNED BY %s",
+                    SQL(sequence),
+                    SQL.identifier(table, "id"),
+                )
+            )
+        # CASCADE drops the foreign key of the lines to the old log table
+        cr.execute(SQL("DROP TABLE %s CASCADE", SQL.identifier(old_table)))
+        # The partition key has to be part of the primary key
+        cr.execute(
+            SQL(
+                "ALTER TABLE %s ADD CONSTRAINT %s PRIMARY KEY (id, create_date)",
+                SQL.identifier(table),
+                SQL.identifier(f"{table}_pkey"),
+            )
+        )
+        for name, definition in foreign_keys:
+            cr.execute(
+                SQL(
+                    "ALTER TABLE %s ADD CONSTRAINT %s %s",
+                    SQL.identifier(table),
+                    SQL.identifier(name),
+                    SQL(definition),
+                )
+            )
+
+    @api.model
+    def _get_partitions(self, table):
+        """Return the monthly partitions of ``table`` as {month: name}."""
+        self.env.cr.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        partitions = {}
+        for (name,) in self.env.cr.fetchall():
+            match = PARTITION_NAME.search(name)
+            if match:
+                partitions[date(int(match[1]), int(match[2]), 1)] = name
+        return partitions
+
+    @api.model
+    def _create_partitions(self, table, date_from):
+        """Create the missing partitions of ``table`` from the month of
+        ``date_from`` up to ``PARTITIONS_AHEAD`` months from now, plus a
+        default partition catching the rows out of these ranges.
+        """
+        self.env.cr.execute(
+            SQL(
+                "CREATE TABLE IF NOT EXISTS %s PARTITION OF %s DEFAULT",
+                SQL.identifier(f"{table}_pdefault"),
+                SQL.identifier(table),
+            )
+        )
+        partitions = self._get_partitions(table)
+        month = date_from.replace(day=1)
+        last_month = fields.Date.today().replace(day=1) + relativedelta(
+            months=PARTITIONS_AHEAD
+        )
+        while month <= last_month:
+            if month not in partitions:
+                self._create_partition(table, month)
+            month += relativedelta(months=1)
+
+    @api.model
+    def _create_partition(self, table, month):
+        cr = self.env.cr
+        name = f"{table}_p{month:%Y%m}"
+        bounds = [
+            fields.Datetime.to_string(month),
+            fields.Datetime.to_string(month + relativedelta(months=1)),
+        ]
+        cr.execute(
+            SQL(
+                "CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS)",
+                SQL.identifier(name),
+                SQL.identifier(table),
+            )
+        )
+        # Move the rows that landed in the default partition meanwhile,
+        # otherwise the partition can't be attached
+        cr.execute(
+            SQL(
+                """
+                WITH moved AS (
+                    DELETE FROM %s
+                    WHERE create_date >= %s AND create_date < %s
+                    RETURNING *
+                )
+                INSERT INTO %s SELECT * FROM moved
+                """,
+                SQL.identifier(f"{table}_pdefault"),
+                *bounds,
+                SQL.identifier(name),
+            )
+        )
+        cr.execute(
+            SQL(
+                "ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (%s) TO (%s)",
+                SQL.identifier(table),
+                SQL.identifier(name),
+                *bounds,
+            )
+        )
+
+    @api.model
+    def _drop_partitions(self, deadline, detach=False):
+        """Drop or detach the partitions only holding logs older than
+        ``deadline``."""
+        for table in PARTITIONED_TABLES:
+            for month, name in sorted(self._get_partitions(table).items()):
+                if month + relativedelta(months=1) > deadline.date():
+                    continue
+                if detach:
+                    query = "ALTER TABLE %s DETACH PARTITION %s"
+                    args = [SQL.identifier(table), SQL.identifier(name)]
+                else:
+                    query = "DROP TABLE %s"
+                    args = [SQL.identifier(name)]
+                self.env.cr.execute(SQL(query, *args))
+                _logger.info(
+                    "AUTOVACUUM - partition '%s' %s",
+                    name,
+                    "detached" if detach else "dropped",
+                )
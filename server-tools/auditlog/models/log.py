@@ -31,6 +31,11 @@ class AuditlogLog(models.Model):
         [("full", "Full log"), ("fast", "Fast log")], string="Type"
     )
 
+    def init(self):
+        vacuum_model = self.env["auditlog.autovacuum"]
+        if vacuum_model._partitioned_storage_enabled():
+            vacuum_model._partition_tables()
+
     @api.model_create_multi
     def create(self, vals_list):
         """Insert model_name and model_model field values upon creation."""
@@ -51,6 +56,13 @@ class AuditlogLog(models.Model):
             vals.update({"model_name": model.name, "model_model": model.model})
         return super().write(vals)
 
+    def unlink(self):
+        """Delete the lines explicitly on partitioned tables, which have no
+        foreign key to cascade the deletion."""
+        if self.env["auditlog.autovacuum"]._is_partitioned("auditlog_log_line"):
+            self.env["auditlog.log.line"].search([("log_id", "in", self.ids)]).unlink()
+        return super().unlink()
+
     def show_res_ids(self):
         self.ensure_one()
         return {
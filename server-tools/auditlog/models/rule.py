@@ -6,6 +6,7 @@ from collections import defaultdict
 
 from odoo import Command, _, api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import SQL, split_every
 from odoo.tools.misc import OrderedSet
 
 FIELDS_BLACKLIST = [
@@ -20,6 +21,21 @@ FIELDS_BLACKLIST = [
 # Used for performance, to avoid a dictionary instanciation when we need an
 # empty dict to simplify algorithms
 EMPTY_DICT = {}
+# Key of the per-transaction buffer of logs written by deferred rules
+LOG_BUFFER_KEY = "auditlog.log.buffer"
+# Temporary table holding the positions of the buffered logs: its rows
+# follow the savepoints, so the logs queued in a rolled back savepoint
+# are left out when the buffer is written
+LOG_BUFFER_TABLE = "auditlog_log_buffer"
+# Maximum number of rows inserted by a single statement when flushing it
+LOG_INSERT_BATCH_SIZE = 1000
+# Rule fields cached in the registry by `_get_rule_data()`
+RULE_CACHE_FIELDS = {
+    "model_id",
+    "capture_record",
+    "deferred_write",
+    "fields_to_exclude_ids",
+}
 
 
 class DictDiffer:
@@ -191,6 +207,13 @@ class AuditlogRule(models.Model):
         domain="[('model_id', '=', model_id)]",
         string="Fields to Exclude",
     )
+    deferred_write = fields.Boolean(
+        help=(
+            "Select this to keep the logs in memory until the end of the "
+            "transaction and write them all at once (faster on mass "
+            "operations, but the logs are not visible before the commit)"
+        ),
+    )
 
     _sql_constraints = [
         (
@@ -210,6 +233,8 @@ class AuditlogRule(models.Model):
             self.pool._auditlog_field_cache = {}
         if not hasattr(self.pool, "_auditlog_model_cache"):
             self.pool._auditlog_model_cache = {}
+        if not hasattr(self.pool, "_auditlog_rule_cache"):
+            self.pool._auditlog_rule_cache = {}
         if not self:
             self = self.search([("state", "=", "subscribed")])
         return self._patch_methods()
@@ -296,6 +321,7 @@ class AuditlogRule(models.Model):
             vals.update({"model_name": model.name, "model_model": model.model})
         new_records = super().create(vals_list)
         updated = [record._register_hook() for record in new_records]
+        self.pool._auditlog_rule_cache.clear()
         if any(updated):
             self._update_registry()
         return new_records
@@ -308,7 +334,10 @@ class AuditlogRule(models.Model):
             model = self.env["ir.model"].sudo().browse(vals["model_id"])
             vals.update({"model_name": model.name, "model_model": model.model})
         res = super().write(vals)
-        if self._register_hook():
+        updated = self._register_hook()
+        self.pool._auditlog_rule_cache.clear()
+        # Other workers have to drop their cached rule data as well
+        if updated or RULE_CACHE_FIELDS.intersection(vals):
             self._update_registry()
         return res
 
@@ -598,9 +627,10 @@ class AuditlogRule(models.Model):
         http_request_model = self.env["auditlog.http.request"]
         http_session_model = self.env["auditlog.http.session"]
         model_model = self.env[res_model]
-        model_id = self.pool._auditlog_model_cache[res_model]
-        auditlog_rule = self.env["auditlog.rule"].search([("model_id", "=", model_id)])
-        fields_to_exclude = auditlog_rule.fields_to_exclude_ids.mapped("name")
+        rule_data = self._get_rule_data(res_model)
+        model_id = rule_data["model_id"]
+        fields_to_exclude = rule_data["fields_to_exclude"]
+        deferred = rule_data["deferred_write"]
 
         vals = {
             "model_id": model_id,
@@ -612,11 +642,19 @@ class AuditlogRule(models.Model):
         vals.update(additional_log_values or {})
         if method == "export_data":
             vals.update({"name": res_model, "res_ids": str(res_ids)})
+            if deferred:
+                return self._buffer_logs(res_model, [vals])
             return log_model.create(vals)
 
-        for res_id in res_ids:
-            res = model_model.browse(res_id)
-            log_vals = {**vals, "name": res.display_name, "res_id": res_id}
+        logs_vals = []
+        # Iterate on a single recordset so that names are fetched in batch
+        for res in model_model.browse(res_ids):
+            res_id = res.id
+            log_vals = {**vals, "res_id": res_id}
+            # Deferred logs get their name when the buffer is flushed, except
+            # for deleted records which will be gone by then
+            if not deferred or method == "unlink":
+                log_vals["name"] = res.display_name
 
             diff = DictDiffer(
                 new_values.get(res_id, EMPTY_DICT), old_values.get(res_id, EMPTY_DICT)
@@ -636,7 +674,7 @@ class AuditlogRule(models.Model):
                 log_vals["line_ids"] = self._create_log_line_on_write(
                     log_vals, diff.changed(), old_values, new_values, fields_to_exclude
                 )
-            elif method == "unlink" and auditlog_rule.capture_record:
+            elif method == "unlink" and rule_data["capture_record"]:
                 log_vals["line_ids"] = self._create_log_line_on_read(
                     log_vals,
                     list(old_values.get(res_id, EMPTY_DICT).keys()),
@@ -644,7 +682,176 @@ class AuditlogRule(models.Model):
                     fields_to_exclude,
                 )
             if method == "unlink" or log_vals.get("line_ids", {}):
-                log_model.create(log_vals)
+                logs_vals.append(log_vals)
+        if deferred:
+            return self._buffer_logs(res_model, logs_vals)
+        return log_model.create(logs_vals)
+
+    def _get_rule_data(self, res_model):
+        """Return the rule settings used to log the operations on `res_model`.
+
+        They are cached in the registry, like `_auditlog_model_cache`, to
+        avoid searching the rule on each logged operation. The cache is
+        cleared whenever a rule is created or updated.
+        """
+        cache = self.pool._auditlog_rule_cache
+        if res_model not in cache:
+            model_id = self.pool._auditlog_model_cache[res_model]
+            rule = self.sudo().search([("model_id", "=", model_id)], limit=1)
+            cache[res_model] = {
+                "model_id": model_id,
+                "model_name": rule.model_id.name,
+                "fields_to_exclude": rule.fields_to_exclude_ids.mapped("name"),
+                "capture_record": rule.capture_record,
+                "deferred_write": rule.deferred_write,
+            }
+        return cache[res_model]
+
+    def _buffer_logs(self, res_model, logs_vals):
+        """Queue the logs of a deferred rule in the transaction buffer, which
+        is written by `_flush_log_buffer()` just before the commit.
+        """
+        if not logs_vals:
+            return
+        precommit = self.env.cr.precommit
+        if LOG_BUFFER_KEY not in precommit.data:
+            precommit.data[LOG_BUFFER_KEY] = []
+            precommit.add(self._flush_log_buffer)
+        buffer = precommit.data[LOG_BUFFER_KEY]
+        self._create_log_buffer_table()
+        self.env.cr.execute(
+            SQL(
+                "INSERT INTO %s SELECT generate_series(%s, %s)",
+                SQL.identifier(LOG_BUFFER_TABLE),
+                len(buffer),
+                len(buffer) + len(logs_vals) - 1,
+            )
+        )
+        buffer.extend((res_model, log_vals) for log_vals in logs_vals)
+
+    def _create_log_buffer_table(self):
+        # Created again if it was created in a rolled back savepoint
+        self.env.cr.execute(
+            SQL(
+                "CREATE TEMPORARY TABLE IF NOT EXISTS %s (position integer) "
+                "ON COMMIT DROP",
+                SQL.identifier(LOG_BUFFER_TABLE),
+            )
+        )
+
+    def _flush_log_buffer(self):
+        """Write the logs queued by deferred rules during the transaction:
+        one multi-row INSERT for the logs, then another one for their lines.
+        """
+        buffer = self.env.cr.precommit.data.pop(LOG_BUFFER_KEY, None)
+        if not buffer:
+            return
+        # Leave out the logs queued in rolled back savepoints (e.g. the
+        # retries of `load()` or an import test)
+        self._create_log_buffer_table()
+        self.env.cr.execute(
+            SQL("SELECT position FROM %s", SQL.identifier(LOG_BUFFER_TABLE))
+        )
+        positions = {position for (position,) in self.env.cr.fetchall()}
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(LOG_BUFFER_TABLE)))
+        buffer = [entry for index, entry in enumerate(buffer) if index in positions]
+        # Resolve the missing names with one read per logged model, and drop
+        # the logs of deletions which failed (the record still exists).
+        # Exports log a list of records (`res_ids`) and are kept as is.
+        res_ids = defaultdict(set)
+        for res_model, log_vals in buffer:
+            if "res_id" in log_vals:
+                res_ids[res_model].add(log_vals["res_id"])
+        existing_ids = defaultdict(set)
+        names = {}
+        for res_model, model_res_ids in res_ids.items():
+            for record in self.env[res_model].browse(model_res_ids).exists():
+                existing_ids[res_model].add(record.id)
+                names[res_model, record.id] = record.display_name
+        buffer = [
+            (res_model, log_vals)
+            for res_model, log_vals in buffer
+            if log_vals["method"] != "unlink"
+            or log_vals["res_id"] not in existing_ids[res_model]
+        ]
+        if not buffer:
+            return
+
+        logs_vals, logs_lines_vals = [], []
+        for res_model, log_vals in buffer:
+            log_vals = {
+                **log_vals,
+                "model_name": self._get_rule_data(res_model)["model_name"],
+                "model_model": res_model,
+            }
+            if "name" not in log_vals:
+                log_vals["name"] = names.get((res_model, log_vals["res_id"]))
+            logs_lines_vals.append(
+                [command[2] for command in log_vals.pop("line_ids", [])]
+            )
+            logs_vals.append(log_vals)
+        log_ids = self._insert_log_rows(self.env["auditlog.log"], logs_vals)
+
+        field_ids = {
+            line_vals["field_id"]
+            for lines_vals in logs_lines_vals
+            for line_vals in lines_vals
+        }
+        fields_data = {
+            field["id"]: field
+            for field in self.env["ir.model.fields"]
+            .sudo()
+            .browse(field_ids)
+            .read(["name", "field_description"])
+        }
+        lines_vals = [
+            {
+                **line_vals,
+                "log_id": log_id,
+                "field_name": fields_data[line_vals["field_id"]]["name"],
+                "field_description": fields_data[line_vals["field_id"]][
+                    "field_description"
+                ],
+            }
+            for log_id, log_lines_vals in zip(log_ids, logs_lines_vals, strict=True)
+            for line_vals in log_lines_vals
+        ]
+        self._insert_log_rows(self.env["auditlog.log.line"], lines_vals)
+
+    def _insert_log_rows(self, model, vals_list):
+        """Insert `vals_list` in the table of `model` without going through
+        the ORM, and return the ids of the new rows in the same order.
+        """
+        if not vals_list:
+            return []
+        model = model.sudo()
+        fnames = sorted(set().union(*vals_list))
+        columns = [*fnames, "create_uid", "create_date", "write_uid", "write_date"]
+        uid, now = self.env.uid, self.env.cr.now()
+        ids = []
+        for vals_batch in split_every(LOG_INSERT_BATCH_SIZE, vals_list):
+            rows = []
+            for vals in vals_batch:
+                row = []
+                for fname in fnames:
+                    field = model._fields[fname]
+                    value = vals.get(fname)
+                    if value is not None:
+                        value = field.convert_to_column_insert(
+                            field.convert_to_cache(value, model), model
+                        )
+                    row.append(value)
+                rows.append((*row, uid, now, uid, now))
+            self.env.cr.execute(
+                SQL(
+                    "INSERT INTO %s (%s) VALUES %s RETURNING id",
+                    SQL.identifier(model._table),
+                    SQL(", ").join(map(SQL.identifier, columns)),
+                    SQL(", ").join(rows),
+                )
+            )
+            ids.extend(row[0] for row in self.env.cr.fetchall())
+        return ids
 
     def _get_field(self, model_id, field_name):
         model = self.env["ir.model"].sudo().browse(model_id)
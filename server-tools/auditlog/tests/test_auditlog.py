@@ -2,6 +2,7 @@
 # © 2018 Pieter Paulussen <pieter_paulussen@me.com>
 # © 2021 Stefan Rijnhart <stefan@opener.amsterdam>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import contextlib
 
 from odoo.addons.base.models.ir_model import MODULE_UNINSTALL_FLAG
 from odoo.addons.base.models.res_users import name_boolean_group
@@ -767,3 +768,121 @@ class AuditlogFast_excluded_fields(AuditLogRuleCommon):
                 ]
             )
         )
+
+
+class TestAuditlogDeferredWrite(AuditLogRuleCommon):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.groups_model_id = cls.env.ref("base.model_res_groups").id
+        cls.groups_rule = cls.create_rule(
+            {
+                "name": "testrule for groups",
+                "model_id": cls.groups_model_id,
+                "log_create": True,
+                "log_write": True,
+                "log_unlink": True,
+                "log_export_data": True,
+                "log_type": "full",
+                "deferred_write": True,
+            }
+        )
+        cls.auditlog_log = cls.env["auditlog.log"]
+
+    def _search_logs(self, method, res_ids):
+        return self.auditlog_log.search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", method),
+                ("res_id", "in", res_ids),
+            ]
+        )
+
+    def test_01_logs_written_on_flush(self):
+        self.groups_rule.subscribe()
+        groups = self.env["res.groups"].create(
+            [{"name": f"testgroup{i}"} for i in range(3)]
+        )
+        # Nothing is written before the transaction is about to be committed
+        self.assertFalse(self._search_logs("create", groups.ids))
+        self.env.cr.flush()
+        logs = self._search_logs("create", groups.ids)
+        self.assertEqual(len(logs), 3)
+        self.assertEqual(
+            sorted(logs.mapped("name")), sorted(groups.mapped("display_name"))
+        )
+        self.assertEqual(set(logs.mapped("model_model")), {"res.groups"})
+        name_lines = logs.line_ids.filtered(lambda line: line.field_name == "name")
+        self.assertEqual(len(name_lines), 3)
+        self.assertTrue(all(name_lines.mapped("field_description")))
+
+    def test_02_write_log(self):
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        group.write({"name": "testgroup2"})
+        self.env.cr.flush()
+        log = self._search_logs("write", group.ids)
+        self.assertEqual(len(log), 1)
+        line = log.line_ids.filtered(lambda line: line.field_name == "name")
+        self.assertEqual(line.old_value, "testgroup1")
+        self.assertEqual(line.new_value, "testgroup2")
+
+    def test_03_unlink_log_keeps_name(self):
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        group_name = group.display_name
+        group.unlink()
+        self.env.cr.flush()
+        log = self._search_logs("unlink", group.ids)
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.name, group_name)
+
+    def test_04_rule_data_cache(self):
+        self.groups_rule.subscribe()
+        rule_model = self.env["auditlog.rule"]
+        self.assertTrue(rule_model._get_rule_data("res.groups")["deferred_write"])
+        self.groups_rule.deferred_write = False
+        self.assertNotIn("res.groups", self.env.registry._auditlog_rule_cache)
+        self.assertFalse(rule_model._get_rule_data("res.groups")["deferred_write"])
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        self.assertEqual(len(self._search_logs("create", group.ids)), 1)
+
+    def test_05_rolled_back_savepoint(self):
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        with contextlib.suppress(ValueError), self.env.cr.savepoint():
+            rolled_back = self.env["res.groups"].create({"name": "testgroup2"})
+            group.write({"name": "testgroup3"})
+            raise ValueError
+        self.env.invalidate_all()
+        self.env.cr.flush()
+        self.assertFalse(self._search_logs("create", rolled_back.ids))
+        self.assertEqual(len(self._search_logs("create", group.ids)), 1)
+        self.assertFalse(self._search_logs("write", group.ids))
+
+    def test_06_failed_unlink(self):
+        self.groups_rule.subscribe()
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        with contextlib.suppress(ValueError), self.env.cr.savepoint():
+            group.unlink()
+            raise ValueError
+        self.env.invalidate_all()
+        self.env.cr.flush()
+        self.assertTrue(group.exists())
+        self.assertFalse(self._search_logs("unlink", group.ids))
+
+    def test_07_export_data(self):
+        self.groups_rule.subscribe()
+        groups = self.env["res.groups"].create(
+            [{"name": f"testgroup{i}"} for i in range(2)]
+        )
+        groups.export_data(["name"])
+        self.env.cr.flush()
+        log = self.auditlog_log.search(
+            [
+                ("model_id", "=", self.groups_model_id),
+                ("method", "=", "export_data"),
+            ]
+        )
+        self.assertEqual(len(log), 1)
+        self.assertEqual(log.res_ids, str(groups.ids))
@@ -1,6 +1,7 @@
 # Copyright 2016 ABF OSIELL <https://osiell.com>
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 import time
+from datetime import date
 
 from .common import AuditLogRuleCommon
 
@@ -42,3 +43,115 @@ class TestAuditlogAutovacuum(AuditLogRuleCommon):
             [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
         )
         self.assertEqual(nb_logs, 0)
+
+
+class TestAuditlogPartitionedStorage(AuditLogRuleCommon):
+    def setUp(self):
+        super().setUp()
+        self.groups_model_id = self.env.ref("base.model_res_groups").id
+        self.groups_rule = self.create_rule(
+            {
+                "name": "testrule for groups",
+                "model_id": self.groups_model_id,
+                "log_create": True,
+                "log_unlink": True,
+                "state": "subscribed",
+                "log_type": "full",
+            }
+        )
+        self.autovacuum_model = self.env["auditlog.autovacuum"]
+        self.env["ir.config_parameter"].sudo().set_param(
+            "auditlog.partitioned_storage", "True"
+        )
+        self.env["auditlog.log"].init()
+
+    def tearDown(self):
+        self.groups_rule.unlink()
+        super().tearDown()
+
+    def _create_group_log(self):
+        group = self.env["res.groups"].create({"name": "testgroup1"})
+        return self.env["auditlog.log"].search(
+            [("model_id", "=", self.groups_model_id), ("res_id", "=", group.id)]
+        )
+
+    def test_01_partitioned_tables(self):
+        self.assertTrue(self.autovacuum_model._is_partitioned("auditlog_log"))
+        self.assertTrue(self.autovacuum_model._is_partitioned("auditlog_log_line"))
+        log = self._create_group_log()
+        self.assertEqual(len(log), 1)
+        self.assertTrue(log.line_ids)
+        lines = log.line_ids
+        log.unlink()
+        self.assertFalse(lines.exists())
+
+    def _get_foreign_keys(self, table):
+        """Return the foreign keys of ``table`` as {column: on delete action}."""
+        self.env.cr.execute(
+            """
+            SELECT a.attname, c.confdeltype
+            FROM pg_constraint c
+            JOIN pg_attribute a
+              ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            WHERE c.contype = 'f' AND c.conrelid = %s::regclass
+            """,
+            [table],
+        )
+        return dict(self.env.cr.fetchall())
+
+    def test_01b_foreign_keys_kept(self):
+        self.assertEqual(
+            self._get_foreign_keys("auditlog_log"),
+            {
+                "model_id": "n",
+                "user_id": "n",
+                "http_session_id": "n",
+                "http_request_id": "n",
+                "create_uid": "n",
+                "write_uid": "n",
+            },
+        )
+        self.assertEqual(
+            self._get_foreign_keys("auditlog_log_line"),
+            {"field_id": "n", "create_uid": "n", "write_uid": "n"},
+        )
+        # Deleting a referenced record applies the original ON DELETE action
+        log = self._create_group_log()
+        session = self.env["auditlog.http.session"].create({"name": "test"})
+        log.http_session_id = session
+        self.env.flush_all()
+        self.env.cr.execute(
+            "DELETE FROM auditlog_http_session WHERE id = %s", [session.id]
+        )
+        self.env.cr.execute(
+            "SELECT http_session_id FROM auditlog_log WHERE id = %s", [log.id]
+        )
+        self.assertIsNone(self.env.cr.fetchone()[0])
+
+    def test_02_autovacuum_drops_partitions(self):
+        log = self._create_group_log()
+        self.autovacuum_model._create_partitions("auditlog_log", date(2020, 1, 1))
+        self.autovacuum_model._create_partitions(
+            "auditlog_log_line", date(2020, 1, 1)
+        )
+        # Updating the partition key moves the rows to the old partitions
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE auditlog_log SET create_date = '2020-01-15' WHERE id = %s",
+            [log.id],
+        )
+        self.env.cr.execute(
+            "UPDATE auditlog_log_line SET create_date = '2020-01-15' "
+            "WHERE log_id = %s",
+            [log.id],
+        )
+        self.env.invalidate_all()
+        self.autovacuum_model.autovacuum(days=30)
+        self.assertNotIn(
+            date(2020, 1, 1), self.autovacuum_model._get_partitions("auditlog_log")
+        )
+        self.assertNotIn(
+            date(2020, 1, 1),
+            self.autovacuum_model._get_partitions("auditlog_log_line"),
+        )
+        self.assertFalse(log.exists())
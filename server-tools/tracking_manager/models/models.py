@@ -64,8 +64,16 @@ class Base(models.AbstractModel):
     def _tm_get_field_description(self, field_name):
         return self._fields[field_name].get_description(self.env)["string"]
 
-    def _tm_get_changes(self, values):
+    def _tm_get_field_descriptions(self, field_names):
+        return {
+            field_name: self._tm_get_field_description(field_name)
+            for field_name in field_names
+        }
+
+    def _tm_get_changes(self, values, descriptions=None):
         self.ensure_one()
+        if descriptions is None:
+            descriptions = self._tm_get_field_descriptions(values)
         changes = []
         for field_name, before in values.items():
             field = self._fields[field_name]
@@ -81,37 +89,60 @@ class Base(models.AbstractModel):
                     new = self[field_name]
                 changes.append(
                     {
-                        "name": self._tm_get_field_description(field_name),
+                        "name": descriptions[field_name],
                         "old": old,
                         "new": new,
                     }
                 )
         return changes
 
+    def _tm_prefetch_display_names(self, initial_values):
+        """Compute the display names of all the relational values, before and
+        after the changes, with one query per comodel."""
+        ids_by_model = defaultdict(set)
+        for record in self:
+            for field_name, before in initial_values[record.id].items():
+                field = self._fields[field_name]
+                if field.type in ("many2one", "many2many"):
+                    ids_by_model[field.comodel_name].update(before.ids)
+                    ids_by_model[field.comodel_name].update(record[field_name].ids)
+        for model_name, ids in ids_by_model.items():
+            self.env[model_name].browse(ids).exists().mapped("display_name")
+
     def _tm_post_message(self, data):
         for model_name, model_data in data.items():
             # check if record has mail.thread mixin
             if not getattr(self.env[model_name], "message_post_with_source", False):
                 continue
-            for record_id, messages_by_field in model_data.items():
-                # Avoid error if no record is linked (example: child_ids of res.partner)
-                if not record_id:
-                    continue
-                record = self.env[model_name].browse(record_id)
+            # Avoid error if no record is linked (example: child_ids of res.partner)
+            records = self.env[model_name].browse(
+                record_id for record_id in model_data if record_id
+            )
+            if not records:
+                continue
+            descriptions = records._tm_get_field_descriptions(
+                {
+                    field_name
+                    for messages_by_field in model_data.values()
+                    for field_name in messages_by_field
+                }
+            )
+            bodies = {}
+            for record in records:
                 messages = [
                     {
-                        "name": record._tm_get_field_description(field_name),
+                        "name": descriptions[field_name],
                         "messages": messages,
                     }
-                    for field_name, messages in messages_by_field.items()
+                    for field_name, messages in model_data[record.id].items()
                 ]
                 # We do not use message_post_with_view() because emails would be sent
-                rendered_template = self.env["ir.qweb"]._render(
+                bodies[record.id] = self.env["ir.qweb"]._render(
                     "tracking_manager.track_o2m_m2m_template",
                     {"lines": messages, "object": record},
                     minimal_qcontext=True,
                 )
-                record._message_log(body=rendered_template)
+            records._message_log_batch(bodies)
 
     def _tm_prepare_o2m_tracking(self):
         fnames = self._tm_get_fields_to_track()
@@ -135,16 +166,25 @@ class Base(models.AbstractModel):
         initial_values = self.env.cr.precommit.data.pop(
             f"tracking.manager.before.{self._name}", {}
         )
-        for _id, values in initial_values.items():
-            # Always use sudo in case that the record have been modified using sudo
-            record = self.sudo().browse(_id)
-            if not record.exists():
-                # if a record have been modify and then deleted
-                # it's not need to track the change so skip it
-                continue
-            changes = record._tm_get_changes(values)
-            if changes:
-                record._tm_notify_owner("update", changes)
+        # Always use sudo in case that the record have been modified using sudo
+        # if a record have been modify and then deleted
+        # it's not need to track the change so skip it
+        records = self.sudo().browse(list(initial_values)).exists()
+        if records:
+            records._tm_prefetch_display_names(initial_values)
+            descriptions = records._tm_get_field_descriptions(
+                {
+                    field_name
+                    for values in initial_values.values()
+                    for field_name in values
+                }
+            )
+            for record in records:
+                changes = record._tm_get_changes(
+                    initial_values[record.id], descriptions
+                )
+                if changes:
+                    record._tm_notify_owner("update", changes)
         data = self.env.cr.precommit.data.pop("tracking.manager.data", {})
         self._tm_post_message(data)
         self.flush_model()
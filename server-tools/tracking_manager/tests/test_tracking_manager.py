@@ -271,3 +271,21 @@ class TestTrackingManager(TransactionCase):
         )
         child.write({"parent_id": False})
         self.assertEqual(len(self.messages), 1)
+
+    def test_o2m_update_several_owners(self):
+        partner_2 = self.env["res.partner"].create(
+            {
+                "name": "Bar",
+                "user_ids": [(Command.CREATE, 0, {"login": "008"})],
+            }
+        )
+        self.flush_tracking()
+        partner_2.message_ids.unlink()
+        users = self.partner.user_ids | partner_2.user_ids
+        for user in users:
+            user.write({"login": f"{user.login}-changed"})
+        self.flush_tracking()
+        for partner in self.partner | partner_2:
+            self.assertEqual(len(partner.message_ids), 1)
+            self.assertEqual(partner.message_ids.body.count("Change :"), 1)
+            self.assertIn("changed", partner.message_ids.body)
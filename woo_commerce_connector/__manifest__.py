@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'WooCommerce Connector Pro',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.0.5',
     'category': 'Sales/Sales',
     'summary': 'Professional WooCommerce Odoo Integration',
     'description': """
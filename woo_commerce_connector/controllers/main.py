@@ -15,20 +15,24 @@ class WooWebhookController(http.Controller):
         if not backend.exists():
             return {'status': 'error', 'message': 'Invalid Backend'}
 
-        # Get raw data
-        data = json.loads(request.httprequest.data)
+        # Only trust payloads signed with the webhook secret of the backend
+        payload = request.httprequest.get_data()
+        signature = request.httprequest.headers.get('X-WC-Webhook-Signature')
+        if not backend._check_webhook_signature(payload, signature):
+            _logger.warning("WooCommerce Webhook rejected: invalid signature for Backend %s" % backend.name)
+            return {'status': 'error', 'message': 'Invalid Signature'}
+
+        data = json.loads(payload)
         topic = request.httprequest.headers.get('X-Wc-Topic')
 
         _logger.info("WooCommerce Webhook Received: Topic %s for Backend %s" % (topic, backend.name))
 
-        if topic == 'order.created':
-            # Trigger order import for this specific order
-            # (In a real pro connector, we process the JSON directly)
-            # For now, let's trigger the import logic
+        if topic == 'order.created' and data.get('status') == 'processing':
+            # The payload is signed by WooCommerce: import it as is
             wizard = request.env['woo.operation.wizard'].sudo().create({
                 'backend_id': backend.id,
                 'operation': 'import_order'
             })
-            wizard._import_orders()
+            wizard._import_orders([data])
 
         return {'status': 'success'}
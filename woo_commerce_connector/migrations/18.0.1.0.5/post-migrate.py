@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Webhook payloads are now checked against the webhook secret: give the
+    webhooks registered without one a secret, otherwise every order webhook
+    of the backend would be rejected"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    for backend in env['woo.backend'].search([('state', '=', 'confirmed')]):
+        try:
+            backend._register_webhooks()
+        except Exception as e:
+            _logger.warning(
+                "Could not update the webhooks of WooCommerce backend %s, "
+                "use 'Register Webhooks' to sign them: %s", backend.name, e)
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+import base64
+import hashlib
+import hmac
 import logging
+import secrets
 
 _logger = logging.getLogger(__name__)
 
@@ -18,6 +22,11 @@ class WooBackend(models.Model):
     woo_url = fields.Char('Store URL', required=True, help="Example: https://yourstore.com")
     woo_consumer_key = fields.Char('Consumer Key', required=True)
     woo_consumer_secret = fields.Char('Consumer Secret', required=True)
+    woo_webhook_secret = fields.Char(
+        'Webhook Secret', copy=False,
+        help="Secret used by WooCommerce to sign the webhook payloads. "
+             "Generated when the webhooks are registered: webhooks registered "
+             "without it are rejected until 'Register Webhooks' is run again.")
     
     # Defaults
     warehouse_id = fields.Many2one('stock.warehouse', string='Default Warehouse', required=True)
@@ -28,6 +37,16 @@ class WooBackend(models.Model):
     auto_import_products = fields.Boolean('Auto Import Products', default=False)
     auto_import_orders = fields.Boolean('Auto Import Orders', default=False)
     auto_export_stock = fields.Boolean('Auto Export Stock', default=False)
+
+    # Sync Watermarks
+    products_modified_after = fields.Datetime(
+        'Products Modified After', copy=False,
+        help="Only products modified in WooCommerce after this date are fetched "
+             "by the next product import. Clear it to re-import the whole catalog.")
+    orders_modified_after = fields.Datetime(
+        'Orders Modified After', copy=False,
+        help="Only orders modified in WooCommerce after this date are fetched "
+             "by the next order import. Clear it to fetch all processing orders again.")
     
     # Dashboard Stats
     total_products = fields.Integer(compute='_compute_stats')
@@ -103,32 +122,64 @@ class WooBackend(models.Model):
     def action_register_webhooks(self):
         """Register webhooks in WooCommerce."""
         self.ensure_one()
+        try:
+            self._register_webhooks()
+        except Exception as e:
+            raise UserError(_("Webhook Error: %s") % str(e))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success'),
+                'message': _('Webhook registered successfully!'),
+                'type': 'success',
+            }
+        }
+
+    def _register_webhooks(self):
+        """Create the order webhook of the backend in WooCommerce, or update the
+        already registered ones with the webhook secret so that they are signed."""
+        self.ensure_one()
         wcapi = self.get_woo_api()
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         webhook_url = "%s/woo_connector/webhook/%s" % (base_url, self.id)
-        
+        if not self.woo_webhook_secret:
+            self.woo_webhook_secret = secrets.token_hex(32)
+
+        response = wcapi.get("webhooks", params={'per_page': 100})
+        if response.status_code != 200:
+            raise UserError(_("Failed to read webhooks: %s") % response.text)
+        webhooks = [w for w in response.json() if w.get('delivery_url') == webhook_url]
+        for webhook in webhooks:
+            response = wcapi.put("webhooks/%s" % webhook['id'], {
+                "secret": self.woo_webhook_secret,
+                "status": "active",
+            })
+            if response.status_code != 200:
+                raise UserError(_("Failed to update webhook: %s") % response.text)
+        if webhooks:
+            return
+
         data = {
             "name": "Odoo Order Created",
             "topic": "order.created",
             "delivery_url": webhook_url,
+            "secret": self.woo_webhook_secret,
             "status": "active"
         }
-        try:
-            response = wcapi.post("webhooks", data)
-            if response.status_code == 201:
-                return {
-                    'type': 'ir.actions.client',
-                    'tag': 'display_notification',
-                    'params': {
-                        'title': _('Success'),
-                        'message': _('Webhook registered successfully!'),
-                        'type': 'success',
-                    }
-                }
-            else:
-                raise UserError(_("Failed to register webhook: %s") % response.text)
-        except Exception as e:
-            raise UserError(_("Webhook Error: %s") % str(e))
+        response = wcapi.post("webhooks", data)
+        if response.status_code != 201:
+            raise UserError(_("Failed to register webhook: %s") % response.text)
+
+    def _check_webhook_signature(self, payload, signature):
+        """Check the X-WC-Webhook-Signature header of a webhook: the base64
+        encoded HMAC-SHA256 of the raw payload, keyed by the webhook secret."""
+        self.ensure_one()
+        if not self.woo_webhook_secret or not signature:
+            return False
+        digest = hmac.new(
+            self.woo_webhook_secret.encode(), payload, hashlib.sha256).digest()
+        return hmac.compare_digest(base64.b64encode(digest).decode(), signature)
 
     @api.model
     def _cron_auto_import_orders(self):
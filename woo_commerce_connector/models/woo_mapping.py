@@ -22,6 +22,7 @@ class WooProductTemplateMapping(models.Model):
     _description = 'WooCommerce Product Template Mapping'
 
     odoo_id = fields.Many2one('product.template', string='Odoo Template', required=True, ondelete='cascade')
+    woo_image_url = fields.Char('Image URL', help="Source of the last image imported from WooCommerce.")
 
 class WooProductProductMapping(models.Model):
     _name = 'woo.product.product.mapping'
@@ -29,6 +30,8 @@ class WooProductProductMapping(models.Model):
     _description = 'WooCommerce Product Variant Mapping'
 
     odoo_id = fields.Many2one('product.product', string='Odoo Variant', required=True, ondelete='cascade')
+    woo_stock_qty = fields.Integer('Exported Stock', copy=False, help="Last stock quantity sent to WooCommerce.")
+    woo_stock_date = fields.Datetime('Stock Export Date', copy=False, help="Empty until the stock is exported once.")
 
 class WooProductAttributeMapping(models.Model):
     _name = 'woo.product.attribute.mapping'
@@ -1,11 +1,87 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import split_every
 import logging
 import requests
 import base64
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 _logger = logging.getLogger(__name__)
 
+WOO_PAGE_SIZE = 100
+WOO_MAX_WORKERS = 8
+WOO_MAX_RETRIES = 3
+WOO_RETRY_BACKOFF = 1.0
+WOO_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+# The helpers below run in worker threads: they only do HTTP and must never touch the ORM.
+
+def _woo_retry(call, *args, **kwargs):
+    """Run an HTTP call, retrying with exponential backoff on network errors,
+    throttling and server errors."""
+    for attempt in range(WOO_MAX_RETRIES + 1):
+        try:
+            response = call(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if attempt == WOO_MAX_RETRIES:
+                raise
+            _logger.warning("WooCommerce request failed (%s), retrying" % str(e))
+        else:
+            if response.status_code not in WOO_RETRY_STATUS or attempt == WOO_MAX_RETRIES:
+                return response
+            _logger.warning("WooCommerce request returned %s, retrying" % response.status_code)
+        time.sleep(WOO_RETRY_BACKOFF * 2 ** attempt)
+
+def _woo_fetch_all(wcapi, endpoint, params=None, executor=None):
+    """Fetch every page of a WooCommerce collection endpoint.
+    The first page gives the page count, the other pages run on the executor if given."""
+    params = dict(params or {}, per_page=WOO_PAGE_SIZE)
+
+    def fetch(page):
+        response = _woo_retry(wcapi.get, endpoint, params=dict(params, page=page))
+        response.raise_for_status()
+        return response
+
+    first = fetch(1)
+    records = first.json()
+    pages = range(2, int(first.headers.get('X-WP-TotalPages') or 1) + 1)
+    responses = executor.map(fetch, pages) if executor else map(fetch, pages)
+    for response in responses:
+        records.extend(response.json())
+    return records
+
+def _woo_fetch_variations(wcapi, woo_template_id):
+    """Fetch all variations of a variable product, None on failure."""
+    try:
+        return _woo_fetch_all(wcapi, "products/%s/variations" % woo_template_id)
+    except requests.exceptions.RequestException as e:
+        _logger.error("Failed to fetch variations of product %s: %s" % (woo_template_id, str(e)))
+        return None
+
+def _woo_post_batch(wcapi, endpoint, data):
+    """Post a batch request and return its JSON result, None on failure."""
+    try:
+        response = _woo_retry(wcapi.post, endpoint, data)
+        response.raise_for_status()
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        _logger.error("WooCommerce batch %s failed: %s" % (endpoint, str(e)))
+        return None
+
+def _woo_download_image(url):
+    """Download an image and return it base64 encoded, False on failure."""
+    try:
+        img_res = _woo_retry(requests.get, url, timeout=10)
+        if img_res.status_code == 200:
+            return base64.b64encode(img_res.content)
+    except requests.exceptions.RequestException as e:
+        _logger.error("Failed to download image: %s" % str(e))
+    return False
+
+
 class WooOperationWizard(models.TransientModel):
     _name = 'woo.operation.wizard'
     _description = 'WooCommerce Operation Wizard'
@@ -144,259 +220,471 @@ class WooOperationWizard(models.TransientModel):
         """
         Import products from WooCommerce.
         Handles Simple and Variable products.
+        Only products modified since the backend watermark are fetched, and only
+        templates whose values actually changed are written.
+        Products whose variations or image could not be downloaded are not marked
+        as synced, and the watermark is kept before them, so that the next import
+        fetches them again.
         """
-        wcapi = self.backend_id.get_woo_api()
-        page = 1
-        total_imported = 0
-        
-        while True:
-            params = {"per_page": 20, "page": page}
-            response = wcapi.get("products", params=params)
-            if response.status_code != 200:
-                break
-            
-            products = response.json()
-            if not products:
-                break
-                
+        backend = self.backend_id
+        wcapi = backend.get_woo_api()
+        sync_start = fields.Datetime.now()
+        params = {}
+        if backend.products_modified_after:
+            params['modified_after'] = backend.products_modified_after.isoformat()
+            params['dates_are_gmt'] = 'true'
+
+        with ThreadPoolExecutor(max_workers=WOO_MAX_WORKERS) as executor:
+            # 1. Fetch all modified products (pages run concurrently)
+            try:
+                products = _woo_fetch_all(wcapi, "products", params, executor)
+            except requests.exceptions.RequestException as e:
+                raise UserError(_("Failed to fetch products: %s") % str(e))
+
+            # 2. Keep only new products and products changed since their last sync
+            template_mappings = {
+                mapping.woo_id: mapping
+                for mapping in self.env['woo.product.template.mapping'].search([
+                    ('backend_id', '=', backend.id),
+                    ('woo_id', 'in', [str(p.get('id')) for p in products]),
+                ])
+            }
+            products = [p for p in products if self._woo_product_changed(p, template_mappings)]
+
+            # 3. Download images and variations concurrently
+            image_urls = set()
             for product_data in products:
-                woo_id = str(product_data.get('id'))
-                name = product_data.get('name')
-                type = product_data.get('type') # simple, variable, grouped, external
-                
-                # 1. Check if already mapped
-                mapping = self.env['woo.product.template.mapping'].search([
-                    ('backend_id', '=', self.backend_id.id),
-                    ('woo_id', '=', woo_id)
-                ], limit=1)
-                
+                url = self._woo_image_url(product_data)
+                mapping = template_mappings.get(str(product_data.get('id')))
+                if url and (not mapping or mapping.woo_image_url != url):
+                    image_urls.add(url)
+            images = dict(zip(image_urls, executor.map(_woo_download_image, image_urls)))
+
+            variable_ids = [str(p.get('id')) for p in products if p.get('type') == 'variable']
+            variations = dict(zip(variable_ids, executor.map(
+                lambda woo_id: _woo_fetch_variations(wcapi, woo_id), variable_ids)))
+
+        # Products to fetch again: failed variations or image download
+        failed = [
+            product_data for product_data in products
+            if variations.get(str(product_data.get('id')), []) is None
+            or (self._woo_image_url(product_data) in image_urls
+                and not images[self._woo_image_url(product_data)])
+        ]
+        failed_ids = {str(product_data.get('id')) for product_data in failed}
+
+        # 4. Batched writes to Odoo
+        category_map = {
+            m['woo_id']: m['odoo_id'][0]
+            for m in self.env['woo.product.category.mapping'].search_read(
+                [('backend_id', '=', backend.id)], ['woo_id', 'odoo_id'])
+        }
+        attribute_map = {
+            m['woo_id']: m['odoo_id'][0]
+            for m in self.env['woo.product.attribute.mapping'].search_read(
+                [('backend_id', '=', backend.id)], ['woo_id', 'odoo_id'])
+        }
+        value_map = self._get_attribute_value_map(products, attribute_map)
+
+        new_products = []
+        template_vals_list = []
+        total_updated = 0
+        for product_data in products:
+            woo_id = str(product_data.get('id'))
+            template_vals = self._prepare_template_vals(product_data, category_map, images)
+            mapping = template_mappings.get(woo_id)
+            if mapping:
+                if self._write_changed_template(mapping, template_vals, self._woo_image_url(product_data)):
+                    total_updated += 1
+                continue
+            template_vals.update({
+                'type': 'consu',
+                'is_storable': not product_data.get('virtual'),
+            })
+            if product_data.get('type') == 'variable':
+                attr_line_vals = self._prepare_attribute_lines(product_data, attribute_map, value_map)
+                if attr_line_vals:
+                    template_vals['attribute_line_ids'] = attr_line_vals
+            new_products.append(product_data)
+            template_vals_list.append(template_vals)
+
+        new_templates = self.env['product.template'].create(template_vals_list)
+        new_mappings = self.env['woo.product.template.mapping'].create([{
+            'backend_id': backend.id,
+            'woo_id': str(product_data.get('id')),
+            'odoo_id': template.id,
+            'woo_image_url': self._woo_image_url(product_data)
+                             if str(product_data.get('id')) not in failed_ids else False,
+        } for product_data, template in zip(new_products, new_templates)])
+        touched = new_mappings
+        for product_data in products:
+            mapping = template_mappings.get(str(product_data.get('id')))
+            if mapping:
+                touched |= mapping
+        touched.filtered(lambda m: m.woo_id not in failed_ids).write({'last_sync_date': sync_start})
+
+        # 5. Map variations of the imported variable products
+        if variations:
+            templates_by_woo_id = {m.woo_id: m.odoo_id for m in touched}
+            self._import_variations(templates_by_woo_id, variations)
+
+        backend.products_modified_after = self._woo_watermark(
+            failed, sync_start, backend.products_modified_after)
+        return self._notification(
+            _("Imported %d new products, updated %d products.") % (len(new_templates), total_updated))
+
+    def _woo_watermark(self, failed, sync_start, watermark):
+        """Return the next modified_after watermark: the start of the sync when
+        every record was imported, otherwise just before the oldest failed one."""
+        dates = [
+            fields.Datetime.to_datetime(record_data['date_modified_gmt'].replace('T', ' '))
+            for record_data in failed if record_data.get('date_modified_gmt')
+        ]
+        if len(dates) < len(failed):
+            # A failed record without modification date: keep the watermark
+            return watermark
+        if dates:
+            return min(dates) - timedelta(seconds=1)
+        return sync_start
+
+    def _woo_product_changed(self, product_data, template_mappings):
+        """Tell whether a WooCommerce product is new or was modified after its last sync."""
+        mapping = template_mappings.get(str(product_data.get('id')))
+        date_modified = product_data.get('date_modified_gmt')
+        if not mapping or not mapping.last_sync_date or not date_modified:
+            return True
+        return fields.Datetime.to_datetime(date_modified.replace('T', ' ')) > mapping.last_sync_date
+
+    def _woo_image_url(self, product_data):
+        images = product_data.get('images') or []
+        return images[0].get('src') if images else False
+
+    def _prepare_template_vals(self, product_data, category_map, images):
+        """Build the product.template values mirrored from WooCommerce."""
+        template_vals = {
+            'name': product_data.get('name'),
+            'list_price': float(product_data.get('regular_price') or 0.0),
+            'default_code': product_data.get('sku') or False,
+            'description_sale': product_data.get('short_description') or False,
+        }
+        image = images.get(self._woo_image_url(product_data))
+        if image:
+            template_vals['image_1920'] = image
+
+        # Map Categories
+        cat_ids = product_data.get('categories', [])
+        if cat_ids and str(cat_ids[0].get('id')) in category_map:
+            template_vals['categ_id'] = category_map[str(cat_ids[0].get('id'))]
+        return template_vals
+
+    def _write_changed_template(self, mapping, template_vals, image_url):
+        """Write only the values that differ from the mapped template."""
+        template = mapping.odoo_id
+        changed_vals = {}
+        for fname, value in template_vals.items():
+            if fname == 'image_1920':
+                if mapping.woo_image_url != image_url:
+                    changed_vals[fname] = value
+                continue
+            current = template[fname]
+            if isinstance(current, models.BaseModel):
+                current = current.id
+            if current != value:
+                changed_vals[fname] = value
+        if not changed_vals:
+            return False
+        template.write(changed_vals)
+        if 'image_1920' in changed_vals:
+            mapping.woo_image_url = image_url
+        return True
+
+    def _get_attribute_value_map(self, products, attribute_map):
+        """Return {(attribute_id, name): value_id}, creating missing values in one batch."""
+        needed = set()
+        for product_data in products:
+            if product_data.get('type') != 'variable':
+                continue
+            for attr_data in product_data.get('attributes', []):
+                attribute_id = attribute_map.get(str(attr_data.get('id')))
+                if attribute_id:
+                    needed.update((attribute_id, val_name) for val_name in attr_data.get('options', []))
+        if not needed:
+            return {}
+        Value = self.env['product.attribute.value']
+        value_map = {
+            (v['attribute_id'][0], v['name']): v['id']
+            for v in Value.search_read(
+                [('attribute_id', 'in', list({attr_id for attr_id, _name in needed}))],
+                ['attribute_id', 'name'])
+        }
+        missing = sorted(needed - set(value_map))
+        created = Value.create([
+            {'attribute_id': attribute_id, 'name': val_name}
+            for attribute_id, val_name in missing
+        ])
+        value_map.update(zip(missing, created.ids))
+        return value_map
+
+    def _prepare_attribute_lines(self, product_data, attribute_map, value_map):
+        """Build attribute line commands for a variable product."""
+        attr_line_vals = []
+        for attr_data in product_data.get('attributes', []):
+            attribute_id = attribute_map.get(str(attr_data.get('id')))
+            if not attribute_id:
+                continue
+            value_ids = [
+                value_map[(attribute_id, val_name)]
+                for val_name in attr_data.get('options', [])
+                if (attribute_id, val_name) in value_map
+            ]
+            if value_ids:
+                attr_line_vals.append((0, 0, {
+                    'attribute_id': attribute_id,
+                    'value_ids': [(6, 0, value_ids)]
+                }))
+        return attr_line_vals
+
+    def _import_variations(self, templates_by_woo_id, variations):
+        """Map the variations fetched for variable products to Odoo variants."""
+        existing = self.env['woo.product.product.mapping'].search([
+            ('backend_id', '=', self.backend_id.id)
+        ])
+        mapped_woo_ids = {m.woo_id: m for m in existing}
+        mapped_variant_ids = set(existing.odoo_id.ids)
+        mapping_vals_list = []
+
+        for woo_template_id, variations_data in variations.items():
+            odoo_template = templates_by_woo_id.get(woo_template_id)
+            if not odoo_template or variations_data is None:
+                continue
+            for var_data in variations_data:
+                woo_var_id = str(var_data.get('id'))
+                sku = var_data.get('sku')
+
+                mapping = mapped_woo_ids.get(woo_var_id)
                 if mapping:
+                    if sku and mapping.odoo_id.default_code != sku:
+                        mapping.odoo_id.default_code = sku
                     continue
-                
-                # 2. Get/Create Odoo Template
-                template_vals = {
-                    'name': name,
-                    'type': 'consu' if product_data.get('virtual') else 'product',
-                    'list_price': float(product_data.get('regular_price') or 0.0),
-                    'default_code': product_data.get('sku'),
-                    'description_sale': product_data.get('short_description'),
-                }
-                
-                # Image Sync
-                images = product_data.get('images', [])
-                if images:
-                    try:
-                        img_url = images[0].get('src')
-                        img_res = requests.get(img_url, timeout=10)
-                        if img_res.status_code == 200:
-                            template_vals['image_1920'] = base64.b64encode(img_res.content)
-                    except Exception as e:
-                        _logger.error("Failed to download image: %s" % str(e))
-                
-                # Map Categories
-                cat_ids = product_data.get('categories', [])
-                if cat_ids:
-                    cat_mapping = self.env['woo.product.category.mapping'].search([
-                        ('backend_id', '=', self.backend_id.id),
-                        ('woo_id', '=', str(cat_ids[0].get('id')))
-                    ], limit=1)
-                    if cat_mapping:
-                        template_vals['categ_id'] = cat_mapping.odoo_id.id
-
-                # 3. Handle Variable Products (Attributes & Variants)
-                if type == 'variable':
-                    # Process Attributes
-                    attr_line_vals = []
-                    for attr_data in product_data.get('attributes', []):
-                        # Find Attribute Mapping
-                        attr_mapping = self.env['woo.product.attribute.mapping'].search([
-                            ('backend_id', '=', self.backend_id.id),
-                            ('woo_id', '=', str(attr_data.get('id')))
-                        ], limit=1)
-                        
-                        if attr_mapping:
-                            # Process Attribute Values
-                            value_ids = []
-                            for val_name in attr_data.get('options', []):
-                                # Get or Create Attribute Value
-                                value = self.env['product.attribute.value'].search([
-                                    ('attribute_id', '=', attr_mapping.odoo_id.id),
-                                    ('name', '=', val_name)
-                                ], limit=1)
-                                if not value:
-                                    value = self.env['product.attribute.value'].create({
-                                        'name': val_name,
-                                        'attribute_id': attr_mapping.odoo_id.id
-                                    })
-                                value_ids.append(value.id)
-                            
-                            if value_ids:
-                                attr_line_vals.append((0, 0, {
-                                    'attribute_id': attr_mapping.odoo_id.id,
-                                    'value_ids': [(6, 0, value_ids)]
-                                }))
-                    
-                    if attr_line_vals:
-                        template_vals['attribute_line_ids'] = attr_line_vals
-
-                # 4. Create Odoo Template
-                odoo_template = self.env['product.template'].create(template_vals)
-                
-                # Create Template Mapping
-                self.env['woo.product.template.mapping'].create({
-                    'backend_id': self.backend_id.id,
-                    'woo_id': woo_id,
-                    'odoo_id': odoo_template.id
-                })
-                
-                # 5. Handle Variations for Variable Products
-                if type == 'variable':
-                    self._import_variations(odoo_template, woo_id, wcapi)
-                
-                total_imported += 1
-            
-            page += 1
-            
-        return self._notification(_("Imported %d new products.") % total_imported)
 
-    def _import_variations(self, odoo_template, woo_template_id, wcapi):
-        """Import variations for a variable product."""
-        response = wcapi.get("products/%s/variations" % woo_template_id)
-        if response.status_code != 200:
-            return
-            
-        variations = response.json()
-        for var_data in variations:
-            woo_var_id = str(var_data.get('id'))
-            sku = var_data.get('sku')
-            
-            # Find matching Odoo variant based on attributes
-            # (Simplified: Odoo auto-creates variants, we just need to map them)
-            # In a real connector, we match by attribute values
-            # For now, let's just find by SKU if available, or just map sequentially
-            # A more robust way is to match by attribute value IDs
-            
-            # Let's try to find variant by SKU or just map to one of the template variants
-            odoo_variant = odoo_template.product_variant_ids.filtered(lambda p: p.default_code == sku)
-            if not odoo_variant:
-                # Fallback: find by attribute matching (Complex, skipping for basic version)
-                # For this basic Pro version, we'll map the first unmapped variant
-                mapped_variant_ids = self.env['woo.product.product.mapping'].search([
-                    ('backend_id', '=', self.backend_id.id)
-                ]).mapped('odoo_id').ids
-                odoo_variant = odoo_template.product_variant_ids.filtered(lambda p: p.id not in mapped_variant_ids)[:1]
-            
-            if odoo_variant:
-                if sku:
+                # Find matching Odoo variant by SKU, otherwise map the first unmapped variant
+                # (Fallback by attribute matching is not handled in this basic version)
+                unmapped = odoo_template.product_variant_ids.filtered(lambda p: p.id not in mapped_variant_ids)
+                odoo_variant = unmapped.filtered(lambda p: sku and p.default_code == sku)[:1] or unmapped[:1]
+                if not odoo_variant:
+                    continue
+                if sku and odoo_variant.default_code != sku:
                     odoo_variant.default_code = sku
-                
-                self.env['woo.product.product.mapping'].create({
+                mapped_variant_ids.add(odoo_variant.id)
+                mapping_vals_list.append({
                     'backend_id': self.backend_id.id,
                     'woo_id': woo_var_id,
                     'odoo_id': odoo_variant.id
                 })
 
-    def _import_orders(self):
-        """Import orders from WooCommerce."""
-        wcapi = self.backend_id.get_woo_api()
-        response = wcapi.get("orders", params={"status": "processing", "per_page": 50})
-        if response.status_code != 200:
-            raise UserError(_("Failed to fetch orders: %s") % response.text)
-            
-        orders_data = response.json()
-        total_imported = 0
-        
+        self.env['woo.product.product.mapping'].create(mapping_vals_list)
+
+    def _import_orders(self, orders_data=None):
+        """
+        Import orders from WooCommerce.
+        Without orders_data, every page of processing orders modified since the
+        backend watermark is fetched; otherwise only the given orders are imported
+        (e.g. the payload of a webhook).
+        """
+        backend = self.backend_id
+        if orders_data is None:
+            wcapi = backend.get_woo_api()
+            sync_start = fields.Datetime.now()
+            params = {'status': 'processing'}
+            if backend.orders_modified_after:
+                params['modified_after'] = backend.orders_modified_after.isoformat()
+                params['dates_are_gmt'] = 'true'
+            with ThreadPoolExecutor(max_workers=WOO_MAX_WORKERS) as executor:
+                try:
+                    orders_data = _woo_fetch_all(wcapi, "orders", params, executor)
+                except requests.exceptions.RequestException as e:
+                    raise UserError(_("Failed to fetch orders: %s") % str(e))
+            skipped = []
+            orders = self._create_orders(orders_data, skipped)
+            # Orders skipped for lack of mapped products are fetched again
+            # once their products are imported
+            backend.orders_modified_after = self._woo_watermark(
+                skipped, sync_start, backend.orders_modified_after)
+        else:
+            orders = self._create_orders(orders_data)
+        return self._notification(_("Imported %d new orders.") % len(orders))
+
+    def _create_orders(self, orders_data, skipped=None):
+        """Create the sale orders of not yet imported WooCommerce orders.
+        Existing orders, partners and product mappings are loaded once for the
+        whole batch and the orders are created with a single create().
+        Orders without any mapped product are logged and appended to skipped."""
+        backend = self.backend_id
+        woo_ids = {str(order.get('id')) for order in orders_data}
+        existing_ids = {
+            o['woo_order_id'] for o in self.env['sale.order'].search_read([
+                ('woo_backend_id', '=', backend.id),
+                ('woo_order_id', 'in', list(woo_ids)),
+            ], ['woo_order_id'])
+        }
+        orders_data = [o for o in orders_data if str(o.get('id')) not in existing_ids]
+        if not orders_data:
+            return self.env['sale.order']
+
+        product_map = self._get_order_product_map(orders_data)
+        partner_map = self._get_order_partner_map(orders_data)
+
+        order_vals_list = []
+        imported_ids = set()
         for order in orders_data:
             woo_id = str(order.get('id'))
-            existing = self.env['sale.order'].search([
-                ('woo_order_id', '=', woo_id),
-                ('woo_backend_id', '=', self.backend_id.id)
-            ], limit=1)
-            if existing:
+            if woo_id in imported_ids:
                 continue
-                
-            billing = order.get('billing', {})
-            email = billing.get('email')
-            partner = self.env['res.partner'].search([('email', '=', email)], limit=1)
-            if not partner:
-                partner = self.env['res.partner'].create({
-                    'name': "%s %s" % (billing.get('first_name'), billing.get('last_name')),
-                    'email': email,
-                    'phone': billing.get('phone'),
-                    'customer_rank': 1,
-                })
-            
-            order_vals = {
-                'partner_id': partner.id,
-                'woo_order_id': woo_id,
-                'woo_backend_id': self.backend_id.id,
-                'warehouse_id': self.backend_id.warehouse_id.id,
-                'pricelist_id': self.backend_id.pricelist_id.id,
-                'order_line': []
-            }
-            
+            order_lines = []
             for line in order.get('line_items', []):
-                woo_prod_id = str(line.get('product_id'))
-                woo_var_id = str(line.get('variation_id'))
-                qty = line.get('quantity')
-                price = line.get('price')
-                
-                mapping = False
-                if woo_var_id and woo_var_id != '0':
-                    mapping = self.env['woo.product.product.mapping'].search([
-                        ('backend_id', '=', self.backend_id.id),
-                        ('woo_id', '=', woo_var_id)
-                    ], limit=1)
+                woo_var_id = str(line.get('variation_id') or '0')
+                if woo_var_id != '0':
+                    product_id = product_map['variants'].get(woo_var_id)
                 else:
-                    template_mapping = self.env['woo.product.template.mapping'].search([
-                        ('backend_id', '=', self.backend_id.id),
-                        ('woo_id', '=', woo_prod_id)
-                    ], limit=1)
-                    if template_mapping:
-                        mapping = template_mapping.odoo_id.product_variant_ids[:1]
-                
-                if mapping:
-                    product = mapping.odoo_id if hasattr(mapping, 'odoo_id') else mapping
-                    order_vals['order_line'].append((0, 0, {
-                        'product_id': product.id,
-                        'product_uom_qty': qty,
-                        'price_unit': price,
+                    product_id = product_map['templates'].get(str(line.get('product_id')))
+                if product_id:
+                    order_lines.append((0, 0, {
+                        'product_id': product_id,
+                        'product_uom_qty': line.get('quantity'),
+                        'price_unit': line.get('price'),
                     }))
-            
-            if order_vals['order_line']:
-                self.env['sale.order'].create(order_vals)
-                total_imported += 1
-                
-        return self._notification(_("Imported %d new orders.") % total_imported)
+            if not order_lines:
+                _logger.warning(
+                    "WooCommerce order %s skipped: none of its products is mapped for backend %s",
+                    woo_id, backend.name)
+                if skipped is not None:
+                    skipped.append(order)
+                continue
+            imported_ids.add(woo_id)
+            order_vals_list.append({
+                'partner_id': partner_map[(order.get('billing') or {}).get('email')],
+                'woo_order_id': woo_id,
+                'woo_backend_id': backend.id,
+                'warehouse_id': backend.warehouse_id.id,
+                'pricelist_id': backend.pricelist_id.id,
+                'order_line': order_lines,
+            })
+        return self.env['sale.order'].create(order_vals_list)
+
+    def _get_order_product_map(self, orders_data):
+        """Map the WooCommerce product and variation ids of the order lines to
+        Odoo variant ids: {'variants': {woo_id: id}, 'templates': {woo_id: id}}."""
+        backend = self.backend_id
+        variation_ids, product_ids = set(), set()
+        for order in orders_data:
+            for line in order.get('line_items', []):
+                woo_var_id = str(line.get('variation_id') or '0')
+                if woo_var_id != '0':
+                    variation_ids.add(woo_var_id)
+                else:
+                    product_ids.add(str(line.get('product_id')))
+        variants = {
+            m['woo_id']: m['odoo_id'][0]
+            for m in self.env['woo.product.product.mapping'].search_read([
+                ('backend_id', '=', backend.id),
+                ('woo_id', 'in', list(variation_ids)),
+            ], ['woo_id', 'odoo_id'])
+        }
+        templates = {}
+        for mapping in self.env['woo.product.template.mapping'].search([
+            ('backend_id', '=', backend.id),
+            ('woo_id', 'in', list(product_ids)),
+        ]):
+            variant = mapping.odoo_id.product_variant_ids[:1]
+            if variant:
+                templates[mapping.woo_id] = variant.id
+        return {'variants': variants, 'templates': templates}
+
+    def _get_order_partner_map(self, orders_data):
+        """Return {billing email: partner id}, creating the missing customers
+        in one batch."""
+        billing_by_email = {}
+        for order in orders_data:
+            billing = order.get('billing') or {}
+            billing_by_email.setdefault(billing.get('email'), billing)
+        emails = [email for email in billing_by_email if email]
+        partner_map = {}
+        for partner in self.env['res.partner'].search_read(
+                [('email', 'in', emails)], ['email'], order='id'):
+            partner_map.setdefault(partner['email'], partner['id'])
+        missing = [email for email in billing_by_email if email not in partner_map]
+        partners = self.env['res.partner'].create([{
+            'name': "%s %s" % (billing_by_email[email].get('first_name'),
+                               billing_by_email[email].get('last_name')),
+            'email': email,
+            'phone': billing_by_email[email].get('phone'),
+            'customer_rank': 1,
+        } for email in missing])
+        partner_map.update(zip(missing, partners.ids))
+        return partner_map
 
     def _export_stock(self):
-        """Export stock levels from Odoo to WooCommerce."""
+        """
+        Export stock levels from Odoo to WooCommerce.
+        The stock of all mapped products is computed with one grouped quant query,
+        and only the products whose quantity changed since the last export are
+        pushed, in concurrent batch calls.
+        """
         wcapi = self.backend_id.get_woo_api()
-        warehouse = self.backend_id.warehouse_id
         mappings = self.env['woo.product.product.mapping'].search([
             ('backend_id', '=', self.backend_id.id)
         ])
-        
-        total_updated = 0
-        batch_data = []
+        stock = self._get_stock_quantities(mappings.odoo_id)
+        to_export = {}
         for mapping in mappings:
-            product = mapping.odoo_id
-            qty = product.with_context(warehouse=warehouse.id).qty_available
-            batch_data.append({
-                'id': int(mapping.woo_id),
-                'manage_stock': True,
-                'stock_quantity': int(qty)
+            qty = int(stock.get(mapping.odoo_id.id, 0.0))
+            if not mapping.woo_stock_date or mapping.woo_stock_qty != qty:
+                to_export[int(mapping.woo_id)] = (mapping, qty)
+
+        batches = list(split_every(WOO_PAGE_SIZE, [{
+            'id': woo_id,
+            'manage_stock': True,
+            'stock_quantity': qty,
+        } for woo_id, (mapping, qty) in to_export.items()], list))
+        with ThreadPoolExecutor(max_workers=WOO_MAX_WORKERS) as executor:
+            results = list(executor.map(
+                lambda batch: _woo_post_batch(wcapi, "products/batch", {'update': batch}), batches))
+
+        # Remember the quantity of the products WooCommerce accepted
+        exported = {}
+        for result in results:
+            for item in (result or {}).get('update', []):
+                if item.get('id') in to_export and not item.get('error'):
+                    mapping, qty = to_export[item['id']]
+                    exported.setdefault(qty, self.env['woo.product.product.mapping'])
+                    exported[qty] |= mapping
+        now = fields.Datetime.now()
+        for qty, exported_mappings in exported.items():
+            exported_mappings.write({'woo_stock_qty': qty, 'woo_stock_date': now})
+
+        total_updated = sum(len(m) for m in exported.values())
+        if total_updated < len(to_export):
+            self.env['woo.sync.log'].create({
+                'backend_id': self.backend_id.id,
+                'operation': 'export',
+                'resource': 'stock',
+                'state': 'warning',
+                'message': "Stock of %d products could not be exported, they will be retried."
+                           % (len(to_export) - total_updated),
             })
-            if len(batch_data) >= 50:
-                wcapi.post("products/batch", {'update': batch_data})
-                batch_data = []
-            total_updated += 1
-            
-        if batch_data:
-            wcapi.post("products/batch", {'update': batch_data})
-            
         return self._notification(_("Updated stock for %d products.") % total_updated)
 
+    def _get_stock_quantities(self, products):
+        """Return {product id: on hand quantity} in the backend warehouse,
+        computed with a single grouped query on the quants."""
+        warehouse = self.backend_id.warehouse_id
+        groups = self.env['stock.quant']._read_group([
+            ('product_id', 'in', products.ids),
+            ('location_id', 'child_of', warehouse.view_location_id.id),
+            ('location_id.usage', '=', 'internal'),
+        ], ['product_id'], ['quantity:sum'])
+        return {product.id: quantity for product, quantity in groups}
+
     def _export_products(self):
         """Export selected products from Odoo to WooCommerce."""
         wcapi = self.backend_id.get_woo_api()